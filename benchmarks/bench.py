@@ -0,0 +1,268 @@
+# Benchmark suite for the simulator hot paths, with regression tracking
+#
+# Every case runs on synthetic datasets (see benchmarks/datasets.py) at scaled sizes, in number of steps,
+# so the suite does not need the Git LFS files. Results are stored as JSON and can be compared:
+#
+#   PYTHONPATH=. python -m benchmarks.bench run --sizes 10000,100000 --output bench.json
+#   PYTHONPATH=. python -m benchmarks.bench compare baseline.json bench.json --threshold 0.10
+#
+# The compare command exits with status 1 if any case is slower than the baseline beyond the threshold.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.program.program import Program, CLOCK_TICK_MODEL_FLOAT, CLOCK_TICK_MODEL_INTEGER
+from benchmarks import bench_components, datasets
+
+CONFIG_DIR = "src/input/files"
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10
+
+
+# Loads a shipped config scaled to n_steps, with dataset paths pointing to synthetic files
+def _scaled_config(filename: str, n_steps: int, data_dir: str) -> dict:
+    config = inp.load_config_from_file(os.path.join(CONFIG_DIR, filename))
+    step = config["simulation"]["step"]
+    config["simulation"]["duration"] = (n_steps - 1) * step
+
+    supply_cfg = config["supply"]
+    if supply_cfg["type"] == "harvesting":
+        n_samples = int(n_steps * step / supply_cfg["sampling_period"]) + 1
+        supply_cfg["profile_filepath"] = datasets.write_profile_csv(
+            data_dir, n_samples, supply_cfg["sampling_period"])
+    if config.get("program") is not None:
+        config["program"]["filepath"] = datasets.write_program(data_dir)
+    return config
+
+
+def _shipped_configs() -> list:
+    return sorted(f for f in os.listdir(CONFIG_DIR) if f.startswith("config-") and f.endswith(".json"))
+
+
+# Each case builder returns a zero-argument callable timed by the suite (setup is excluded)
+# Cases with a 'max_size' are skipped beyond it, when they would not fit in memory.
+def _case_simulator_run(filename):
+    def build(n_steps, data_dir):
+        scenario = inp.compile_config(
+            _scaled_config(filename, n_steps, data_dir))
+        return lambda: simulator.run(inp.Input(scenario))
+    return build
+
+
+# Compiled backend, JIT compilation is triggered once at build time so only the run is timed
+def _case_kernel_run(filename):
+    def build(n_steps, data_dir):
+        from src.simulator import kernel
+
+        scenario = inp.compile_config(
+            _scaled_config(filename, n_steps, data_dir))
+        kernel.run(inp.Input(scenario))
+        return lambda: kernel.run(inp.Input(scenario))
+    return build
+
+
+def _case_program(tick_model):
+    def build(n_steps, data_dir):
+        prog = Program(datasets.write_program(data_dir), 0.00192, 0.000001,
+                       processing_clock=0.005, tick_model=tick_model)
+
+        def fn():
+            for _ in range(n_steps):
+                prog.get_cost_for_t_step(0.5)
+        return fn
+    return build
+
+
+def _case_harvesting_profile(n_steps, data_dir):
+    config = _scaled_config("config-complete.json", n_steps, data_dir)
+    t_vector = inp.TimeVector(0, config["simulation"]["step"], n_steps)
+
+    supply_cls = inp._SUPPLY_REGISTRY["harvesting"]
+    return lambda: supply_cls(config["supply"], t_vector, config["simulation"]["step"])
+
+
+def _case_teg_parser(n_steps, data_dir):
+    from src.eh import eh
+
+    class SyntheticTEGParser(eh.TEGDataHDF5Parser):
+        INPUT_FILEPATH = datasets.write_teg_hdf5(data_dir, n_steps)
+
+    output_filepath = os.path.join(data_dir, "teg-out.csv")
+
+    def fn():
+        parser = SyntheticTEGParser(output_filepath)
+        parser.write_output_to_csv(parser.parse_output())
+    return fn
+
+
+def _case_output_writer(writer_name):
+    def build(n_steps, data_dir):
+        import src.output.output as out
+
+        sim_output = simulator.run(inp.Input(
+            _scaled_config("config-complete-pmic.json", n_steps, data_dir)))
+        if writer_name in ("write_to_excel", "plot"):
+            with _working_directory(data_dir):
+                out.write_to_csv(sim_output)
+            if writer_name == "plot":
+                with _working_directory(data_dir):
+                    out.write_to_excel()
+
+        writer = getattr(out, writer_name)
+
+        def fn():
+            with _working_directory(data_dir):
+                if writer_name in ("write_to_excel", "plot"):
+                    writer()
+                else:
+                    writer(sim_output)
+        return fn
+    return build
+
+
+class _working_directory:
+    def __init__(self, path):
+        self.path = path
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = os.getcwd()
+        os.chdir(self.path)
+
+    def __exit__(self, *exc):
+        os.chdir(self.previous)
+
+
+def _numba_available() -> bool:
+    import importlib.util
+    return importlib.util.find_spec("numba") is not None
+
+
+def _cases() -> dict:
+    cases = {}
+    for filename in _shipped_configs():
+        cases[f"simulator.run[{filename}]"] = (
+            _case_simulator_run(filename), 1_000_000)
+    if _numba_available():
+        cases["kernel.run[config-complete-pmic.json]"] = (
+            _case_kernel_run("config-complete-pmic.json"), None)
+    cases["program.get_cost_for_t_step[float]"] = (
+        _case_program(CLOCK_TICK_MODEL_FLOAT), None)
+    cases["program.get_cost_for_t_step[integer]"] = (
+        _case_program(CLOCK_TICK_MODEL_INTEGER), None)
+    cases["supply.HarvestingSupply.profile"] = (_case_harvesting_profile, None)
+    cases["eh.TEGDataHDF5Parser"] = (_case_teg_parser, None)
+    for writer_name in ["write_to_log", "write_to_csv", "write_to_excel"]:
+        cases[f"output.{writer_name}"] = (
+            _case_output_writer(writer_name), 100_000)
+    return cases
+
+
+# Runs the selected cases at every size, keeping the best of 'repeat' runs
+def run(sizes: list, repeat: int = DEFAULT_REPEAT, select: str = None) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name, (build, max_size) in _cases().items():
+            if select and select not in name:
+                continue
+            for size in sizes:
+                if max_size is not None and size > max_size:
+                    continue
+                fn = build(size, data_dir)
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    fn()
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                results[f"{name}@{size}"] = {
+                    "case": name,
+                    "size": size,
+                    "seconds": best,
+                    "ns_per_step": best * 1e9 / size,
+                }
+                print(f"{name:<48} {size:>10} {best:>10.4f}s {best * 1e9 / size:>10.1f} ns/step")
+
+    if not select or "components" in select:
+        for name, ns in bench_components.run(min(sizes)).items():
+            results[f"components.{name}"] = {
+                "case": f"components.{name}", "size": min(sizes), "seconds": ns * min(sizes) / 1e9, "ns_per_step": ns}
+            print(f"{'components.' + name:<48} {min(sizes):>10} {'':>11} {ns:>10.1f} ns/step")
+
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+# Compares two result files, returning the cases slower than baseline beyond the threshold
+# Format: [(key, baseline_seconds, current_seconds, ratio)]
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    regressions = []
+    for key, entry in current["results"].items():
+        base_entry = baseline["results"].get(key)
+        if base_entry is None or base_entry["ns_per_step"] <= 0:
+            continue
+        ratio = entry["ns_per_step"] / base_entry["ns_per_step"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                (key, base_entry["seconds"], entry["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark suite for the BEHS simulator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                            help="comma-separated number of steps, e.g. 10000,100000,1000000")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--select", default=None,
+                            help="only run cases containing this substring")
+    run_parser.add_argument("--output", default="bench.json")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        sizes = [int(size) for size in args.sizes.split(",")]
+        results = run(sizes, args.repeat, args.select)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    for key, base_seconds, seconds, ratio in regressions:
+        print(
+            f"REGRESSION {key}: {base_seconds:.4f}s -> {seconds:.4f}s ({(ratio - 1) * 100:+.1f}%)")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold * 100:.0f}%.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Microbenchmark of the per-step cost of each BEHS component
+# Reports the mean time per refresh() call in nanoseconds.
+#
+# Usage: PYTHONPATH=. python benchmarks/bench_components.py [--steps N]
+
+import argparse
+import time
+
+import src.input.input as inp
+from src.behs.energystorage import Capacitor
+from src.behs.energysupply import ConstantSupply, HarvestingSupply
+from src.behs.load import MCU, Resistor
+from src.behs.pmic import BoostBuckPMIC
+
+_PMIC_CONFIG_PATH = "src/input/files/config-complete-pmic.json"
+_SIMPLE_CONFIG_PATH = "src/input/files/config-simple.json"
+
+
+# Times fn(i) for i in range(steps), returning nanoseconds per call
+def _ns_per_step(fn, steps: int) -> float:
+    start = time.perf_counter_ns()
+    for i in range(steps):
+        fn(i)
+    return (time.perf_counter_ns() - start) / steps
+
+
+# Builds each component from the shipped configs and a refresh() closure driving it with varying inputs
+def _component_cases(steps: int) -> dict:
+    pmic_cfg = inp.load_config_from_file(_PMIC_CONFIG_PATH)
+    simple_cfg = inp.load_config_from_file(_SIMPLE_CONFIG_PATH)
+    t_vector = inp.TimeVector(0, 0.5, steps)
+    t_step = 0.5
+
+    constant = ConstantSupply(simple_cfg["supply"], t_vector, t_step)
+    harvesting = HarvestingSupply(
+        pmic_cfg["supply"], t_vector, t_step, profile=[0.001 * (i % 7) for i in range(steps)])
+    capacitor = Capacitor(pmic_cfg["storage"])
+    resistor = Resistor(simple_cfg["load"])
+    mcu = MCU(pmic_cfg["load"])
+    pmic = BoostBuckPMIC(pmic_cfg["pmic"])
+
+    # Voltages sweep through every MCU mode and PMIC status
+    voltages = [0.25 * (i % 24) for i in range(64)]
+
+    return {
+        "ConstantSupply": lambda i: constant.refresh(i, t_step),
+        "HarvestingSupply": lambda i: harvesting.refresh(i, t_step),
+        "Capacitor": lambda i: capacitor.refresh(0.002 if i % 3 else 0.0, 0.001, t_step),
+        "Resistor": lambda i: resistor.refresh(voltages[i & 63], t_step),
+        "MCU": lambda i: mcu.refresh(voltages[i & 63], t_step),
+        "BoostBuckPMIC": lambda i: pmic.refresh(0.002, 0.001, voltages[i & 63], t_step),
+    }
+
+
+def run(steps: int) -> dict:
+    return {name: _ns_per_step(fn, steps) for name, fn in _component_cases(steps).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for name, ns in run(args.steps).items():
+        print(f"{name:<18} {ns:>8.1f} ns/step")
+
+
+if __name__ == "__main__":
+    main()
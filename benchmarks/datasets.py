@@ -0,0 +1,61 @@
+# Synthetic datasets for the benchmark suite, generated on the fly at any size
+# They follow the layout of the real (Git LFS) files, so benchmarks run without them:
+#   - dataset-teg.csv:  "timestamp" index and a "power_out_w" column
+#   - TP001_env1.h5:    pandas "fixed" HDF5 layout read by TEGDataHDF5Parser
+
+import math
+import os
+
+
+# Deterministic, harvesting-like power trace (W): a slow day/night wave with faster ripples
+def _power_sample(i: int) -> float:
+    return max(0.0, 0.0004 * math.sin(i / 7200.0) + 0.0001 * math.sin(i / 13.0) + 0.0002)
+
+
+# Writes a CSV profile with n_samples rows, returning its path
+def write_profile_csv(directory: str, n_samples: int, sampling_period: float = 0.5) -> str:
+    filepath = os.path.join(directory, f"profile-{n_samples}.csv")
+    if os.path.exists(filepath):
+        return filepath
+
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write("timestamp,power_out_w\n")
+        for i in range(n_samples):
+            f.write(f"{i * sampling_period},{_power_sample(i):.9f}\n")
+    return filepath
+
+
+# Writes a TEG HDF5 dataset with n_samples rows, returning its path
+def write_teg_hdf5(directory: str, n_samples: int) -> str:
+    import h5py
+    import numpy as np
+
+    filepath = os.path.join(directory, f"teg-{n_samples}.h5")
+    if os.path.exists(filepath):
+        return filepath
+
+    index = np.arange(n_samples, dtype=np.int64) * 500_000_000  # 0.5s in ns
+    ichg_ua = np.array([_power_sample(i) / 3.3 * 1e6 for i in range(n_samples)])
+    flags = np.zeros((n_samples, 2), dtype=np.int8)
+    flags[::97, 0] = 1  # a few invalid thermocouple rows
+
+    with h5py.File(filepath, "w") as f:
+        g = f.create_group("data")
+        g["axis1"] = index
+        g["block0_items"] = np.array([b"boost_ichg_ua"])
+        g["block0_values"] = ichg_ua.reshape(-1, 1)
+        g["block1_items"] = np.array(
+            [b"flag_thermocouple_invalid", b"flag_teg_disconnected"])
+        g["block1_values"] = flags
+    return filepath
+
+
+# Writes a program file with the given number of operations, returning its path
+def write_program(directory: str, n_operations: int = 6) -> str:
+    filepath = os.path.join(directory, f"program-{n_operations}.txt")
+    lines = ["RX 0.027 102.5", "PROC 0.00192 1", "SLEEP 0.000001 600",
+             "SENSE 0.006 44", "PROC 0.00192 1", "TX 0.03 1"]
+    with open(filepath, "w", encoding="utf-8") as f:
+        for i in range(n_operations):
+            f.write(lines[i % len(lines)] + "\n")
+    return filepath
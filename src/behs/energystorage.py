@@ -1,10 +1,17 @@
 import math
 from abc import ABC, abstractmethod
 
+# Capacitor operational states are stored as small ints, STATUS_NAMES maps them back to their names
+STATUS_IDLE, STATUS_CHARGING, STATUS_DISCHARGING, STATUS_FULL, STATUS_EMPTY = range(5)
+STATUS_NAMES = ("idle", "charging", "discharging", "full", "empty")
+
 
 # Class EnergyStorage for the BEHS simulation model
 # It represents the energy storage, a circuit component that stores energy for later use.
+# State shared by all storages is declared in __slots__ here. Subclasses may replace 'status' with a property.
 class EnergyStorage(ABC):
+    __slots__ = ("type", "status", "voltage", "current", "energy_stored", "power_stored")
+
     @abstractmethod
     def __init__(self):
         self.type: str
@@ -63,19 +70,29 @@ class EnergyStorage(ABC):
 # It represents a capacitor, estimating its energy from load consumption and energy supply.
 #   E(t) = E(t-1) + Esupply(t) - Eload(t)
 #   V(t) = sqrt(2 * E(t) / C)
+#
+# State is kept in __slots__ and the status as a small int (status_code), to keep per-step attribute traffic low.
 class Capacitor(EnergyStorage):
+    __slots__ = ("CAPACITANCE", "V_MAX", "E_MAX", "status_code", "energy_clipped", "energy_shortfall")
+
     def __init__(self, config):
         self.CAPACITANCE = config.get("capacitance")
         self.V_MAX = config.get("v_oper_max")
         self.E_MAX = 0.5 * self.CAPACITANCE * self.V_MAX ** 2
 
         self.type = config.get("type")
-        self.status = "idle"
+        self.status_code = STATUS_IDLE
         self.voltage = 0.0
         self.current = 0.0
         self.energy_stored = 0.0
         self.power_stored = 0.0
 
+        # Energy lost to the clipping of E(t) at each time step (see refresh):
+        #   - energy_clipped: surplus above E_MAX, which the capacitor cannot hold
+        #   - energy_shortfall: deficit below 0, consumed by the load but not available in storage
+        self.energy_clipped = 0.0
+        self.energy_shortfall = 0.0
+
     # Voltage is estimated from energy stored: V(t) = sqrt(2 * E(t) / C)
     def calculate_voltage(self):
         return math.sqrt(2 * self.energy_stored / self.CAPACITANCE) if self.energy_stored > 0 else 0.0
@@ -100,20 +117,45 @@ class Capacitor(EnergyStorage):
     # - If supply and consumption are equal, the capacitor is "idle"
     # - If energy stored reaches E_MAX, the capacitor is "full"
     # - If energy stored is zero, the capacitor is "empty"
+    #
+    # NOTE: Same equations as EnergyStorage.refresh and the calculate_* methods, inlined with local variables
+    # since this runs once per simulation step.
     def refresh(self, e_supply: float, e_load: float, t_step: float) -> None:
-        super().refresh(e_supply, e_load, t_step)
-
-        delta_energy = e_supply - e_load
-        if self.energy_stored >= self.E_MAX:
-            self.status = "full"
-        elif self.energy_stored <= 0:
-            self.status = "empty"
-        elif delta_energy > 0:
-            self.status = "charging"
-        elif delta_energy < 0:
-            self.status = "discharging"
+        energy = self.energy_stored + e_supply - e_load
+        if energy > 0:
+            if energy <= self.E_MAX:
+                energy_stored = energy
+                self.energy_clipped = 0.0
+            else:
+                energy_stored = self.E_MAX
+                self.energy_clipped = energy - energy_stored
+            self.energy_shortfall = 0.0
+            voltage = math.sqrt(2 * energy_stored / self.CAPACITANCE)
+            power_stored = energy_stored / t_step
+        else:
+            energy_stored = voltage = power_stored = 0.0
+            self.energy_clipped = 0.0
+            self.energy_shortfall = -energy
+
+        self.energy_stored = energy_stored
+        self.voltage = voltage
+        self.power_stored = power_stored
+        self.current = (power_stored / voltage) if voltage > 0 else 0.0
+
+        if energy_stored >= self.E_MAX:
+            self.status_code = STATUS_FULL
+        elif energy_stored <= 0:
+            self.status_code = STATUS_EMPTY
+        elif e_supply > e_load:
+            self.status_code = STATUS_CHARGING
+        elif e_supply < e_load:
+            self.status_code = STATUS_DISCHARGING
         else:
-            self.status = "idle"
+            self.status_code = STATUS_IDLE
+
+    @property
+    def status(self) -> str:
+        return STATUS_NAMES[self.status_code]
 
     def print(self, t_index, file):
         super().print(t_index, file)
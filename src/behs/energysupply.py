@@ -1,5 +1,4 @@
 import random
-import pandas as pd
 
 # According to the literature, an BEHS model has one of these three energy profiles:
 #
@@ -23,7 +22,10 @@ from abc import ABC, abstractmethod
 
 # Class EnergySupply for the BEHS simulation model
 # It represents the energy supply, a component that provides energy to the system.
+# State shared by all supplies is declared in __slots__ here.
 class EnergySupply(ABC):
+    __slots__ = ("type", "filepath", "power_supply", "energy_supply", "profile")
+
     @abstractmethod
     def __init__(self):
         self.type: str
@@ -31,7 +33,7 @@ class EnergySupply(ABC):
         self.filepath: str
         self.power_supply: float    # power supply (W) at time t
         self.energy_supply: float  # energy supply (J) at time t
-        self.profile: list[float]   # power profile over time (W)
+        self.profile: list[float]   # power profile over time (W), None if constant
 
     # Refreshes the energy supply's state at each time step
     @abstractmethod
@@ -53,18 +55,26 @@ class EnergySupply(ABC):
 
 # Class ConstantSupply for the BEHS simulation model, inheriting from EnergySupply Class
 # It represents a constant power supply.
+# The profile is stored as a single scalar (P_BASE), instead of one value per simulation step.
 class ConstantSupply(EnergySupply):
+    __slots__ = ("P_BASE", "SIM_TOTAL_STEPS")
+
     def __init__(self, config, t_vector, t_step):
-        p_base = config.get("p_base")
+        self.P_BASE = config.get("p_base")
+        self.SIM_TOTAL_STEPS = len(t_vector)
 
         self.type = config.get("type")
         self.filepath = ""
         self.power_supply = 0.0
         self.energy_supply = 0.0
-        self.profile = [p_base] * len(t_vector)
+        self.profile = None
 
     def refresh(self, t_index, t_step):
-        super().refresh(t_index, t_step)
+        if not -self.SIM_TOTAL_STEPS <= t_index < self.SIM_TOTAL_STEPS:
+            raise IndexError("ConstantSupply time index out of range")
+        p_base = self.P_BASE
+        self.power_supply = p_base
+        self.energy_supply = p_base * t_step
 
     def print(self, t_index, file):
         super().print(t_index, file)
@@ -72,8 +82,11 @@ class ConstantSupply(EnergySupply):
 
 # Class HarvestingSupply for the BEHS simulation model, inheriting from EnergySupply Class
 # It represents a variable power supply loaded from a real energy harvesting dataset.
+# A previously resampled 'profile' may be given (e.g. from a CompiledScenario) to skip parsing the dataset.
 class HarvestingSupply(EnergySupply):
-    def __init__(self, config, t_vector, t_step):
+    __slots__ = ("SIM_STEP", "SIM_TOTAL_STEPS", "SAMPLING_PERIOD")
+
+    def __init__(self, config, t_vector, t_step, profile=None):
         self.SIM_STEP = t_step
         self.SIM_TOTAL_STEPS = len(t_vector)
         self.SAMPLING_PERIOD = config.get("sampling_period")
@@ -82,9 +95,14 @@ class HarvestingSupply(EnergySupply):
         self.filepath = config.get("profile_filepath")
         self.power_supply = 0.0
         self.energy_supply = 0.0
-        self.profile = self._parse_profile_from_dataset()
+        if profile is not None:
+            self.profile = profile
+        else:
+            self.profile = self._parse_profile_from_dataset()
 
     def _parse_profile_from_dataset(self):
+        import pandas as pd  # imported lazily: only needed to read harvesting datasets
+
         # Reads the CSV file into a dataframe
         df = pd.read_csv(self.filepath, index_col="timestamp")
 
@@ -3,10 +3,18 @@ import math
 
 from src.program.program import Program
 
+# MCU operational modes are stored as small ints, MODE_NAMES maps them back to their names
+# NOTE: Modes are ordered by supply voltage, so e.g. "mode_code >= MODE_STANDBY" means the CPU keeps its state.
+MODE_OFF, MODE_IDLE, MODE_SHUTDOWN, MODE_STANDBY, MODE_ACTIVE = range(5)
+MODE_NAMES = ("off", "idle", "shutdown", "standby", "active")
+
 
 # Class Load for the BEHS simulation model
 # It represents the load, a circuit component that consumes energy from the energy storage
+# State shared by all loads is declared in __slots__ here. Subclasses may replace 'mode' with a property.
 class Load(ABC):
+    __slots__ = ("type", "mode", "v_on", "voltage", "current", "energy_consumed", "total_energy_consumed", "program")
+
     @abstractmethod
     def __init__(self):
         self.type: str
@@ -66,6 +74,8 @@ class Load(ABC):
 # Class Resistor for the BEHS simulation model, inheriting from Load Class
 # It represents a resistor, a Load that consumes constant energy
 class Resistor(Load):
+    __slots__ = ("RESISTANCE", "P_RATING", "V_OPER", "V_MAX")
+
     def __init__(self, config):
         # Class specific attributes
         self.RESISTANCE = config.get("resistance")
@@ -105,8 +115,19 @@ class Resistor(Load):
     def upload_software(self, program):
         super().upload_software(program)
 
+    # NOTE: Same equations as Load.refresh and the calculate_* methods, inlined with local variables
+    # since this runs once per simulation step.
     def refresh(self, v_supply, t_step):
-        super().refresh(v_supply, t_step)
+        if v_supply >= self.v_on:
+            v = min(v_supply, self.V_MAX)
+            self.voltage = v
+            self.current = v / self.RESISTANCE
+            self.energy_consumed = (v ** 2 / self.RESISTANCE) * t_step
+        else:
+            self.voltage = 0.0
+            self.current = 0.0
+            self.energy_consumed = 0.0
+        self.total_energy_consumed += self.energy_consumed
 
     def print(self, t_index, file):
         super().print(t_index, file)
@@ -114,23 +135,32 @@ class Resistor(Load):
 
 # Class MCU for the BEHS simulation model, inheriting from Load Class
 # It represents a microcontroller unit (MCU), a Load that consumes variable energy.
+#
+# Mode costs and voltages are flattened into plain floats at construction,
+# and the mode is kept as a small int (mode_code), to keep per-step attribute traffic low.
 class MCU(Load):
+    __slots__ = ("ACTIVE_COST", "STANDBY_COST", "SHUTDOWN_COST", "V_MIN", "V_MAX", "V_OPER_SHUTDOWN",
+                 "V_OPER_STANDBY", "V_OPER_ACTIVE", "mode_code")
+
     def __init__(self, config):
         modes = config.get("modes")
+        active_mode = modes.get("active")
+        standby_mode = modes.get("standby")
+        shutdown_mode = modes.get("shutdown")
 
         # Class specific attributes
-        self.ACTIVE_MODE = modes.get("active")
-        self.STANDBY_MODE = modes.get("standby")
-        self.SHUTDOWN_MODE = modes.get("shutdown")
+        self.ACTIVE_COST = float(active_mode.get("cost"))
+        self.STANDBY_COST = float(standby_mode.get("cost"))
+        self.SHUTDOWN_COST = float(shutdown_mode.get("cost"))
         self.V_MIN = config.get("v_min")
         self.V_MAX = config.get("v_max")
-        self.V_OPER_SHUTDOWN = self.SHUTDOWN_MODE.get("v_oper")
-        self.V_OPER_STANDBY = self.STANDBY_MODE.get("v_oper")
-        self.V_OPER_ACTIVE = self.ACTIVE_MODE.get("v_oper")
+        self.V_OPER_SHUTDOWN = shutdown_mode.get("v_oper")
+        self.V_OPER_STANDBY = standby_mode.get("v_oper")
+        self.V_OPER_ACTIVE = active_mode.get("v_oper")
 
         # Inherited attributes
         self.type = config.get("type")
-        self.mode = "off"
+        self.mode_code = MODE_OFF
         self.v_on = self.V_MIN
         self.voltage = 0.0
         self.current = 0.0
@@ -146,19 +176,17 @@ class MCU(Load):
         return min(v_supply, self.V_MAX)
 
     def calculate_current(self, v_supply, t_step):
-        active_cost = self.ACTIVE_MODE.get("cost")
-        standby_cost = self.STANDBY_MODE.get("cost")
-        shutdown_cost = self.SHUTDOWN_MODE.get("cost")
+        mode_code = self.mode_code
 
         # We only execute the program if the MCU is in active mode
-        if self.mode == "active":
+        if mode_code == MODE_ACTIVE:
             if self.program is not None:
                 return self.program.get_cost_for_t_step(t_step)
-            return active_cost
-        elif self.mode == "standby":
-            return standby_cost
-        elif self.mode == "shutdown":
-            return shutdown_cost
+            return self.ACTIVE_COST
+        elif mode_code == MODE_STANDBY:
+            return self.STANDBY_COST
+        elif mode_code == MODE_SHUTDOWN:
+            return self.SHUTDOWN_COST
         else:
             return 0.0
 
@@ -171,23 +199,27 @@ class MCU(Load):
     def refresh(self, v_supply, t_step):
         # Update mode before calculating energy so costs reflect current state
         if v_supply < self.V_MIN:
-            self.mode = "off"
-        elif self.V_MIN <= v_supply < self.V_OPER_SHUTDOWN:
-            self.mode = "idle"
-        elif self.V_OPER_SHUTDOWN <= v_supply < self.V_OPER_STANDBY:
-            self.mode = "shutdown"
-        elif self.V_OPER_STANDBY <= v_supply < self.V_OPER_ACTIVE:
-            self.mode = "standby"
-        elif v_supply >= self.V_OPER_ACTIVE:
-            self.mode = "active"
+            self.mode_code = MODE_OFF
+        elif v_supply < self.V_OPER_SHUTDOWN:
+            self.mode_code = MODE_IDLE
+        elif v_supply < self.V_OPER_STANDBY:
+            self.mode_code = MODE_SHUTDOWN
+        elif v_supply < self.V_OPER_ACTIVE:
+            self.mode_code = MODE_STANDBY
+        else:
+            self.mode_code = MODE_ACTIVE
 
         # CPU is reset and there's no full data retention if MCU loses power (not "active" or "standby")
         # Unless the Program is designed to save state, it will be reset
-        if self.program is not None and self.mode not in ["active", "standby"]:
+        if self.program is not None and self.mode_code < MODE_STANDBY:
             self.program.reset()
 
         # Update Load state
         super().refresh(v_supply, t_step)
 
+    @property
+    def mode(self) -> str:
+        return MODE_NAMES[self.mode_code]
+
     def print(self, t_index, file):
         super().print(t_index, file)
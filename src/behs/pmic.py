@@ -1,5 +1,11 @@
 from abc import ABC, abstractmethod
 
+# PMIC operating modes are stored as small ints, STATUS_NAMES maps them back to their names
+STATUS_OFF, STATUS_COLD_START, STATUS_BOOST_ONLY, STATUS_CHARGING, STATUS_DISCHARGING, STATUS_IDLE, STATUS_FULL = range(
+    7)
+STATUS_NAMES = ("off", "cold_start", "boost_only",
+                "charging", "discharging", "idle", "full")
+
 
 # Class PMIC for the BEHS simulation model
 # It represents a Power Management IC (PMIC) that controls the energy flow of the BEHS system.
@@ -7,7 +13,10 @@ from abc import ABC, abstractmethod
 # The PMIC model manages the energy input and output of the Energy Storage element.
 #   - Input: Supply -> Storage (boost charger)
 #   - Output: Storage -> Load (regulated buck converter)
+# State shared by all PMICs is declared in __slots__ here. Subclasses may replace 'status' with a property.
 class PMIC(ABC):
+    __slots__ = ("type", "status", "v_out", "vbat_ok", "energy_to_storage", "energy_from_storage")
+
     @abstractmethod
     def __init__(self):
         self.type: str
@@ -66,7 +75,13 @@ class PMIC(ABC):
 
 # Class BoostBuckPMIC for the BEHS simulation model, inheriting from PMIC Class
 # Represents a PMIC with a boost charger and a buck converter.
+#
+# State is kept in __slots__ and the status as a small int (status_code), to keep per-step attribute traffic low.
 class BoostBuckPMIC(PMIC):
+    __slots__ = ("V_IN_COLD_START", "V_BOOST_THRESH", "V_BAT_UV", "V_BAT_OV", "V_BAT_OK_LOW", "V_BAT_OK_HIGH",
+                 "V_OUT_REG", "MPPT_EFFICIENCY", "BOOST_EFFICIENCY", "BUCK_EFFICIENCY", "COLD_START_EFFICIENCY",
+                 "consider_efficiency", "status_code", "energy_rejected", "energy_lost")
+
     def __init__(self, config):
         self.V_IN_COLD_START = config.get("v_in_cold_start")
         self.V_BOOST_THRESH = config.get("v_boost_thresh")
@@ -78,12 +93,23 @@ class BoostBuckPMIC(PMIC):
 
         self.type = config.get("type")
         self.consider_efficiency = config.get("consider_efficiency", True)
-        self.status = "off"
+        self.status_code = STATUS_OFF
         self.v_out = 0.0
         self.vbat_ok = False
         self.energy_to_storage = 0.0
         self.energy_from_storage = 0.0
 
+        # Energy that does not reach its destination at each time step (see refresh):
+        #   - energy_rejected: supply energy refused while v_storage >= V_BAT_OV
+        #   - energy_lost: boost (incl. MPPT and cold start) and buck conversion losses
+        self.energy_rejected = 0.0
+        self.energy_lost = 0.0
+
+        # Conversions are lossless (efficiency 1.0) if efficiency is not considered
+        self.MPPT_EFFICIENCY = 1.0
+        self.BOOST_EFFICIENCY = 1.0
+        self.BUCK_EFFICIENCY = 1.0
+        self.COLD_START_EFFICIENCY = 1.0
         if self.consider_efficiency:
             self.MPPT_EFFICIENCY = config.get("mppt_efficiency")
             self.BOOST_EFFICIENCY = config.get("boost_efficiency")
@@ -139,18 +165,33 @@ class BoostBuckPMIC(PMIC):
     def refresh(self, e_supply: float, e_load: float, v_storage: float, t_step: float) -> None:
         super().refresh(e_supply, e_load, v_storage, t_step)
 
+        energy_to_storage = self.energy_to_storage
+        energy_from_storage = self.energy_from_storage
+        if e_supply > 0.0 and v_storage >= self.V_BAT_OV:
+            self.energy_rejected = e_supply
+            boost_loss = 0.0
+        else:
+            self.energy_rejected = 0.0
+            boost_loss = e_supply - energy_to_storage if e_supply > 0.0 else 0.0
+        buck_loss = energy_from_storage - e_load if energy_from_storage > 0.0 else 0.0
+        self.energy_lost = boost_loss + buck_loss
+
         if v_storage < self.V_BOOST_THRESH:
-            self.status = "cold_start"
+            self.status_code = STATUS_COLD_START
         elif v_storage < self.V_BAT_UV:
-            self.status = "boost_only"
+            self.status_code = STATUS_BOOST_ONLY
         elif v_storage >= self.V_BAT_OV:
-            self.status = "full"
-        elif self.energy_to_storage > self.energy_from_storage:
-            self.status = "charging"
-        elif self.energy_from_storage > self.energy_to_storage:
-            self.status = "discharging"
+            self.status_code = STATUS_FULL
+        elif energy_to_storage > energy_from_storage:
+            self.status_code = STATUS_CHARGING
+        elif energy_from_storage > energy_to_storage:
+            self.status_code = STATUS_DISCHARGING
         else:
-            self.status = "idle"
+            self.status_code = STATUS_IDLE
+
+    @property
+    def status(self) -> str:
+        return STATUS_NAMES[self.status_code]
 
     def print(self, t_index, file):
         super().print(t_index, file)
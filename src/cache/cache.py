@@ -0,0 +1,156 @@
+# Package used to store simulation artifacts (compiled scenarios, results) on the local disk
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = ".cache/behs"
+
+
+# Builds a stable hex digest for any JSON-serialisable value plus optional raw byte chunks
+# Dict keys are sorted, so two configs with the same content always get the same key.
+def content_hash(value, *chunks: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(value, sort_keys=True,
+                  separators=(",", ":")).encode("utf-8"))
+    for chunk in chunks:
+        digest.update(b"\0")
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Fingerprint of a file's content, memoized per (path, size, mtime) in this process
+# Large datasets are only re-hashed when they change on disk.
+_FILE_FINGERPRINTS = {}
+
+
+def file_fingerprint(filepath: str) -> str:
+    stat = os.stat(filepath)
+    memo_key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _FILE_FINGERPRINTS:
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _FILE_FINGERPRINTS[memo_key] = digest.hexdigest()
+    return _FILE_FINGERPRINTS[memo_key]
+
+
+# Class LRUDict is an in-memory dict holding at most 'max_entries' entries (None: unbounded)
+# Reads and writes mark an entry as most recently used, the least recently used one is dropped first.
+class LRUDict(OrderedDict):
+    def __init__(self, max_entries: int = None):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"LRUDict max_entries must be >= 1, got {max_entries}.")
+        super().__init__()
+        self.max_entries = max_entries
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while self.max_entries is not None and len(self) > self.max_entries:
+            self.popitem(last=False)
+
+
+# Class DiskCache is a key-value store of pickled objects, one file per key
+# Entries are written atomically (temporary file + rename), so concurrent readers never see partial files.
+# Each entry is prefixed with the SHA-256 digest of its payload, which is verified on every read,
+# so a hit always returns exactly the bytes that were stored.
+#   - max_bytes: if given, least recently used entries are evicted once the cache grows beyond it
+class DiskCache:
+    SUFFIX = ".pkl"
+    DIGEST_SIZE = 32
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    # Returns the cached value for key, or default if missing, unreadable or corrupted
+    # A hit refreshes the entry's modification time, which is used as its LRU timestamp.
+    def get(self, key: str, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return default
+
+        digest, payload = data[:self.DIGEST_SIZE], data[self.DIGEST_SIZE:]
+        if hashlib.sha256(payload).digest() != digest:
+            return default
+        try:
+            value = pickle.loads(payload)
+        except (EOFError, pickle.UnpicklingError):
+            return default
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(hashlib.sha256(payload).digest())
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if self.max_bytes is not None:
+            self._evict(keep=key)
+
+    # Removes least recently used entries until the total size fits max_bytes
+    # The entry that was just written ('keep') is never evicted.
+    def _evict(self, keep: str) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, name, stat.st_size))
+            total += stat.st_size
+
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep + self.SUFFIX:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+    def delete(self, key: str) -> None:
+        if key in self:
+            os.remove(self._path(key))
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith(self.SUFFIX):
+                os.remove(os.path.join(self.directory, name))
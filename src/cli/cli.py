@@ -0,0 +1,248 @@
+# Command line interface of the simulator
+#
+# Runs one or more configs (paths or glob patterns), concurrently with --jobs, writing the selected outputs
+# of each config to its own directory, <output-dir>/<config name>/:
+#
+#   python main.py src/input/files/*.json --jobs 4 --sinks log,csv,summary --report report.json
+#   python main.py --sinks log,csv,summary,excel --plot  # default config, then plots it
+#   python main.py --ui                                  # input form
+#   python main.py src/input/files/config-complete.json --setup-profile  # generates the harvesting profile first
+#
+# tkinter, pandas and matplotlib are only imported when asked for (--ui, the "excel" sink, --plot),
+# so a headless run starts with the simulator modules only.
+#
+# The run report has one record per config, in the given order:
+#   {"config", "output_dir", "status" ("ok" or "error"), "error", "seconds", "summary", "profile", "throughput"}
+# where "summary" is the run summary (see pipeline.SummarySink), "profile" the estimated seconds
+# per component phase (with --profile, see simulator/profiler.py), and "throughput" the completed
+# Program cycles per hour (see simulator.program_throughput).
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import src.input.input as inp
+import src.output.output as out
+import src.output.pipeline as pipeline
+import src.simulator.simulator as simulator
+
+DEFAULT_OUTPUT_DIR = "output"
+DEFAULT_SINKS = "log,csv,summary"
+DEFAULT_PROFILE_SAMPLE_EVERY = 10
+
+# Output file of each sink, inside the output directory of a config
+SINK_FILES = {
+    "log": "output.log",
+    "csv": "output.csv",
+    "summary": "output-summary.json",
+    "excel": "output.xlsx",
+}
+PROFILE_TRACE_FILE = "profile.json"
+
+
+# Expands config paths and glob patterns, keeping the given order and dropping duplicates
+def expand_configs(patterns: list) -> list:
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise ValueError(f"No config file matches '{pattern}'.")
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+# Output directory of each config: <root>/<config name>, suffixed when names repeat
+def output_dirs(paths: list, root: str) -> list:
+    dirs = []
+    seen = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}-{seen[name]}"
+        dirs.append(os.path.join(root, name))
+    return dirs
+
+
+def parse_sinks(value: str) -> list:
+    sinks = [name.strip() for name in value.split(",") if name.strip()]
+    for name in sinks:
+        if name not in SINK_FILES:
+            raise ValueError(
+                f"Unknown sink '{name}', expected any of: {', '.join(SINK_FILES)}.")
+    if "excel" in sinks and "csv" not in sinks:
+        raise ValueError("The 'excel' sink is built from the CSV, it requires the 'csv' sink.")
+    return sinks
+
+
+# Runs one config, writing its outputs to 'output_dir', and returns its report record
+# Errors are recorded, not raised, so one bad config does not stop a batch.
+#   - profile_every: if given, the run is profiled, timing one in 'profile_every' steps.
+def run_config(config_path: str, output_dir: str, sinks: list, profile_every: int = None) -> dict:
+    record = {"config": config_path, "output_dir": output_dir, "status": "ok",
+              "error": None, "seconds": None, "summary": None, "profile": None,
+              "throughput": None}
+    start = time.perf_counter()
+    try:
+        # Components print their set-up details, stdout is kept for the results
+        with contextlib.redirect_stdout(sys.stderr):
+            _run_config(config_path, output_dir, sinks, profile_every, record)
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def _run_config(config_path, output_dir, sinks, profile_every, record):
+    sim_input = inp.Input(inp.load_config_from_file(config_path))
+    os.makedirs(output_dir, exist_ok=True)
+
+    def path(name):
+        return os.path.join(output_dir, SINK_FILES[name])
+
+    summary = pipeline.SummarySink(path("summary") if "summary" in sinks else None)
+    run_sinks = [summary]
+    if "log" in sinks:
+        run_sinks.append(pipeline.LogSink(path("log")))
+    if "csv" in sinks:
+        run_sinks.append(pipeline.CsvSink(path("csv")))
+
+    if profile_every is None:
+        pipeline.run(sim_input, run_sinks)
+    else:
+        from src.simulator.profiler import Profiler
+
+        profiler = Profiler(sample_every=profile_every)
+        items = list(simulator.run(sim_input, profiler=profiler).items())
+        with pipeline.OutputPipeline(run_sinks) as output:
+            for i in range(0, len(items), simulator.DEFAULT_CHUNK_SIZE):
+                output.write(items[i:i + simulator.DEFAULT_CHUNK_SIZE])
+        profiler.write_chrome_trace(os.path.join(output_dir, PROFILE_TRACE_FILE))
+        record["profile"] = profiler.estimated_seconds()
+
+    if "excel" in sinks:
+        out.write_to_excel(path("csv"), path("excel"))
+    record["summary"] = summary.summary
+    record["throughput"] = simulator.program_throughput(sim_input, summary.summary["steps"])
+
+
+# Runs all configs, in parallel processes when jobs > 1, returning their records in the given order
+def run_configs(paths: list, output_root: str, sinks: list, jobs: int = 1,
+                profile_every: int = None) -> list:
+    dirs = output_dirs(paths, output_root)
+    if jobs == 1 or len(paths) == 1:
+        return [run_config(path, output_dir, sinks, profile_every)
+                for path, output_dir in zip(paths, dirs)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_config, paths, dirs,
+                                 [sinks] * len(paths), [profile_every] * len(paths)))
+
+
+# Generates the harvesting supply profile CSV of each config (see inp.set_up_eh_supply_profile_file)
+# A profile shared by several configs is generated once. Returns the generated profile paths.
+def set_up_profiles(paths: list) -> list:
+    generated = []
+    for path in paths:
+        supply_cfg = inp.load_config_from_file(path).get("supply") or {}
+        if supply_cfg.get("profile_filepath") in generated:
+            continue
+        profile_filepath = inp.set_up_eh_supply_profile_file(supply_cfg)
+        if profile_filepath is not None:
+            generated.append(profile_filepath)
+    return generated
+
+
+# Opens the input form, which runs simulations in the background and writes their outputs to 'output_dir'
+def run_ui(output_dir: str = DEFAULT_OUTPUT_DIR) -> None:
+    import src.interface.interface as ui
+
+    ui.build_input_form(os.path.join(output_dir, "ui")).run()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Simulator for Battery-less Energy Harvesting Systems (BEHS)")
+    parser.add_argument("configs", nargs="*", default=[inp.CONFIG_FILE_PATH],
+                        help=f"config files or glob patterns (default: {inp.CONFIG_FILE_PATH})")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of configs run in parallel (0 for the CPU count)")
+    parser.add_argument("--output-dir", "-o", default=DEFAULT_OUTPUT_DIR,
+                        help="root of the output directories, one per config")
+    parser.add_argument("--sinks", default=DEFAULT_SINKS,
+                        help=f"comma-separated outputs, any of: {', '.join(SINK_FILES)} (default: {DEFAULT_SINKS})")
+    parser.add_argument("--profile", nargs="?", type=int, const=DEFAULT_PROFILE_SAMPLE_EVERY, default=None,
+                        metavar="SAMPLE_EVERY",
+                        help="profile each run, timing one in SAMPLE_EVERY steps "
+                             f"(default: {DEFAULT_PROFILE_SAMPLE_EVERY}), and write a trace per config")
+    parser.add_argument("--report", default=None,
+                        help="write the JSON run report to this file ('-' for stdout)")
+    parser.add_argument("--plot", action="store_true",
+                        help="plot the output of each config once all runs finish (requires the 'csv' sink)")
+    parser.add_argument("--setup-profile", action="store_true",
+                        help="generate the harvesting supply profile CSV of each config from its EH dataset "
+                             "before running (only needed once per profile)")
+    parser.add_argument("--ui", action="store_true",
+                        help="enter the config in the input form instead")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.ui:
+        run_ui(args.output_dir)
+        return 0
+
+    try:
+        paths = expand_configs(args.configs)
+        sinks = parse_sinks(args.sinks)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.plot and "csv" not in sinks:
+        parser.error("--plot requires the 'csv' sink.")
+    if args.jobs < 0:
+        parser.error("--jobs must be >= 0.")
+    if args.profile is not None and args.profile < 1:
+        parser.error("--profile must sample every >= 1 steps.")
+
+    if args.setup_profile:
+        for profile_filepath in set_up_profiles(paths):
+            print(f"Supply profile written to {profile_filepath}")
+
+    jobs = args.jobs or os.cpu_count() or 1
+    records = run_configs(paths, args.output_dir, sinks, jobs, args.profile)
+
+    failed = [record for record in records if record["status"] != "ok"]
+    report = {"configs": len(records), "failed": len(failed), "records": records}
+    if args.report == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for record in records:
+            if record["status"] == "ok":
+                print(f"ok     {record['config']} -> {record['output_dir']} ({record['seconds']:.2f}s)")
+            else:
+                print(f"error  {record['config']}: {record['error']}")
+        if args.report is not None:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.report}")
+
+    if args.plot:
+        import pandas as pd
+
+        for record in records:
+            if record["status"] == "ok":
+                out.plot(pd.read_csv(os.path.join(record["output_dir"], SINK_FILES["csv"]),
+                                     dtype={"program_executed_ops": str}))
+
+    return 1 if failed else 0
@@ -1,145 +1,632 @@
+import copy
 import json
-import src.behs.energysupply as supply
-import src.behs.energystorage as storage
-import src.behs.load as load
-import src.behs.pmic as pmic
-from src.eh import eh
+import math
+import warnings
+from collections.abc import Sequence
+from dataclasses import dataclass
+import src.program.policy as policy
 import src.program.program as program
+from src.cache.cache import DiskCache, content_hash, file_fingerprint
+from src.input.registry import ComponentRegistry
 
 CONFIG_FILE_PATH = "src/input/files/config-complete-pmic.json"
 
-_SUPPLY_REGISTRY = {
-    "constant": supply.ConstantSupply,
-    "harvesting": supply.HarvestingSupply,
-}
 
-_STORAGE_REGISTRY = {
-    "capacitor": storage.Capacitor,
-}
+# Class ConfigWarning is issued (see the warnings module) for valid configs that rely on a questionable default
+# Unlike errors (ValueError), callers decide how to report or filter them, e.g. warnings.catch_warnings(record=True).
+class ConfigWarning(UserWarning):
+    pass
 
-_LOAD_REGISTRY = {
-    "resistor": load.Resistor,
-    "mcu": load.MCU,
-}
+# Component registries, resolved lazily: a module is only imported when a config references one of its types
+# New types can be added by entry points or plugin directories, see src/input/registry.py
+_SUPPLY_REGISTRY = ComponentRegistry("supply", {
+    "constant": "src.behs.energysupply:ConstantSupply",
+    "harvesting": "src.behs.energysupply:HarvestingSupply",
+})
 
-_PMIC_REGISTRY = {
-    "boost_buck": pmic.BoostBuckPMIC,
-}
+_STORAGE_REGISTRY = ComponentRegistry("storage", {
+    "capacitor": "src.behs.energystorage:Capacitor",
+})
+
+_LOAD_REGISTRY = ComponentRegistry("load", {
+    "resistor": "src.behs.load:Resistor",
+    "mcu": "src.behs.load:MCU",
+})
+
+_PMIC_REGISTRY = ComponentRegistry("pmic", {
+    "boost_buck": "src.behs.pmic:BoostBuckPMIC",
+})
 
 _UPLOAD_SOFTWARE_REGISTRY = ["mcu"]
 
 _SET_UP_EH_SUPPLY_PROFILE_REGISTRY = ["harvesting"]
 
 
+# Class TimeVector represents the simulation time grid as an implicit range (start, step, count)
+# It behaves like a read-only list of times, but uses O(1) memory regardless of the duration.
+# Each time is computed from its index (start + i * step), so there is no float accumulation drift.
+class TimeVector(Sequence):
+    def __init__(self, start: float, step: float, count: int):
+        self.start = start
+        self.step = step
+        self.count = count
+
+    # Returns the simulation time at index i
+    def time_at(self, i: int) -> float:
+        return self.start + i * self.step
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.time_at(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("TimeVector index out of range")
+        return self.time_at(index)
+
+    def __iter__(self):
+        start, step = self.start, self.step
+        for i in range(self.count):
+            yield start + i * step
+
+    def __eq__(self, other):
+        if isinstance(other, TimeVector):
+            return (self.start, self.step, self.count) == (other.start, other.step, other.count)
+        return list(self) == list(other) if isinstance(other, Sequence) else NotImplemented
+
+    def __repr__(self):
+        return f"TimeVector(start={self.start}, step={self.step}, count={self.count})"
+
+
 # Generate time vector for simulation
+# The number of steps is rounded with a small tolerance, so that e.g. (2400 / 0.25) does not lose the last step
+# when the division lands just below an integer due to float representation.
 def _generate_t_vector(start, end, interval):
-    return [start + i *
-            interval for i in range(int((end - start) / interval) + 1)]
+    count = math.floor((end - start) / interval + 1e-9) + 1
+    return TimeVector(start, interval, max(count, 0))
+
+
+# Time vector of a "simulation" config section: from 0 to 'duration', every 'step' seconds
+def simulation_t_vector(sim_cfg: dict) -> TimeVector:
+    return _generate_t_vector(start=0, end=sim_cfg["duration"], interval=sim_cfg["step"])
 
 
 # Set up energy profile file for HarvestingSupply class, parsing a real EH dataset from HDF5 to CSV
 # It reads the EH dataset and generates a CSV with results, writing to output_filepath.
+# Returns output_filepath, or None if the supply type has no profile file to set up.
 def set_up_eh_supply_profile_file(supply_cfg):
-    if supply_cfg.get("type") in _SET_UP_EH_SUPPLY_PROFILE_REGISTRY:
-        output_filepath = supply_cfg.get("profile_filepath")
-        eh.teg_dataset_to_csv(output_filepath)
+    if supply_cfg.get("type") not in _SET_UP_EH_SUPPLY_PROFILE_REGISTRY:
+        return None
+    from src.eh import eh  # imported lazily: h5py and pandas are heavy
+
+    output_filepath = supply_cfg.get("profile_filepath")
+    eh.teg_dataset_to_csv(output_filepath)
+    return output_filepath
 
 
 # Load simulation configuration from JSON input file
 # For more information, read the docs: /src/input/files/README.md
 def load_config_from_file(filepath: str) -> dict:
-    with open(filepath, "r") as f:
+    with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
+# Fields of the input form (see interface.SimulationForm) for each config field, by component type
+# Fields of the types that are not selected are ignored.
+_UI_FIELDS = {
+    "simulation": {"duration": "sim_duration", "step": "sim_step"},
+    "supply": {
+        "constant": {"p_base": "supply_p_base"},
+        "harvesting": {"profile_filepath": "supply_filename", "sampling_period": "supply_sampling_period"},
+    },
+    "storage": {
+        "capacitor": {"capacitance": "storage_capacitance", "v_oper_max": "storage_v_oper_max"},
+    },
+    "load": {
+        "resistor": {"resistance": "load_resistance", "p_rating": "load_p_rating",
+                     "v_max": "load_resistor_v_max"},
+        "mcu": {"v_min": "load_v_min", "v_max": "load_v_max"},
+    },
+}
+_UI_MCU_MODES = ["shutdown", "standby", "active"]
+_UI_TEXT_FIELDS = {"profile_filepath", "filepath"}
+
+
+def _ui_value(values: dict, key: str, field: str, required: bool = True):
+    text = str(values.get(key, "")).strip()
+    if text == "":
+        if required:
+            raise ValueError(f"Missing value for '{field}'.")
+        return None
+    if field.rsplit(".", 1)[-1] in _UI_TEXT_FIELDS:
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid number '{text}' for '{field}'.") from None
+
+
+def _ui_section(values: dict, name: str, fields: dict) -> dict:
+    return {field: _ui_value(values, key, f"{name}.{field}") for field, key in fields.items()}
+
+
 # Load simulation configuration from UI input values
-# TODO: Update function for latest model changes
-def load_config_from_ui(values):
-    pass
+# 'values' maps the form fields to their text (see interface.SimulationForm), and the result is a config
+# in the same schema as load_config_from_file. Raises ValueError naming the offending field.
+def load_config_from_ui(values: dict) -> dict:
+    config = {"simulation": _ui_section(values, "simulation", _UI_FIELDS["simulation"])}
+
+    for name in ["supply", "storage", "load"]:
+        component_type = str(values.get(f"{name}_type", "")).strip()
+        fields = _UI_FIELDS[name].get(component_type)
+        if fields is None:
+            raise ValueError(f"Invalid {name} type '{component_type}'.")
+        config[name] = {"type": component_type, **_ui_section(values, name, fields)}
+
+    if config["load"]["type"] == "mcu":
+        config["load"]["modes"] = {
+            mode: {
+                "cost": _ui_value(values, f"load_{mode}_cost", f"load.modes.{mode}.cost"),
+                "v_oper": _ui_value(values, f"load_{mode}_v_oper", f"load.modes.{mode}.v_oper"),
+            }
+            for mode in _UI_MCU_MODES
+        }
+        config["program"] = {"filepath": _ui_value(values, "program_filepath", "program.filepath")}
+        processing_clock = _ui_value(values, "program_processing_clock", "program.processing_clock",
+                                     required=False)
+        if processing_clock is not None:
+            config["program"]["processing_clock"] = processing_clock
+
+    return config
+
+
+# Schema of the simulation configuration, used by compile_config to validate and normalise a JSON config
+# Each field maps to (expected type, default value). Fields with a REQUIRED default must be present
+# (plugin components may use REQUIRED in their own CONFIG_SCHEMA).
+# Nested dicts describe nested sections (e.g. MCU "modes").
+# For more information, read the docs: /src/input/files/README.md
+REQUIRED = object()
+_NUMBER = (int, float)
+
+_SIMULATION_SCHEMA = {
+    "duration": (_NUMBER, REQUIRED),
+    "step": (_NUMBER, REQUIRED),
+}
+
+_SUPPLY_SCHEMA = {
+    "constant": {
+        "p_base": (_NUMBER, REQUIRED),
+    },
+    "harvesting": {
+        "profile_filepath": (str, REQUIRED),
+        "sampling_period": (_NUMBER, REQUIRED),
+    },
+}
+
+_STORAGE_SCHEMA = {
+    "capacitor": {
+        "capacitance": (_NUMBER, REQUIRED),
+        "v_oper_max": (_NUMBER, REQUIRED),
+    },
+}
+
+_MCU_MODE_SCHEMA = {
+    "cost": (_NUMBER, REQUIRED),
+    "v_oper": (_NUMBER, REQUIRED),
+}
+
+_LOAD_SCHEMA = {
+    "resistor": {
+        "resistance": (_NUMBER, REQUIRED),
+        "p_rating": (_NUMBER, REQUIRED),
+        "v_max": (_NUMBER, REQUIRED),
+    },
+    "mcu": {
+        "v_min": (_NUMBER, REQUIRED),
+        "v_max": (_NUMBER, REQUIRED),
+        "modes": {
+            "shutdown": _MCU_MODE_SCHEMA,
+            "standby": _MCU_MODE_SCHEMA,
+            "active": _MCU_MODE_SCHEMA,
+        },
+    },
+}
+
+_PMIC_SCHEMA = {
+    "boost_buck": {
+        "v_in_cold_start": (_NUMBER, REQUIRED),
+        "v_boost_thresh": (_NUMBER, REQUIRED),
+        "v_bat_uv": (_NUMBER, REQUIRED),
+        "v_bat_ov": (_NUMBER, REQUIRED),
+        "v_bat_ok_low": (_NUMBER, REQUIRED),
+        "v_bat_ok_high": (_NUMBER, REQUIRED),
+        "v_out_reg": (_NUMBER, REQUIRED),
+        "consider_efficiency": (bool, True),
+        # Efficiencies are only required if consider_efficiency is True, otherwise they default to 1.0
+        "mppt_efficiency": (_NUMBER, None),
+        "boost_efficiency": (_NUMBER, None),
+        "buck_efficiency": (_NUMBER, None),
+        "cold_start_efficiency": (_NUMBER, None),
+    },
+}
+
+_PROGRAM_SCHEMA = {
+    "filepath": (str, REQUIRED),
+    "processing_clock": (_NUMBER, None),
+    # Execution policy (see program/policy.py), with the margin and instructions of an "energy_aware" policy
+    "policy": (str, policy.POLICY_BLIND),
+    "policy_margin": (_NUMBER, policy.DEFAULT_MARGIN),
+    "deferred": (list, None),
+}
+
+_PMIC_EFFICIENCY_FIELDS = ["mppt_efficiency", "boost_efficiency",
+                           "buck_efficiency", "cold_start_efficiency"]
+
+# Physical bounds of numeric config fields, as {path: (low, high, low_exclusive)} (None: unbounded)
+# Checked by validate_config when the field is present, so e.g. sampled or overridden values
+# cannot give a component a negative capacitance or an efficiency above 1.
+_NON_NEGATIVE = (0.0, None, False)
+_POSITIVE = (0.0, None, True)
+_EFFICIENCY = (0.0, 1.0, True)
+
+_FIELD_BOUNDS = {
+    "supply.p_base": _NON_NEGATIVE,
+    "supply.sampling_period": _POSITIVE,
+    "storage.capacitance": _POSITIVE,
+    "storage.v_oper_max": _POSITIVE,
+    "load.resistance": _POSITIVE,
+    "load.p_rating": _POSITIVE,
+    "load.v_min": _NON_NEGATIVE,
+    "load.v_max": _POSITIVE,
+    **{f"load.modes.{mode}.{field}": _NON_NEGATIVE
+       for mode in ("shutdown", "standby", "active") for field in ("cost", "v_oper")},
+    **{f"pmic.{field}": _NON_NEGATIVE
+       for field in ("v_in_cold_start", "v_boost_thresh", "v_bat_uv", "v_bat_ov",
+                     "v_bat_ok_low", "v_bat_ok_high", "v_out_reg")},
+    **{f"pmic.{field}": _EFFICIENCY for field in _PMIC_EFFICIENCY_FIELDS},
+}
+
+
+# True if 'value' is within the physical bounds of the config field at 'path' (if it has any)
+def field_in_bounds(path: str, value) -> bool:
+    if path not in _FIELD_BOUNDS:
+        return True
+    low, high, low_exclusive = _FIELD_BOUNDS[path]
+    if low is not None and (value <= low if low_exclusive else value < low):
+        return False
+    return high is None or value <= high
+
+
+# Raises ValueError naming the first numeric field of a normalised config outside its bounds
+def _check_bounds(normalised: dict) -> None:
+    for path in _FIELD_BOUNDS:
+        value = normalised
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(value, _NUMBER) and not isinstance(value, bool) and not field_in_bounds(path, value):
+            raise ValueError(f"Config field '{path}' is out of range: {value!r}.")
+
+
+# Validates a config section against its schema, returning a normalised copy with defaults filled in
+# Raises ValueError naming the offending field (e.g. "storage.capacitance").
+def _validate_section(section, schema: dict, path: str) -> dict:
+    if not isinstance(section, dict):
+        raise ValueError(f"Config section '{path}' must be an object.")
+
+    normalised = dict(section)
+    for field, spec in schema.items():
+        field_path = f"{path}.{field}"
+        if isinstance(spec, dict):
+            normalised[field] = _validate_section(
+                section.get(field), spec, field_path)
+            continue
+
+        expected_type, default = spec
+        value = section.get(field)
+        if value is None:
+            if default is REQUIRED:
+                raise ValueError(
+                    f"Missing required config field '{field_path}'.")
+            normalised[field] = default
+            continue
+
+        # bool is a subclass of int, but a flag is never a valid number here
+        is_bool = isinstance(value, bool)
+        if not isinstance(value, expected_type) or (is_bool and expected_type is _NUMBER):
+            raise ValueError(
+                f"Config field '{field_path}' has invalid value: {value!r}.")
+        normalised[field] = value
+
+    return normalised
+
+
+# Validates a component section whose schema depends on its "type" field
+# Plugin component types may declare their own schema in a CONFIG_SCHEMA class attribute.
+def _validate_component(config: dict, name: str, schemas: dict, registry: ComponentRegistry) -> dict:
+    section = config.get(name)
+    if section is None:
+        raise ValueError(f"Missing required config section '{name}'.")
+    if not isinstance(section, dict):
+        raise ValueError(f"Config section '{name}' must be an object.")
+
+    component_type = section.get("type")
+    if component_type in schemas:
+        schema = schemas[component_type]
+    elif isinstance(component_type, str) and component_type in registry:
+        schema = getattr(registry[component_type], "CONFIG_SCHEMA", {})
+    else:
+        raise ValueError(
+            f"Unsupported {name} type: {component_type!r}")
+    return _validate_section(section, schema, name)
+
+
+# Validates a JSON config and normalises its defaults
+# Returns a new config dict; the given config is never mutated.
+def validate_config(config: dict) -> dict:
+    if not isinstance(config, dict) or not config:
+        raise ValueError("Simulation config cannot be empty!")
+
+    normalised = copy.deepcopy(config)
+    normalised["simulation"] = _validate_section(
+        config.get("simulation"), _SIMULATION_SCHEMA, "simulation")
+    step = normalised["simulation"]["step"]
+    if step <= 0 or normalised["simulation"]["duration"] < 0:
+        raise ValueError(
+            "Simulation 'step' must be positive and 'duration' must not be negative.")
+
+    normalised["supply"] = _validate_component(
+        config, "supply", _SUPPLY_SCHEMA, _SUPPLY_REGISTRY)
+    normalised["storage"] = _validate_component(
+        config, "storage", _STORAGE_SCHEMA, _STORAGE_REGISTRY)
+    normalised["load"] = _validate_component(
+        config, "load", _LOAD_SCHEMA, _LOAD_REGISTRY)
+
+    # PMIC is optional, see README: "If pmic is absent, the simulator falls back to the default connection model"
+    normalised["pmic"] = None
+    if config.get("pmic") is not None:
+        pmic_cfg = _validate_component(
+            config, "pmic", _PMIC_SCHEMA, _PMIC_REGISTRY)
+        for field in _PMIC_EFFICIENCY_FIELDS:
+            if field in pmic_cfg and pmic_cfg[field] is None:
+                if pmic_cfg.get("consider_efficiency", True):
+                    raise ValueError(
+                        f"Missing required config field 'pmic.{field}'.")
+                pmic_cfg[field] = 1.0
+        normalised["pmic"] = pmic_cfg
+
+    # Program is only used by Loads that upload software
+    normalised["program"] = None
+    if normalised["load"]["type"] in _UPLOAD_SOFTWARE_REGISTRY:
+        if config.get("program") is None:
+            raise ValueError(
+                "Software program configuration must be specified in the config file")
+        program_cfg = _validate_section(
+            config.get("program"), _PROGRAM_SCHEMA, "program")
+
+        program_clock = program_cfg["processing_clock"]
+        if program_clock is None:
+            program_cfg["processing_clock"] = program.DEFAULT_PROCESSING_CLOCK
+            warnings.warn("Program clock not specified, will use 1ms as default.", ConfigWarning, stacklevel=2)
+        elif program_clock > step or program_clock < program.DEFAULT_PROCESSING_CLOCK:
+            raise ValueError(
+                f"Provided program clock is invalid: {program_clock}.")
+        if program_cfg["policy"] not in policy.POLICIES:
+            raise ValueError(
+                f"Unknown program policy '{program_cfg['policy']}', expected any of: {', '.join(policy.POLICIES)}.")
+        # Built once here so an invalid margin or deferred instruction fails with the config
+        policy.build_policy(program_cfg)
+        normalised["program"] = program_cfg
+
+    _check_bounds(normalised)
+    return normalised
+
+
+# Class CompiledScenario is the immutable result of compiling a simulation config
+# It holds the normalised config, the program source and the loaded supply profile (if applicable),
+# so that building an Input from it skips validation, file reads and profile resampling.
+#   - key: content hash of the normalised config, the program file and the supply profile dataset
+@dataclass(frozen=True)
+class CompiledScenario:
+    key: str
+    config_json: str
+    program_source: str = None
+    profile: tuple = None
+
+    # Returns a fresh copy of the normalised config, so callers cannot mutate the compiled scenario
+    @property
+    def config(self) -> dict:
+        return json.loads(self.config_json)
+
+
+# Builds the content hash of a normalised config, including the files it references
+def _scenario_key(config: dict) -> str:
+    chunks = []
+    if config.get("program") is not None:
+        chunks.append(file_fingerprint(
+            config["program"]["filepath"]).encode())
+    if config["supply"]["type"] in _SET_UP_EH_SUPPLY_PROFILE_REGISTRY:
+        chunks.append(file_fingerprint(
+            config["supply"]["profile_filepath"]).encode())
+    return content_hash(config, *chunks)
+
+
+# Key of the CompiledScenario compile_config would return for a JSON config, without loading anything
+# Only the program file and supply dataset are fingerprinted (see file_fingerprint), e.g. for result cache lookups.
+def scenario_key(config: dict) -> str:
+    return _scenario_key(validate_config(config))
+
+
+# Compiles a JSON config into an immutable CompiledScenario
+# If cache_dir is given, compiled scenarios are stored on disk by content hash,
+# so repeated runs of the same config (e.g. in sweeps) skip setup entirely.
+# If 'shared' is given, it is an in-memory dict reused across calls (e.g. for the nodes of a fleet):
+# identical scenarios, program sources and supply profiles are only loaded once and shared.
+def compile_config(config: dict, cache_dir: str = None, shared: dict = None) -> CompiledScenario:
+    normalised = validate_config(config)
+    key = _scenario_key(normalised)
+    if shared is not None and ("scenario", key) in shared:
+        return shared[("scenario", key)]
+
+    cache = DiskCache(cache_dir) if cache_dir is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if isinstance(cached, CompiledScenario):
+            return cached
+
+    program_source = None
+    if normalised["program"] is not None:
+        program_source = _shared_load(shared, ("program", file_fingerprint(
+            normalised["program"]["filepath"])), lambda: _read_program_source(normalised))
+
+    profile = None
+    supply_cfg = normalised["supply"]
+    if supply_cfg["type"] in _SET_UP_EH_SUPPLY_PROFILE_REGISTRY:
+        profile = _shared_load(shared, ("profile", profile_key(normalised)),
+                               lambda: _load_supply_profile(normalised))
+
+    scenario = CompiledScenario(
+        key=key,
+        config_json=json.dumps(normalised, sort_keys=True),
+        program_source=program_source,
+        profile=profile,
+    )
+    if cache is not None:
+        cache.put(key, scenario)
+    if shared is not None:
+        shared[("scenario", key)] = scenario
+    return scenario
+
+
+# Content hash identifying the supply profile of a normalised config:
+# the dataset fingerprint, the supply config (e.g. sampling period) and the simulation step and duration
+def profile_key(normalised: dict) -> str:
+    supply_cfg = normalised["supply"]
+    return content_hash({"supply": supply_cfg, "simulation": normalised["simulation"]},
+                        file_fingerprint(supply_cfg["profile_filepath"]).encode())
+
+
+def _shared_load(shared: dict, key: tuple, load):
+    if shared is None:
+        return load()
+    if key not in shared:
+        shared[key] = load()
+    return shared[key]
+
+
+def _read_program_source(normalised: dict) -> str:
+    with open(normalised["program"]["filepath"], "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _load_supply_profile(normalised: dict) -> tuple:
+    supply_cfg = normalised["supply"]
+    sim_cfg = normalised["simulation"]
+    t_vector = simulation_t_vector(sim_cfg)
+    return tuple(_SUPPLY_REGISTRY[supply_cfg["type"]](
+        supply_cfg, t_vector, sim_cfg["step"]).profile)
+
+
+# Reads the value at a dotted config path, e.g. "storage.capacitance"
+def get_config_value(config: dict, path: str):
+    value = config
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            raise ValueError(f"Unknown config field '{path}'.")
+        value = value[key]
+    return value
+
+
+# Returns a copy of a CompiledScenario with some numeric config fields replaced, as {path: value}
+# The program source and supply profile are reused, so e.g. sweeps over component parameters skip setup.
+# The overridden config is validated again, so out-of-range values raise ValueError (see _FIELD_BOUNDS).
+# NOTE: Overrides must not touch fields the profile depends on (simulation step/duration, supply dataset).
+def override_scenario(scenario: CompiledScenario, overrides: dict) -> CompiledScenario:
+    config = scenario.config
+    for path, value in overrides.items():
+        current = get_config_value(config, path)
+        if not isinstance(current, (int, float)) or isinstance(current, bool):
+            raise ValueError(f"Config field '{path}' is not numeric.")
+        *parents, key = path.split(".")
+        section = config
+        for parent in parents:
+            section = section[parent]
+        section[key] = value
+    validate_config(config)
+
+    return CompiledScenario(
+        key=content_hash({"scenario": scenario.key, "overrides": overrides}),
+        config_json=json.dumps(config, sort_keys=True),
+        program_source=scenario.program_source,
+        profile=scenario.profile,
+    )
 
 
 # The Input class configures all the simulation parameters
+# It accepts either a JSON config dict (compiled on the fly) or an already CompiledScenario.
 class Input:
-    def __init__(self, config: dict):
+    def __init__(self, config, *, verbose: bool = True):
+        if isinstance(config, CompiledScenario):
+            scenario = config
+        else:
+            scenario = compile_config(config)
+
+        self.scenario = scenario
+        config = scenario.config
         self._init_simulation_params(config)
         self._init_behs_params(config)
         if self.load.type in _UPLOAD_SOFTWARE_REGISTRY:
-            self._init_program_params(config)
+            self._init_program_params(config, verbose)
 
     # Initialize simulation parameters
     def _init_simulation_params(self, config: dict):
-        step = config.get("simulation").get("step")
-        duration = config.get("simulation").get("duration")
-
-        if step is None or duration is None:
-            raise ValueError(
-                "Simulation 'step' and 'duration' must be specified in the config.")
-
-        self.t_step = step
-        self.t_vector = _generate_t_vector(
-            start=0, end=duration, interval=step)
+        self.t_step = config["simulation"]["step"]
+        self.t_vector = simulation_t_vector(config["simulation"])
 
     # Initialize BEHS parameters
+    # Component types were already validated by compile_config
     def _init_behs_params(self, config: dict):
         # Energy Supply
-        supply_cfg = config.get("supply")
-        supply_type = supply_cfg.get("type")
-        if supply_type not in _SUPPLY_REGISTRY:
-            raise ValueError(
-                f"Unsupported Energy Supply type: {supply_type!r}")
-        self.supply = _SUPPLY_REGISTRY[supply_type](
-            supply_cfg, self.t_vector, self.t_step)
+        supply_cfg = config["supply"]
+        supply_cls = _SUPPLY_REGISTRY[supply_cfg["type"]]
+        if self.scenario.profile is not None:
+            self.supply = supply_cls(
+                supply_cfg, self.t_vector, self.t_step, profile=self.scenario.profile)
+        else:
+            self.supply = supply_cls(supply_cfg, self.t_vector, self.t_step)
 
         # Energy Storage
-        storage_cfg = config.get("storage")
-        storage_type = storage_cfg.get("type")
-        if storage_type not in _STORAGE_REGISTRY:
-            raise ValueError(
-                f"Unsupported Energy Storage type: {storage_type!r}")
-        self.storage = _STORAGE_REGISTRY[storage_type](storage_cfg)
+        storage_cfg = config["storage"]
+        self.storage = _STORAGE_REGISTRY[storage_cfg["type"]](storage_cfg)
 
         # Load
-        load_cfg = config.get("load")
-        load_type = load_cfg.get("type")
-        if load_type not in _LOAD_REGISTRY:
-            raise ValueError(f"Unsupported Load type: {load_type!r}")
-        self.load = _LOAD_REGISTRY[load_type](load_cfg)
+        load_cfg = config["load"]
+        self.load = _LOAD_REGISTRY[load_cfg["type"]](load_cfg)
 
         # PMIC (if applicable)
-        pmic_cfg = config.get("pmic")
+        pmic_cfg = config["pmic"]
+        self.pmic = None
         if pmic_cfg is not None:
-            pmic_type = pmic_cfg.get("type")
-            if pmic_type not in _PMIC_REGISTRY:
-                raise ValueError(f"Unsupported PMIC type: {pmic_type!r}")
-            self.pmic = _PMIC_REGISTRY[pmic_type](pmic_cfg)
-
-    def _init_program_params(self, config: dict):
-        program_cfg = config.get("program")
-        if program_cfg is None:
-            raise ValueError(
-                "Software program configuration must be specified in the config file")
-
-        program_file = program_cfg.get("filepath")
-        if program_file is None:
-            raise ValueError(
-                "Software program file must be specified in the config file")
+            self.pmic = _PMIC_REGISTRY[pmic_cfg["type"]](pmic_cfg)
 
-        program_clock = program_cfg.get("processing_clock")
-        if program_clock is None:
-            program_clock = program.DEFAULT_PROCESSING_CLOCK
-            print(
-                "Warning: Program clock not specified, will use 1ms as default.")
-        elif program_clock > self.t_step or program_clock < program.DEFAULT_PROCESSING_CLOCK:
-            raise ValueError(
-                f"Provided program clock is invalid: {program_clock}.")
+    # With 'verbose', the Program listing is printed (disabled by batch runs, e.g. Monte Carlo replicas)
+    def _init_program_params(self, config: dict, verbose: bool = True):
+        program_cfg = config["program"]
 
         # Get Load's CPU parameters for Program initialization
-        load_cfg = config.get("load")
-        cpu_active_cost = load_cfg.get("modes").get("active").get("cost")
-        cpu_standby_cost = load_cfg.get("modes").get("standby").get("cost")
+        load_cfg = config["load"]
+        cpu_active_cost = load_cfg["modes"]["active"]["cost"]
+        cpu_standby_cost = load_cfg["modes"]["standby"]["cost"]
 
         # Parse Program object from file and upload to the Load
         prog = program.Program(
-            program_file, cpu_active_cost, cpu_standby_cost, program_clock)
-        prog.print()
+            program_cfg["filepath"], cpu_active_cost, cpu_standby_cost, program_cfg["processing_clock"],
+            source=self.scenario.program_source)
+        prog.policy = policy.build_policy(program_cfg)
+        if prog.policy is not None:
+            prog.policy.bind(self.storage, self.load, self.pmic)
+        if verbose:
+            prog.print()
         self.load.upload_software(prog)
@@ -0,0 +1,257 @@
+# Shared-memory pool of supply profiles, for multi-process runs
+#
+# A harvested profile (see HarvestingSupply) is one float per simulation step. Sending it to worker processes
+# gives each worker its own copy, so memory grows with the number of workers. The pool instead loads each
+# distinct profile once into a multiprocessing.shared_memory block, and scenarios refer to it by name:
+#
+#   with ProfilePool() as pool, ProcessPoolExecutor() as executor:
+#       scenario = pool.share(inp.compile_config(config))
+#       executor.submit(work, scenario)  # pickles the block name only, workers attach to the same memory
+#
+# Profiles are keyed by input.profile_key, i.e. (dataset fingerprint, supply config, step, duration).
+# Blocks are reference counted across processes (one reference per attached process, in the block header,
+# under a file lock). The last process to release a block unlinks it. Workers release their references on exit.
+#
+# NOTE: Uses fcntl for the lock, i.e. POSIX only, so it is only imported by multi-process runs. Scenarios with shared profiles should not be cached on disk,
+# since the block only lives as long as some process holds it.
+
+import fcntl
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from collections.abc import Sequence
+from multiprocessing import resource_tracker, shared_memory, util
+
+import src.input.input as inp
+
+# Header: reference count and "ready" flag (set once the profile is written), as two int64
+_HEADER = struct.Struct("qq")
+_ITEM_SIZE = 8
+_NAME_PREFIX = "behs_"
+_READY_TIMEOUT = 30.0
+_WRITE_CHUNK = 1 << 20
+
+# Blocks attached by this process: {name: [SharedMemory, values memoryview, users]}
+_ATTACHED = {}
+
+
+def _lock_path(name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+
+# Runs fn(shm) while holding the cross-process lock of a block
+def _locked(name: str, shm, fn):
+    with open(_lock_path(name), "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            return fn(shm)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _add_reference(shm, delta: int) -> int:
+    refcount, ready = _HEADER.unpack_from(shm.buf, 0)
+    refcount += delta
+    _HEADER.pack_into(shm.buf, 0, refcount, ready)
+    return refcount
+
+
+def _is_ready(shm) -> bool:
+    return _HEADER.unpack_from(shm.buf, 0)[1] == 1
+
+
+# Name a block is registered under with the resource tracker (POSIX names have a leading slash)
+def _tracked_name(shm) -> str:
+    return "/" + shm.name
+
+
+# Opens a block, untracked by the resource tracker
+# The pool manages the lifetime of blocks: the tracker (shared by forked workers) would unlink them on the exit
+# of whichever process attached last, and warns about every block it did not see unlinked.
+# Before Python 3.13, SharedMemory always registers the block, so it is unregistered right after.
+def _open(name: str, create: bool = False, size: int = 0):
+    untracked = sys.version_info >= (3, 13)
+    kwargs = {"track": False} if untracked else {}
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size, **kwargs)
+    if not untracked:
+        resource_tracker.unregister(_tracked_name(shm), "shared_memory")
+    return shm
+
+
+# Unlinks a block opened with _open
+# Before Python 3.13, unlink also unregisters the block, so it is registered again first to keep the tracker balanced.
+def _unlink(shm) -> None:
+    if sys.version_info < (3, 13):
+        resource_tracker.register(_tracked_name(shm), "shared_memory")
+    shm.unlink()
+
+
+# Attaches this process to a block (once per process), returning its values as a memoryview of floats
+# If 'values' is given, the block is created with them, unless another process already created it.
+def _attach(name: str, length: int, values=None) -> memoryview:
+    entry = _ATTACHED.get(name)
+    if entry is not None:
+        entry[2] += 1
+        return entry[1]
+
+    size = _HEADER.size + length * _ITEM_SIZE
+    created = False
+    if values is not None:
+        try:
+            shm = _open(name, create=True, size=size)
+            created = True
+        except FileExistsError:
+            shm = _open(name)
+    else:
+        shm = _open(name)
+
+    if created:
+        view = shm.buf[_HEADER.size:size].cast("d")
+        for start in range(0, length, _WRITE_CHUNK):
+            end = min(start + _WRITE_CHUNK, length)
+            view[start:end] = array("d", values[start:end])
+        view.release()
+        _locked(name, shm, lambda s: _HEADER.pack_into(s.buf, 0, 1, 1))
+    else:
+        deadline = time.monotonic() + _READY_TIMEOUT
+        while not _is_ready(shm):
+            if time.monotonic() > deadline:
+                shm.close()
+                raise TimeoutError(f"Shared profile '{name}' was never written.")
+            time.sleep(0.01)
+        _locked(name, shm, lambda s: _add_reference(s, 1))
+
+    values_view = shm.buf[_HEADER.size:size].cast("d")
+    _ATTACHED[name] = [shm, values_view, 1]
+    return values_view
+
+
+# Releases one use of a block by this process, detaching (and unlinking if unused) on the last one
+def _release(name: str) -> None:
+    entry = _ATTACHED.get(name)
+    if entry is None:
+        return
+    entry[2] -= 1
+    if entry[2] > 0:
+        return
+    del _ATTACHED[name]
+
+    shm, values_view, _ = entry
+    remaining = _locked(name, shm, lambda s: _add_reference(s, -1))
+    try:
+        values_view.release()
+        shm.close()
+    except BufferError:
+        # Arrays built from the profile (e.g. by the compiled kernel) are still alive, the mapping goes with the process
+        pass
+    if remaining <= 0:
+        try:
+            _unlink(shm)
+        except FileNotFoundError:
+            pass
+        try:
+            os.remove(_lock_path(name))
+        except FileNotFoundError:
+            pass
+
+
+def _release_all() -> None:
+    for name in list(_ATTACHED):
+        _ATTACHED[name][2] = 1
+        _release(name)
+
+
+# Runs on the exit of this process, including multiprocessing workers (which skip atexit handlers)
+util.Finalize(None, _release_all, exitpriority=10)
+
+
+# Class SharedProfile is a read-only sequence of floats backed by a shared memory block
+# It pickles as the block name only: unpickling (e.g. in a worker) attaches to the same memory.
+class SharedProfile(Sequence):
+    __slots__ = ("name", "length", "_values")
+
+    def __init__(self, name: str, length: int, values=None):
+        self.name = name
+        self.length = length
+        self._values = _attach(name, length, values)
+
+    def __reduce__(self):
+        return (SharedProfile, (self.name, self.length))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._values[index].tolist()
+        return self._values[index]
+
+    def __eq__(self, other):
+        if isinstance(other, SharedProfile):
+            return self.name == other.name
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"SharedProfile(name={self.name!r}, length={self.length})"
+
+    # Zero-copy view as a numpy array (used by the compiled kernel), or a copy if 'copy' is true
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np
+
+        view = np.frombuffer(self._values, dtype=np.float64)
+        if copy:
+            return np.array(view, dtype=dtype, copy=True)
+        return np.asarray(view, dtype=dtype)
+
+    def close(self) -> None:
+        if self._values is not None:
+            self._values = None
+            _release(self.name)
+
+    # Errors of the lock file or of an already released buffer (e.g. at interpreter exit) are ignored
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, ValueError, BufferError):
+            pass
+
+
+# Class ProfilePool shares the supply profiles of CompiledScenarios through shared memory
+class ProfilePool:
+    def __init__(self):
+        self.profiles = {}
+
+    # Returns the scenario with its profile moved to shared memory (unchanged if it has no profile)
+    def share(self, scenario: inp.CompiledScenario) -> inp.CompiledScenario:
+        if scenario.profile is None or isinstance(scenario.profile, SharedProfile):
+            return scenario
+
+        key = inp.profile_key(scenario.config)
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = SharedProfile(
+                _NAME_PREFIX + key[:24], len(scenario.profile), scenario.profile)
+            self.profiles[key] = profile
+        return inp.CompiledScenario(
+            key=scenario.key,
+            config_json=scenario.config_json,
+            program_source=scenario.program_source,
+            profile=profile,
+        )
+
+    def close(self) -> None:
+        for profile in self.profiles.values():
+            profile.close()
+        self.profiles = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,131 @@
+# Registry of BEHS component classes (supply, storage, load, pmic), resolved by config "type"
+#
+# Component classes are referenced by "module:ClassName" strings and only imported when a config uses them,
+# so e.g. a constant-supply resistor run never imports pandas or h5py.
+#
+# Besides the built-in components, new component types can be provided by:
+#   1- Entry points: installed packages declaring entry points in the "behs.<kind>" group, e.g.
+#        [project.entry-points."behs.supply"]
+#        solar = "my_package.solar:SolarSupply"
+#   2- Plugin directories: Python files inside a directory listed in BEHS_PLUGIN_PATH (or added with
+#      add_plugin_directory, until remove_plugin_directory), which declare a module-level COMPONENTS dict, e.g.
+#        COMPONENTS = {"supply": {"solar": SolarSupply}}
+#      Plugin files are only imported when a config references a type that is not found elsewhere.
+
+import importlib
+import importlib.util
+import os
+from importlib.metadata import entry_points
+
+ENTRY_POINT_GROUP_PREFIX = "behs."
+PLUGIN_PATH_ENV_VAR = "BEHS_PLUGIN_PATH"
+
+_PLUGIN_DIRECTORIES = []
+_PLUGIN_COMPONENTS = None
+
+
+# Adds a directory of plugin files, searched for component types not found elsewhere
+def add_plugin_directory(directory: str) -> None:
+    global _PLUGIN_COMPONENTS
+    if directory not in _PLUGIN_DIRECTORIES:
+        _PLUGIN_DIRECTORIES.append(directory)
+        _PLUGIN_COMPONENTS = None
+
+
+# Removes a directory added with add_plugin_directory, its components are no longer found
+def remove_plugin_directory(directory: str) -> None:
+    global _PLUGIN_COMPONENTS
+    if directory in _PLUGIN_DIRECTORIES:
+        _PLUGIN_DIRECTORIES.remove(directory)
+        _PLUGIN_COMPONENTS = None
+
+
+# Imports a "module:attribute" reference
+def _import_reference(reference: str):
+    module_name, _, attribute = reference.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+# Reads the entry points of a group (importlib.metadata API differs before Python 3.10)
+def _entry_points(group: str) -> dict:
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        selected = eps.select(group=group)
+    else:
+        selected = eps.get(group, [])
+    return {ep.name: ep.value for ep in selected}
+
+
+# Imports every plugin file once and collects the components they declare
+# Format: {kind: {type: class}}
+def _plugin_components() -> dict:
+    global _PLUGIN_COMPONENTS
+    if _PLUGIN_COMPONENTS is not None:
+        return _PLUGIN_COMPONENTS
+
+    directories = list(_PLUGIN_DIRECTORIES)
+    env_path = os.environ.get(PLUGIN_PATH_ENV_VAR)
+    if env_path:
+        directories += [d for d in env_path.split(os.pathsep) if d]
+
+    components = {}
+    for directory in directories:
+        if not os.path.isdir(directory):
+            print(f"Warning: Plugin directory '{directory}' not found. Skipping.")
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+            module_name = f"behs_plugin_{os.path.splitext(filename)[0]}"
+            spec = importlib.util.spec_from_file_location(
+                module_name, os.path.join(directory, filename))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            for kind, classes in getattr(module, "COMPONENTS", {}).items():
+                components.setdefault(kind, {}).update(classes)
+
+    _PLUGIN_COMPONENTS = components
+    return components
+
+
+# Class ComponentRegistry maps component types of a given kind to their classes
+# Lookup order: built-in components, then entry points, then plugin directories.
+class ComponentRegistry:
+    def __init__(self, kind: str, builtins: dict):
+        self.kind = kind
+        self._references = dict(builtins)  # type -> "module:ClassName" or class
+        self._entry_points = None
+
+    # Registers a component class (or a lazy "module:ClassName" reference) for a type
+    def register(self, component_type: str, reference) -> None:
+        self._references[component_type] = reference
+
+    def _find_reference(self, component_type):
+        if component_type in self._references:
+            return self._references[component_type]
+
+        if self._entry_points is None:
+            self._entry_points = _entry_points(
+                ENTRY_POINT_GROUP_PREFIX + self.kind)
+        if component_type in self._entry_points:
+            return self._entry_points[component_type]
+
+        return _plugin_components().get(self.kind, {}).get(component_type)
+
+    def __contains__(self, component_type) -> bool:
+        return self._find_reference(component_type) is not None
+
+    # Returns the component class for a type, importing its module on first use
+    def __getitem__(self, component_type):
+        reference = self._find_reference(component_type)
+        if reference is None:
+            raise KeyError(component_type)
+        if isinstance(reference, str):
+            reference = _import_reference(reference)
+            self._references[component_type] = reference
+        return reference
+
+    # Names of the built-in and explicitly registered types (does not trigger discovery)
+    def names(self) -> list:
+        return list(self._references)
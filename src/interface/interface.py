@@ -1,12 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+import src.input.input as inp
+from src.interface.runner import STATE_CANCELLED, STATE_ERROR, BackgroundRun
 
+# Interval between two polls of a running simulation (in milliseconds)
+POLL_INTERVAL_MS = 100
+
+
+# Class SimulationForm is the input form of the simulator
+# Runs are launched on a worker thread (see runner.py), so the window stays responsive: a progress bar
+# follows the simulated steps, a run can be cancelled, and its summary is shown when it finishes.
+# Outputs are written to 'output_dir' (log, CSV and Excel), and plots use a downsampled preview of the run.
 class SimulationForm:
-    def __init__(self):
+    def __init__(self, output_dir: str = None):
         self._result = None
         self._vars = {}
         self._dynamic_frames = {}
+        self._output_dir = output_dir
+        self._run = None
+        # Run status widgets, built by _build
+        self._progress = None
+        self._status = None
+        self._summary = None
 
         self._root = tk.Tk()
         self._root.title("Battery-less Energy Harvesting System Simulator")
@@ -42,10 +58,17 @@ class SimulationForm:
         # frames are re-packed inside the scrollable area.
         btn_frame = ttk.Frame(self._root)
         btn_frame.pack(side="bottom", fill="x", padx=12, pady=12)
-        ttk.Button(btn_frame, text="Run Simulation",
-                   command=self._on_run).pack(side="left", padx=(0, 6))
-        ttk.Button(btn_frame, text="Cancel",
-                   command=self._on_cancel).pack(side="left")
+        self._run_button = ttk.Button(btn_frame, text="Run Simulation",
+                                      command=self._on_run)
+        self._run_button.pack(side="left", padx=(0, 6))
+        self._cancel_button = ttk.Button(btn_frame, text="Close",
+                                         command=self._on_cancel)
+        self._cancel_button.pack(side="left", padx=(0, 6))
+        self._plot_button = ttk.Button(btn_frame, text="Plot Preview",
+                                       command=self._on_plot, state="disabled")
+        self._plot_button.pack(side="left")
+
+        self._build_status_frame()
 
         container = ttk.Frame(self._root)
         container.pack(fill="both", expand=True)
@@ -81,7 +104,7 @@ class SimulationForm:
         self._build_supply_frame(f)
         self._build_storage_frame(f)
         self._build_load_frame(f)
-        self._build_actions_frame(f)
+        self._build_program_frame(f)
 
     def _on_mousewheel(self, event):
         delta = event.delta
@@ -170,77 +193,67 @@ class SimulationForm:
         self._add_field(resistor_frame, "Power Rating (W):",
                         "load_p_rating", "0.25")
         self._add_field(resistor_frame, "Max Voltage (V):",
-                        "load_v_max", "5.5")
+                        "load_resistor_v_max", "5.5")
         self._dynamic_frames["load_resistor"] = resistor_frame
         resistor_frame.pack_forget()
 
         mcu_frame = ttk.Frame(lf)
         mcu_frame.pack(fill="x")
         self._add_field(mcu_frame, "Min Voltage (V):", "load_v_min", "1.8")
-        self._add_field(mcu_frame, "Wake-up Voltage (V):",
-                        "load_v_wake_up", "2")
-        self._add_field(mcu_frame, "Low Power Op. Voltage (V):",
-                        "load_v_oper_low", "2.2")
-        self._add_field(mcu_frame, "Active Op. Voltage (V):",
-                        "load_v_oper_active", "3.0")
-        self._add_field(mcu_frame, "Max Voltage (V):",
-                        "load_v_max", "3.6")
+        self._add_field(mcu_frame, "Max Voltage (V):", "load_v_max", "3.6")
 
         modes_frame = ttk.Frame(mcu_frame)
         modes_frame.pack(fill="x", pady=(6, 2))
-        ttk.Label(modes_frame, text="Consumption Current (A)",
-                  font=("Arial", 10), foreground="white").pack(
-                      anchor="w", padx=6, pady=(0, 2))
-        sub_frame = ttk.Frame(modes_frame)
-        sub_frame.pack(fill="x", padx=(30, 0))
-        self._add_field(sub_frame, "Shutdown Mode:",
-                        "load_mode_shutdown", "0")
-        self._add_field(sub_frame, "Low-Power Mode:",
-                        "load_mode_low_power", "0.000092")
-        self._add_field(sub_frame, "Active Mode:",
-                        "load_mode_active", "0.00048")
-
-        self._add_field(mcu_frame, "Program Script:", "load_program",
-                        "src/input/files/program01.script", entry_width=30)
-        self._dynamic_frames["load_mcu"] = mcu_frame
-
-        combo.bind("<<ComboboxSelected>>",
-                   lambda _: self._on_load_type_change())
-
-    def _build_actions_frame(self, parent):
-        lf = ttk.LabelFrame(parent, text="Actions", padding=6)
-        self._dynamic_frames["actions"] = lf
-        lf.pack(fill="x", padx=12, pady=5)
-
-        header = ttk.Frame(lf)
+        header = ttk.Frame(modes_frame)
         header.pack(fill="x", padx=6, pady=(0, 2))
-        ttk.Label(header, text="Action", width=14, anchor="w",
-                  font=("Arial", 10, "bold")).pack(side="left")
-        ttk.Label(header, text="Instruction", width=14, anchor="w",
+        ttk.Label(header, text="Mode", width=14, anchor="w",
                   font=("Arial", 10, "bold")).pack(side="left")
         ttk.Label(header, text="Cost (A)", width=14, anchor="w",
                   font=("Arial", 10, "bold")).pack(side="left")
+        ttk.Label(header, text="Op. Voltage (V)", width=14, anchor="w",
+                  font=("Arial", 10, "bold")).pack(side="left")
 
-        actions = [
-            ("Sleeping:", "action_sleep_instr", "SLEEP",
-             "action_sleep_cost", "0.00012"),
-            ("Sensing:", "action_sense_instr", "SENSE",
-             "action_sense_cost", "0.006"),
-            ("Transmitting:", "action_tx_instr", "TX_ON",
-             "action_tx_cost", "0.03"),
-            ("Receiving:", "action_rx_instr", "RX_ON",
-             "action_rx_cost", "0.027"),
-            ("Processing:", "action_proc_instr", "CPU_PROC",
-             "action_proc_cost", "0"),
+        modes = [
+            ("Shutdown:", "shutdown", "0.0000003", "2.0"),
+            ("Standby:", "standby", "0.000001", "2.2"),
+            ("Active:", "active", "0.00192", "3.0"),
         ]
-        for label, instr_key, instr_default, cost_key, cost_default in actions:
-            row = ttk.Frame(lf)
+        for label, mode, cost_default, v_oper_default in modes:
+            row = ttk.Frame(modes_frame)
             row.pack(fill="x", padx=6, pady=1)
             ttk.Label(row, text=label, width=14, anchor="w").pack(side="left")
-            ttk.Entry(row, textvariable=self._var(instr_key, instr_default),
+            ttk.Entry(row, textvariable=self._var(f"load_{mode}_cost", cost_default),
                       width=12).pack(side="left", padx=(0, 4))
-            ttk.Entry(row, textvariable=self._var(cost_key, cost_default),
+            ttk.Entry(row, textvariable=self._var(f"load_{mode}_v_oper", v_oper_default),
                       width=12).pack(side="left")
+        self._dynamic_frames["load_mcu"] = mcu_frame
+
+        combo.bind("<<ComboboxSelected>>",
+                   lambda _: self._on_load_type_change())
+
+    def _build_program_frame(self, parent):
+        lf = ttk.LabelFrame(parent, text="Program", padding=6)
+        self._dynamic_frames["program"] = lf
+        lf.pack(fill="x", padx=12, pady=5)
+
+        self._add_field(lf, "Program File:", "program_filepath",
+                        "src/program/files/program01.txt", entry_width=30)
+        self._add_field(lf, "Processing Clock (s, optional):",
+                        "program_processing_clock", "")
+
+    def _build_status_frame(self):
+        lf = ttk.LabelFrame(self._root, text="Run", padding=6)
+        lf.pack(side="bottom", fill="x", padx=12)
+
+        self._progress = ttk.Progressbar(lf, orient="horizontal",
+                                         mode="determinate", maximum=1.0)
+        self._progress.pack(fill="x", padx=6, pady=(0, 4))
+        self._status = tk.StringVar(value="Ready.")
+        ttk.Label(lf, textvariable=self._status, anchor="w").pack(
+            fill="x", padx=6)
+        self._summary = tk.Text(lf, height=7, width=60, bg="#2d5a8e",
+                                fg="white", relief="flat", state="disabled")
+        self._summary.pack(fill="x", padx=6, pady=(4, 0))
 
     def _on_supply_type_change(self):
         is_constant = self._vars["supply_type"].get() == "constant"
@@ -257,26 +270,99 @@ class SimulationForm:
         if is_mcu:
             self._dynamic_frames["load_resistor"].pack_forget()
             self._dynamic_frames["load_mcu"].pack(fill="x")
-            self._dynamic_frames["actions"].pack(fill="x", padx=12, pady=5)
+            self._dynamic_frames["program"].pack(fill="x", padx=12, pady=5)
         else:
             self._dynamic_frames["load_mcu"].pack_forget()
-            self._dynamic_frames["actions"].pack_forget()
+            self._dynamic_frames["program"].pack_forget()
             self._dynamic_frames["load_resistor"].pack(fill="x")
         self._refresh_scroll()
 
     def _on_run(self):
-        self._result = {key: var.get() for key, var in self._vars.items()}
-        self._root.quit()
+        values = {key: var.get() for key, var in self._vars.items()}
+        try:
+            config = inp.load_config_from_ui(values)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Error: {str(e)}")
+            return
+
+        self._run = BackgroundRun(config, output_dir=self._output_dir)
+        self._run.start()
+        self._run_button.configure(state="disabled")
+        self._plot_button.configure(state="disabled")
+        self._cancel_button.configure(text="Cancel Run")
+        self._status.set("Running...")
+        self._show_summary("")
+        self._root.after(POLL_INTERVAL_MS, self._poll)
+
+    # Follows the running simulation from the Tk main thread
+    def _poll(self):
+        run = self._run
+        self._progress["value"] = run.progress
+        if not run.done:
+            self._status.set(
+                f"Running... {run.steps}/{run.total_steps} steps ({run.progress:.0%})")
+            self._root.after(POLL_INTERVAL_MS, self._poll)
+            return
+
+        self._run_button.configure(state="normal")
+        self._cancel_button.configure(text="Close")
+        if run.state == STATE_ERROR:
+            self._status.set("Simulation failed.")
+            messagebox.showerror("Error", f"Error: {str(run.error)}")
+            return
+
+        self._result = run.summary
+        self._plot_button.configure(state="normal")
+        if run.state == STATE_CANCELLED:
+            self._status.set(
+                f"Cancelled after {run.steps}/{run.total_steps} steps.")
+        else:
+            self._status.set("Simulation run successfully!")
+        self._show_summary("\n".join(
+            f"{key}: {value}" for key, value in run.summary.items()))
+
+    def _show_summary(self, text):
+        self._summary.configure(state="normal")
+        self._summary.delete("1.0", "end")
+        self._summary.insert("1.0", text)
+        self._summary.configure(state="disabled")
+
+    # Plots the downsampled preview of the last run in a new window
+    def _on_plot(self):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        preview = self._run.preview
+        figure = Figure(figsize=(10, 6))
+        traces = [("storage_voltage", "Storage Voltage (V)"), ("load_voltage", "Load Voltage (V)"),
+                  ("storage_energy", "Storage Energy (J)"), ("supply_power", "Supply Power (W)")]
+        for index, (name, label) in enumerate(traces, start=1):
+            ax = figure.add_subplot(2, 2, index)
+            ax.plot(preview["time"], preview[name])
+            ax.set_title(f"{label} x Time (s)")
+            ax.set_xlabel("Time (s)")
+            ax.grid(True)
+        figure.tight_layout()
+
+        window = tk.Toplevel(self._root)
+        window.title("Simulation Preview")
+        canvas = FigureCanvasTkAgg(figure, master=window)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill="both", expand=True)
 
     def _on_cancel(self):
-        self._result = None
+        if self._run is not None and not self._run.done:
+            self._run.cancel()
+            self._status.set("Cancelling...")
+            return
         self._root.quit()
 
+    # Runs the form until it is closed, returning the summary of the last run (None if nothing ran)
     def run(self):
         self._root.mainloop()
         self._root.destroy()
         return self._result
 
 
-def build_input_form():
-    return SimulationForm()
+def build_input_form(output_dir: str = None):
+    return SimulationForm(output_dir)
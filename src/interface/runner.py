@@ -0,0 +1,122 @@
+# Background simulation runs for the input form
+#
+# A BackgroundRun simulates a config on a worker thread, writing its outputs through the output pipeline
+# (see output/pipeline.py), while the form polls it from the Tk main thread (tkinter is not thread-safe):
+#
+#   run = BackgroundRun(config, output_dir="output/ui")
+#   run.start()
+#   run.progress   # fraction of steps simulated, in [0, 1]
+#   run.cancel()   # stops after the current chunk of steps
+#   run.done, run.error, run.summary, run.preview
+#
+# With an 'output_dir', a run writes the log and CSV while it runs, then the Excel file once it completes
+# (skipped for cancelled runs, or with a warning if pandas is missing).
+# The preview keeps one in every 'preview_every' steps, so plotting it stays fast regardless of the duration.
+# It has no tkinter dependency, so it also runs headless.
+
+import math
+import os
+import threading
+
+import src.input.input as inp
+import src.output.output as out
+import src.output.pipeline as pipeline
+import src.simulator.simulator as simulator
+
+DEFAULT_PREVIEW_POINTS = 2000
+DEFAULT_CHUNK_SIZE = 500
+
+# Traces kept for the preview: name -> (component, attribute)
+PREVIEW_TRACES = {
+    "supply_power": ("supply", "power_supply"),
+    "storage_voltage": ("storage", "voltage"),
+    "storage_energy": ("storage", "energy_stored"),
+    "load_voltage": ("load", "voltage"),
+}
+
+# Run states
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_CANCELLED = "cancelled"
+STATE_ERROR = "error"
+
+
+class BackgroundRun:
+    def __init__(self, config: dict, output_dir: str = None, preview_points: int = DEFAULT_PREVIEW_POINTS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.config = config
+        self.output_dir = output_dir
+        self.preview_points = preview_points
+        self.chunk_size = chunk_size
+
+        self.state = STATE_PENDING
+        self.error = None
+        self.summary = None
+        self.steps = 0
+        self.total_steps = 0
+        self.preview = {"time": [], **{name: [] for name in PREVIEW_TRACES}}
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    @property
+    def done(self) -> bool:
+        return self.state in (STATE_DONE, STATE_CANCELLED, STATE_ERROR)
+
+    @property
+    def progress(self) -> float:
+        return self.steps / self.total_steps if self.total_steps else 0.0
+
+    def start(self) -> None:
+        self.state = STATE_RUNNING
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def join(self, timeout: float = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            sim_input = inp.Input(self.config)
+            self.total_steps = len(sim_input.t_vector)
+            preview_every = max(1, math.ceil(self.total_steps / self.preview_points))
+
+            summary = pipeline.SummarySink()
+            sinks = [summary]
+            if self.output_dir is not None:
+                os.makedirs(self.output_dir, exist_ok=True)
+                sinks.append(pipeline.LogSink(os.path.join(self.output_dir, "output.log")))
+                sinks.append(pipeline.CsvSink(os.path.join(self.output_dir, "output.csv")))
+
+            with pipeline.OutputPipeline(sinks) as output:
+                for chunk in simulator.iter_chunks(sim_input, chunk_size=self.chunk_size):
+                    output.write(chunk)
+                    self._add_preview(chunk, preview_every)
+                    self.steps += len(chunk)
+                    if self._cancel.is_set():
+                        break
+
+            self.summary = summary.summary
+            if self.output_dir is not None and not self._cancel.is_set():
+                self._write_excel()
+            self.state = STATE_CANCELLED if self._cancel.is_set() else STATE_DONE
+        except Exception as e:
+            self.error = e
+            self.state = STATE_ERROR
+
+    def _write_excel(self) -> None:
+        try:
+            out.write_to_excel(os.path.join(self.output_dir, "output.csv"),
+                               os.path.join(self.output_dir, "output.xlsx"))
+        except ImportError as e:
+            print(f"Warning: Excel output skipped ({e}).")
+
+    def _add_preview(self, chunk: list, preview_every: int) -> None:
+        preview = self.preview
+        first = (-self.steps) % preview_every
+        for t, data in chunk[first::preview_every]:
+            preview["time"].append(t)
+            for name, (component, attribute) in PREVIEW_TRACES.items():
+                preview[name].append(data[component][attribute])
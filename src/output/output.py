@@ -1,96 +1,122 @@
 import csv
-import pandas as pd
-import matplotlib.pyplot as plt
+
+from src.program.program import ops_dict
+
+# Columns of the CSV output, one row per component and time step
+CSV_FIELDNAMES = ["step", "time", "component", "status", "voltage", "current",
+                  "energy", "power", "total_energy_consumed", "program_executed_ops"]
+
+LOG_HEADER = "Simulation started"
+
+
+# Formats the Program operations executed in a step as "instruct:secs" items, or None without a Program
+def _format_ops(data, separator):
+    executed_ops = data['load'].get('program_executed_ops')
+    if executed_ops is None:
+        return None
+    return separator.join(
+        f"{instruct}:{secs:.4f}s" for instruct, secs in ops_dict(executed_ops).items()) or None
+
+
+# Returns the log lines of one time step of the simulation output
+def log_lines(t, data) -> list:
+    lines = [
+        f"Time step {t}: t={t:.3f}s\n",
+        f"  Supply: type={data['supply']['type']}, energy={data['supply']['energy_supply']:.7f}J, power={data['supply']['power_supply']:.7f}W",
+        f"  Load: type={data['load']['type']}, status={data['load']['mode']}, voltage={data['load']['voltage']:.5f}V, current={data['load']['current']:.7f}A, energy={data['load']['energy_consumed']:.7f}J, total_energy_consumed={data['load']['total_energy_consumed']:.7f}J",
+    ]
+    ops_str = _format_ops(data, ", ")
+    if ops_str is not None:
+        lines.append(f"  Program: ops=[{ops_str}]")
+    if 'pmic' in data:
+        lines.append(
+            f"  PMIC: type={data['pmic']['type']}, status={data['pmic']['status']}, v_out={data['pmic']['vout']:.5f}V, vbat_ok={data['pmic']['vbat_ok']}, energy_to_storage={data['pmic']['energy_to_storage']:.7f}J, energy_from_storage={data['pmic']['energy_from_storage']:.7f}J")
+    lines.append(
+        f"  Storage: type={data['storage']['type']}, status={data['storage']['status']}, voltage={data['storage']['voltage']:.5f}V, current={data['storage']['current']:.7f}A, energy={data['storage']['energy_stored']:.7f}J, power={data['storage']['power_stored']:.7f}W\n")
+    lines.append("-" * 50)
+    return lines
+
+
+# Returns the CSV rows (supply, storage and load) of one time step of the simulation output
+def csv_rows(t, data) -> list:
+    program_executed_ops = _format_ops(data, ",") or "NaN"
+    return [
+        {
+            "step": t,
+            "time": t,
+            "component": "supply",
+            "status": "NaN",
+            "voltage": "NaN",
+            "current": "NaN",
+            "power": data['supply']['power_supply'],
+            "energy": data['supply']['energy_supply'],
+            "total_energy_consumed": "NaN",
+            "program_executed_ops": program_executed_ops,
+        },
+        {
+            "step": t,
+            "time": t,
+            "component": "storage",
+            "status": data['storage']['status'],
+            "voltage": data['storage']['voltage'],
+            "current": data['storage']['current'],
+            "power": data['storage']['power_stored'],
+            "energy": data['storage']['energy_stored'],
+            "total_energy_consumed": "NaN",
+            "program_executed_ops": program_executed_ops,
+        },
+        {
+            "step": t,
+            "time": t,
+            "component": "load",
+            "status": data['load']['mode'],
+            "voltage": data['load']['voltage'],
+            "current": data['load']['current'],
+            "power": "NaN",
+            "energy": data['load']['energy_consumed'],
+            "total_energy_consumed": data['load']['total_energy_consumed'],
+            "program_executed_ops": program_executed_ops,
+        },
+    ]
 
 
 # Main function to write the output of the simulation to a log file
-def write_to_log(sim_output):
-    with open("output.log", "w", encoding="utf-8") as logfile:
-        print("Simulation started", file=logfile)
+def write_to_log(sim_output, filepath="output.log"):
+    with open(filepath, "w", encoding="utf-8") as logfile:
+        print(LOG_HEADER, file=logfile)
         for t, data in sim_output.items():
-            print(f"Time step {t}: t={t:.3f}s\n", file=logfile)
-            print(
-                f"  Supply: type={data['supply']['type']}, energy={data['supply']['energy_supply']:.7f}J, power={data['supply']['power_supply']:.7f}W", file=logfile)
-            print(
-                f"  Load: type={data['load']['type']}, status={data['load']['mode']}, voltage={data['load']['voltage']:.5f}V, current={data['load']['current']:.7f}A, energy={data['load']['energy_consumed']:.7f}J, total_energy_consumed={data['load']['total_energy_consumed']:.7f}J", file=logfile)
-            if data['load']['program_executed_ops']:
-                ops_str = ", ".join(
-                    f"{instruct}:{secs:.4f}s"
-                    for instruct, secs in data['load']['program_executed_ops'].items()
-                )
-                print(f"  Program: ops=[{ops_str}]", file=logfile)
-            if 'pmic' in data:
-                print(
-                    f"  PMIC: type={data['pmic']['type']}, status={data['pmic']['status']}, v_out={data['pmic']['vout']:.5f}V, vbat_ok={data['pmic']['vbat_ok']}, energy_to_storage={data['pmic']['energy_to_storage']:.7f}J, energy_from_storage={data['pmic']['energy_from_storage']:.7f}J", file=logfile)
-            print(
-                f"  Storage: type={data['storage']['type']}, status={data['storage']['status']}, voltage={data['storage']['voltage']:.5f}V, current={data['storage']['current']:.7f}A, energy={data['storage']['energy_stored']:.7f}J, power={data['storage']['power_stored']:.7f}W\n", file=logfile)
-            print("-" * 50, file=logfile)
+            for line in log_lines(t, data):
+                print(line, file=logfile)
 
 
 # Main function to write the output of the simulation to a CSV file
-def write_to_csv(sim_output):
-    with open("output.csv", "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["step", "time", "component", "status", "voltage", "current",
-                      "energy", "power", "total_energy_consumed", "program_executed_ops"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+def write_to_csv(sim_output, filepath="output.csv"):
+    with open(filepath, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
         writer.writeheader()
 
         for t, data in sim_output.items():
-            program_executed_ops = "NaN"
-            if data['load']['program_executed_ops']:
-                program_executed_ops = ",".join(
-                    f"{instruct}:{secs:.4f}s"
-                    for instruct, secs in data['load']['program_executed_ops'].items()
-                )
-
-            writer.writerow({
-                "step": t,
-                "time": t,
-                "component": "supply",
-                "status": "NaN",
-                "voltage": "NaN",
-                "current": "NaN",
-                "power": data['supply']['power_supply'],
-                "energy": data['supply']['energy_supply'],
-                "total_energy_consumed": "NaN",
-                "program_executed_ops": program_executed_ops,
-            })
-            writer.writerow({
-                "step": t,
-                "time": t,
-                "component": "storage",
-                "status": data['storage']['status'],
-                "voltage": data['storage']['voltage'],
-                "current": data['storage']['current'],
-                "power": data['storage']['power_stored'],
-                "energy": data['storage']['energy_stored'],
-                "total_energy_consumed": "NaN",
-                "program_executed_ops": program_executed_ops,
-            })
-            writer.writerow({
-                "step": t,
-                "time": t,
-                "component": "load",
-                "status": data['load']['mode'],
-                "voltage": data['load']['voltage'],
-                "current": data['load']['current'],
-                "power": "NaN",
-                "energy": data['load']['energy_consumed'],
-                "total_energy_consumed": data['load']['total_energy_consumed'],
-                "program_executed_ops": program_executed_ops,
-            })
+            writer.writerows(csv_rows(t, data))
 
 
 # Main function to write the output of the simulation to an Excel file
-def write_to_excel():
-    df = pd.read_csv("output.csv", dtype={"program_executed_ops": str})
-    df.to_excel("output.xlsx", index=False, na_rep="NaN")
+# NOTE: pandas (and matplotlib, for the plots) are imported on use, so writing logs and CSVs does not need them
+def write_to_excel(csv_filepath="output.csv", filepath="output.xlsx"):
+    import pandas as pd
+
+    df = pd.read_csv(csv_filepath, dtype={"program_executed_ops": str})
+    df.to_excel(filepath, index=False, na_rep="NaN")
+    return df
 
 
 # Main function to plot the simulation output
-# Reads data from Excel file 'output.xlsx'
-def plot():
-    df = pd.read_excel("output.xlsx")
+# Reads data from Excel file 'filepath', unless the DataFrame is given (e.g. as returned by write_to_excel)
+def plot(df=None, filepath="output.xlsx"):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    if df is None:
+        df = pd.read_excel(filepath)
     components = ["supply", "storage", "load"]
 
     # Plot same attribute for all components, in the same subplot and window
@@ -125,6 +151,8 @@ def plot():
 # Useful for comparing the same attribute across different components
 # Param 'y_attribute' is a list of attribute name and unit, e.g. ["voltage", "V"]
 def plot_all_components_same_subplot(df, components, y_attribute):
+    import matplotlib.pyplot as plt
+
     value = y_attribute[0]
     unit = y_attribute[1]
 
@@ -148,6 +176,8 @@ def plot_all_components_same_subplot(df, components, y_attribute):
 # Useful for comparing the same attribute across different components
 # Param 'y_attribute' is a list of attribute name and unit, e.g. ["voltage", "V"]
 def plot_all_components_different_subplots(df, components, y_attribute):
+    import matplotlib.pyplot as plt
+
     _, axes = plt.subplots(1, 3, figsize=(18, 5), sharex=True, sharey=True)
 
     value = y_attribute[0]
@@ -170,6 +200,8 @@ def plot_all_components_different_subplots(df, components, y_attribute):
 # Param 'y_attributes' is a list of sub-lists containing attribute name and unit
 # e.g. [["voltage", "V"], ["current", "A"]]
 def plot_all_attributes_for_component(df, component, y_attributes):
+    import matplotlib.pyplot as plt
+
     _, axes = plt.subplots(1, len(y_attributes), figsize=(
         6 * len(y_attributes), 5), sharex=True)
 
@@ -0,0 +1,240 @@
+# Asynchronous output pipeline: writes the simulation output while the simulation runs
+#
+# The simulation yields its output in chunks (see simulator.iter_chunks), pushed to one bounded queue per sink.
+# Each sink is consumed by its own writer thread, so the log, the CSV and the summary are written concurrently,
+# and overlap with the simulation of the next chunks:
+#
+#   sinks = [pipeline.LogSink("output.log"), pipeline.CsvSink("output.csv"), pipeline.SummarySink()]
+#   pipeline.run(sim_input, sinks)
+#   sinks[2].summary  # e.g. {"steps": 36000, "min_storage_voltage": 1.8, ...}
+#
+# Queues hold at most 'max_pending' chunks: when a sink falls behind, the simulation waits for it (backpressure),
+# so memory is bounded by max_pending * chunk_size steps instead of the whole output.
+#
+# NOTE: Writer threads share the GIL with the simulation, so the overlap comes mostly from disk I/O and
+# file buffering. Formatting still costs CPU time, but no longer waits for the simulation to finish.
+
+import csv
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+
+import src.output.output as out
+import src.simulator.simulator as simulator
+
+DEFAULT_MAX_PENDING = 8
+
+SINK_BUG_ERROR = "Output sink failed unexpectedly, see the traceback of thread '{name}'."
+
+_END = None
+
+
+# Class Sink is the base of all output sinks
+# 'open' and 'close' run in the writer thread, before the first chunk and after the last one.
+class Sink(ABC):
+    def open(self) -> None:
+        pass
+
+    # Writes a chunk of the simulation output, as a list of (t, snapshot)
+    @abstractmethod
+    def write(self, chunk: list) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# Writes the log file, same format as output.write_to_log
+class LogSink(Sink):
+    def __init__(self, filepath: str = "output.log"):
+        self.filepath = filepath
+        self.file = None
+
+    def open(self):
+        self.file = open(self.filepath, "w", encoding="utf-8")
+        print(out.LOG_HEADER, file=self.file)
+
+    def write(self, chunk):
+        lines = []
+        for t, data in chunk:
+            lines.extend(out.log_lines(t, data))
+        lines.append("")
+        self.file.write("\n".join(lines))
+
+    def close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            finally:
+                self.file = None
+
+
+# Writes the CSV file, same format as output.write_to_csv
+class CsvSink(Sink):
+    def __init__(self, filepath: str = "output.csv"):
+        self.filepath = filepath
+        self.file = None
+        self.writer = None
+
+    def open(self):
+        self.file = open(self.filepath, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=out.CSV_FIELDNAMES)
+        self.writer.writeheader()
+
+    def write(self, chunk):
+        rows = []
+        for t, data in chunk:
+            rows.extend(out.csv_rows(t, data))
+        self.writer.writerows(rows)
+
+    def close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            finally:
+                self.file = None
+
+
+# Reduces the output to a summary of the run, written as JSON to 'filepath' (if given) when the run ends:
+#   - "steps", "start", "end": number of steps and first/last time
+#   - "energy_supplied", "total_energy_consumed", "final_energy_stored" (J)
+#   - "min_storage_voltage", "max_storage_voltage", "final_storage_voltage" (V)
+#   - "load_mode_steps": number of steps per Load mode
+class SummarySink(Sink):
+    def __init__(self, filepath: str = None):
+        self.filepath = filepath
+        self.summary = None
+
+    def open(self):
+        self.summary = {
+            "steps": 0,
+            "start": None,
+            "end": None,
+            "energy_supplied": 0.0,
+            "total_energy_consumed": 0.0,
+            "final_energy_stored": None,
+            "min_storage_voltage": None,
+            "max_storage_voltage": None,
+            "final_storage_voltage": None,
+            "load_mode_steps": {},
+        }
+
+    def write(self, chunk):
+        summary = self.summary
+        if summary["start"] is None:
+            summary["start"] = chunk[0][0]
+        mode_steps = summary["load_mode_steps"]
+        energy_supplied = summary["energy_supplied"]
+        v_min = summary["min_storage_voltage"]
+        v_max = summary["max_storage_voltage"]
+        for _, data in chunk:
+            energy_supplied += data["supply"]["energy_supply"]
+            voltage = data["storage"]["voltage"]
+            if v_min is None or voltage < v_min:
+                v_min = voltage
+            if v_max is None or voltage > v_max:
+                v_max = voltage
+            mode = data["load"]["mode"]
+            mode_steps[mode] = mode_steps.get(mode, 0) + 1
+
+        t, data = chunk[-1]
+        summary["steps"] += len(chunk)
+        summary["end"] = t
+        summary["energy_supplied"] = energy_supplied
+        summary["min_storage_voltage"] = v_min
+        summary["max_storage_voltage"] = v_max
+        summary["total_energy_consumed"] = data["load"]["total_energy_consumed"]
+        summary["final_energy_stored"] = data["storage"]["energy_stored"]
+        summary["final_storage_voltage"] = data["storage"]["voltage"]
+
+    def close(self):
+        if self.filepath is not None and self.summary is not None:
+            with open(self.filepath, "w", encoding="utf-8") as f:
+                json.dump(self.summary, f, indent=2)
+
+
+# Class _SinkWriter feeds one sink from its own bounded queue, in a writer thread
+# After a sink error, the remaining chunks are drained (so the simulation is never blocked on it),
+# and the error is raised by the pipeline. The sink is closed (e.g. its file) whatever happens.
+# I/O and value errors are sink errors. Any other exception is a bug: the queue is still drained,
+# but the exception is left to the thread (which prints its traceback) and the pipeline fails with SINK_BUG_ERROR.
+class _SinkWriter:
+    def __init__(self, sink: Sink, max_pending: int):
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._consume, name=f"{type(sink).__name__}-writer", daemon=True)
+        self.thread.start()
+
+    def _consume(self):
+        finished = False
+        try:
+            try:
+                self.sink.open()
+            except (OSError, ValueError) as e:
+                self.error = e
+            while True:
+                chunk = self.queue.get()
+                if chunk is _END:
+                    break
+                if self.error is None:
+                    try:
+                        self.sink.write(chunk)
+                    except (OSError, ValueError) as e:
+                        self.error = e
+            finished = True
+        finally:
+            if not finished:
+                self.error = RuntimeError(SINK_BUG_ERROR.format(name=self.thread.name))
+                while self.queue.get() is not _END:
+                    pass
+            try:
+                self.sink.close()
+            except (OSError, ValueError) as e:
+                self.error = self.error or e
+
+
+# Class OutputPipeline dispatches chunks to the writer thread of every sink
+# 'write' blocks while any sink has 'max_pending' chunks waiting, i.e. applies backpressure.
+class OutputPipeline:
+    def __init__(self, sinks: list, max_pending: int = DEFAULT_MAX_PENDING):
+        if max_pending < 1:
+            raise ValueError(f"Max pending chunks must be >= 1, got {max_pending}.")
+        self.writers = [_SinkWriter(sink, max_pending) for sink in sinks]
+        self.closed = False
+
+    def write(self, chunk: list) -> None:
+        for writer in self.writers:
+            if writer.error is not None:
+                raise writer.error
+            writer.queue.put(chunk)
+
+    # Waits for all sinks to finish writing, raising the first sink error (if any)
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for writer in self.writers:
+            writer.queue.put(_END)
+        for writer in self.writers:
+            writer.thread.join()
+        for writer in self.writers:
+            if writer.error is not None:
+                raise writer.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Runs the simulation, writing its output to all sinks while it runs
+# See simulator.iter_chunks for 'chunk_size', 'stop' and 'auditor'.
+def run(sim_input, sinks: list, chunk_size: int = simulator.DEFAULT_CHUNK_SIZE,
+        max_pending: int = DEFAULT_MAX_PENDING, stop=None, auditor=None) -> None:
+    with OutputPipeline(sinks, max_pending=max_pending) as pipeline:
+        for chunk in simulator.iter_chunks(sim_input, chunk_size=chunk_size, stop=stop, auditor=auditor):
+            pipeline.write(chunk)
@@ -0,0 +1,68 @@
+# Execution policies of a Program: when its operations may start
+#
+# A "blind" Program (no policy) starts each operation as soon as the previous one ends, whatever the energy left
+# in storage, so in intermittent regimes radio and sensor operations often brown out half-way and the Program
+# is reset. An EnergyAwarePolicy defers the costly operations instead:
+#   - before a deferred operation (TX and SENSE by default) starts, the energy it needs (with a safety 'margin')
+#     is compared against the energy stored above the brown-out reserve (see EnergyAwarePolicy.bind),
+#   - if storage cannot cover it, the MCU sleeps (SLEEP, at the standby CPU cost) for the rest of the time step,
+#     and the check is repeated at the next step.
+#
+#   "program": {"filepath": "...", "policy": "energy_aware", "policy_margin": 1.5, "deferred": ["TX"]}
+#
+# Policies are compared on the same harvest trace by their throughput (see simulator.program_throughput).
+
+from src.program.program import INSTRUCTION_CODES
+
+POLICY_BLIND = "blind"
+POLICY_ENERGY_AWARE = "energy_aware"
+POLICIES = (POLICY_BLIND, POLICY_ENERGY_AWARE)
+
+# Instructions deferred by default, and the default safety margin on their energy
+DEFAULT_DEFERRED = ("TX", "SENSE")
+DEFAULT_MARGIN = 1.0
+
+
+class EnergyAwarePolicy:
+    __slots__ = ("MARGIN", "DEFERRED", "e_reserve", "efficiency", "storage", "load")
+
+    def __init__(self, margin: float = DEFAULT_MARGIN, deferred=DEFAULT_DEFERRED):
+        if margin < 1.0:
+            raise ValueError(f"Policy margin must be >= 1.0, got {margin}.")
+        unknown = [instruct for instruct in deferred if instruct not in INSTRUCTION_CODES]
+        if unknown:
+            raise ValueError(f"Policy cannot defer unknown instructions: {', '.join(unknown)}.")
+        self.MARGIN = margin
+        self.DEFERRED = frozenset(INSTRUCTION_CODES[instruct] for instruct in deferred)
+        self.e_reserve = 0.0
+        self.efficiency = 1.0
+        self.storage = None
+        self.load = None
+
+    # Binds the policy to the components it reads energy from
+    # The reserve is the energy stored at the voltage the Program stops running at:
+    # V_BAT_OK_LOW with a PMIC (its output is disabled below), otherwise the Load's active mode voltage.
+    # With a PMIC, the Load draws its energy from storage through the buck converter (see BUCK_EFFICIENCY).
+    def bind(self, storage, load, pmic=None) -> None:
+        capacitance = getattr(storage, "CAPACITANCE", None)
+        if capacitance is None:
+            raise ValueError(f"Energy-aware policy does not support Energy Storage type: {storage.type!r}")
+        v_reserve = pmic.V_BAT_OK_LOW if pmic is not None else load.V_OPER_ACTIVE
+        self.e_reserve = 0.5 * capacitance * v_reserve ** 2
+        self.efficiency = pmic.BUCK_EFFICIENCY if pmic is not None else 1.0
+        self.storage = storage
+        self.load = load
+
+    # True if storage covers a Program cost of 'cost' (average current over t_step, see Program.get_cost_for_t_step)
+    def allows(self, cost: float, t_step: float) -> bool:
+        usable = self.storage.energy_stored - self.e_reserve
+        return usable * self.efficiency >= self.MARGIN * cost * self.load.voltage * t_step
+
+
+# Builds the policy of a normalised "program" config section (None for a blind Program)
+def build_policy(program_cfg: dict):
+    if program_cfg.get("policy", POLICY_BLIND) == POLICY_BLIND:
+        return None
+    deferred = program_cfg.get("deferred")
+    return EnergyAwarePolicy(margin=program_cfg.get("policy_margin", DEFAULT_MARGIN),
+                             deferred=DEFAULT_DEFERRED if deferred is None else deferred)
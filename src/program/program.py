@@ -1,4 +1,8 @@
+import functools
 import math
+from dataclasses import dataclass
+
+from src.cache.cache import content_hash
 
 # A program instruction (Operation) is processed every PROCESSING_CLOCK.
 DEFAULT_PROCESSING_CLOCK = 0.001
@@ -11,10 +15,29 @@ CLOCK_TICK_MODEL_FLOAT = "float"
 # 2) full-tick: if Operation duration < PROCESSING_CLOCK, it occupies at least one tick
 CLOCK_TICK_MODEL_INTEGER = "integer"
 
+# Number of compiled Program sources, and of their PROCESSING_CLOCK views, kept in memory
+PROGRAM_CACHE_SIZE = 256
+
+# Block keywords of the Program language (see compile_program)
+KEYWORD_REPEAT = "REPEAT"
+KEYWORD_EVERY = "EVERY"
+KEYWORD_END = "END"
+
+# Longest combined period (lcm) of the EVERY blocks of one block body, in iterations
+MAX_EVERY_PERIOD = 10_000
+
+# Kinds of the entries a Program executes: Operations and the markers of REPEAT blocks
+ENTRY_OP, ENTRY_REPEAT, ENTRY_END = range(3)
+
 
 # Class Operation for the BEHS simulation model
 # It represents one software operation executed by a MCU Load
+# NOTE: Operations are shared by all Programs compiled from the same source and PROCESSING_CLOCK (see clock_program),
+# so they must not be mutated once built. The execution state lives in the Program.
 class Operation:
+    __slots__ = ("name", "instruction", "cost", "duration", "ticks_needed", "unknown_duration", "code", "is_cpu")
+    kind = ENTRY_OP
+
     def __init__(self, name: str, instruction: str):
         self.name = name
         self.instruction = instruction
@@ -22,27 +45,371 @@ class Operation:
         self.duration = 0.0  # duration in milliseconds
         self.ticks_needed = 0  # duration parsed to PROCESSING_CLOCK ticks
         self.unknown_duration = False  # True if duration is unknown
+        self.code = 0  # instruction code, index of the instruction in INSTRUCTIONS
+        self.is_cpu = False  # True for CPU mode instructions (no active CPU cost added)
 
 
 # Default Operation registry
 # - The PROC operation is a CPU operation in the "active" mode
 # - The SLEEP operation is a CPU operation in the "standby" mode
 # - The remaining operations have a fixed cost, which will be summed to the CPU mode base cost ("standby" or "active")
+# - The CHECKPOINT operation saves the Program state to non-volatile memory (e.g. an FRAM write), see Program.reset
 _OPERATION_REGISTRY = {
     "PROC": Operation(name="cpu_processing", instruction="PROC"),
     "SLEEP": Operation(name="cpu_sleeping", instruction="SLEEP"),
     "SENSE": Operation(name="sensing", instruction="SENSE"),
     "TX": Operation(name="transmitting", instruction="TX"),
     "RX": Operation(name="receiving", instruction="RX"),
+    "CHECKPOINT": Operation(name="checkpointing", instruction="CHECKPOINT"),
 }
 
+# Instruction codes: each instruction is indexed by its position in the registry
+INSTRUCTIONS = tuple(_OPERATION_REGISTRY)
+INSTRUCTION_CODES = {instruct: code for code, instruct in enumerate(INSTRUCTIONS)}
+CPU_INSTRUCTIONS = ("SLEEP", "PROC")
+
+_NO_OPS = (0.0,) * len(INSTRUCTIONS)
+_SLEEP_CODE = INSTRUCTION_CODES["SLEEP"]
+_CHECKPOINT_CODE = INSTRUCTION_CODES["CHECKPOINT"]
+
+
+# Converts elapsed seconds per instruction code (e.g. Program.executed_ops) into {instruction: seconds}
+# The dict only has the instructions that ran, in registry order.
+def ops_dict(executed_ops) -> dict:
+    return {INSTRUCTIONS[code]: float(secs) for code, secs in enumerate(executed_ops) if secs > 0}
+
+
+# Class Diagnostic is a problem found on one line of a Program source
+@dataclass(frozen=True)
+class Diagnostic:
+    line: int  # line number in the source, from 1
+    text: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"line {self.line}: '{self.text}': {self.message}"
+
+
+# Class CompiledProgram is the immutable, hashable result of compiling a Program source
+# It holds an operation table (instruction code, cost and duration in seconds, 0 if unknown, per operation)
+# and the schedule executing it, and is independent of PROCESSING_CLOCK (see clock_program).
+# Schedule entries are ("op", table index), ("repeat", count, index of its "end") and ("end", index of its "repeat").
+#   - key: content hash of the source
+@dataclass(frozen=True)
+class CompiledProgram:
+    key: str
+    codes: tuple
+    costs: tuple
+    durations: tuple
+    schedule: tuple = ()
+    diagnostics: tuple = ()
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # True if the schedule has REPEAT blocks (EVERY blocks compile into them)
+    @property
+    def has_loops(self) -> bool:
+        return any(entry[0] == "repeat" for entry in self.schedule)
+
+
+# Class ClockedProgram is the view of a CompiledProgram for one PROCESSING_CLOCK
+# It adds the ticks each operation needs, and the entries the Program executes: Operations, and
+# the Block/BlockEnd markers of REPEAT blocks.
+@dataclass(frozen=True)
+class ClockedProgram:
+    program: CompiledProgram
+    processing_clock: float
+    ticks_needed: tuple
+    operations: tuple
+
+
+# Class Block marks the start of a REPEAT block in the executed entries
+# It holds what one iteration of its body takes, so whole iterations can be evaluated at once:
+#   - duration (seconds) and ticks (integer model) of one iteration;
+#   - seconds (float model) and tick_seconds (integer model) per instruction code;
+#   - ops: (Operation, runs per iteration) for the cost of one iteration.
+#   - has_checkpoint: True if the body saves the Program state (its iterations are then never evaluated at once).
+class Block:
+    __slots__ = ("count", "start", "end", "duration", "ticks", "seconds", "tick_seconds", "ops", "has_checkpoint")
+    kind = ENTRY_REPEAT
+
+    def __init__(self, count: int, start: int, end: int):
+        self.count = count
+        self.start = start  # index of the first entry of the body
+        self.end = end  # index of the BlockEnd
+        self.duration = 0.0
+        self.ticks = 0
+        self.seconds = _NO_OPS
+        self.tick_seconds = _NO_OPS
+        self.ops = ()
+        self.has_checkpoint = False
+
+
+# Class BlockEnd marks the end of a REPEAT block in the executed entries
+class BlockEnd:
+    __slots__ = ("block",)
+    kind = ENTRY_END
+
+    def __init__(self, block: Block):
+        self.block = block
+
+
+# Class _Source holds the state of compiling a Program source: the remaining lines and the operation table
+class _Source:
+    def __init__(self, source: str):
+        self.lines = [(number, line.split("#", 1)[0].strip())
+                      for number, line in enumerate(source.splitlines(), start=1)]
+        self.lines = [(number, text) for number, text in self.lines if text]
+        self.position = 0
+        self.codes, self.costs, self.durations, self.diagnostics = [], [], [], []
+
+    def warn(self, number: int, text: str, message: str) -> None:
+        self.diagnostics.append(Diagnostic(number, text, message))
+
+    # Parses lines up to the END of the current block (or the end of the source, if 'block' is None)
+    # Returns the block body as nodes: operation table indexes, (KEYWORD_REPEAT, count, nodes) and
+    # (KEYWORD_EVERY, period, nodes, (line number, text)). Nested blocks are already lowered (see _lower).
+    def parse(self, block: tuple = None, in_every: bool = False) -> list:
+        nodes = []
+        while self.position < len(self.lines):
+            number, text = self.lines[self.position]
+            self.position += 1
+            parts = text.split()
+            keyword = parts[0].upper()
+
+            if keyword == KEYWORD_END:
+                if block is not None:
+                    return nodes
+                self.warn(number, text, "END has no matching REPEAT or EVERY. Skipping.")
+            elif keyword in (KEYWORD_REPEAT, KEYWORD_EVERY):
+                count = int(parts[1]) if len(parts) == 2 and parts[1].isdigit() else 0
+                if count < 1:
+                    self.warn(number, text, f"{keyword} needs a positive integer count. Running the block once.")
+                    count = 1
+                nested_every = keyword == KEYWORD_EVERY and in_every
+                if nested_every:
+                    self.warn(number, text, "EVERY cannot be nested directly in EVERY. Running the block once.")
+                body = self.parse((number, text), in_every=keyword == KEYWORD_EVERY)
+                if keyword == KEYWORD_REPEAT:
+                    nodes.extend(_lower(self.check_periods(body), count))
+                elif nested_every:
+                    nodes.extend(body)
+                else:
+                    nodes.append((KEYWORD_EVERY, count, body, (number, text)))
+            else:
+                index = self._operation(number, text, parts)
+                if index is not None:
+                    nodes.append(index)
+
+        if block is not None:
+            self.warn(*block, "Block has no END. Closing it at the end of the program.")
+        return nodes
+
+    # Keeps the combined period (lcm) of the EVERY blocks of a block body within MAX_EVERY_PERIOD
+    # An EVERY block that would exceed it is reported, and its body runs on every iteration instead.
+    def check_periods(self, nodes: list) -> list:
+        checked, period = [], 1
+        for node in nodes:
+            if isinstance(node, tuple) and node[0] == KEYWORD_EVERY:
+                combined = math.lcm(period, node[1])
+                if combined > MAX_EVERY_PERIOD:
+                    self.warn(*node[3], f"EVERY periods combine into {combined} iterations, more than "
+                                        f"{MAX_EVERY_PERIOD}. Running the block on every iteration.")
+                    checked.extend(node[2])
+                    continue
+                period = combined
+            checked.append(node)
+        return checked
+
+    # Adds an 'INSTRUCTION COST [DURATION_MS]' line to the operation table, returning its index
+    def _operation(self, number: int, text: str, parts: list):
+        if len(parts) not in [2, 3]:
+            self.warn(number, text, "Operation format is not recognized. Skipping.")
+            return None
+
+        instruction = parts[0]
+        if instruction not in INSTRUCTION_CODES:
+            self.warn(number, text, f"Instruction '{instruction}' is not recognized. Skipping.")
+            return None
+
+        try:
+            cost = float(parts[1])
+            duration = float(parts[2]) if len(parts) == 3 else 0.0
+        except ValueError:
+            self.warn(number, text, "Cost and duration must be numbers. Skipping.")
+            return None
+
+        self.codes.append(INSTRUCTION_CODES[instruction])
+        self.costs.append(cost)
+        self.durations.append(duration / 1000.0 if duration > 0 else 0.0)
+        return len(self.codes) - 1
+
+
+# Nodes running 'nodes' 'count' times in a row
+def _repeat(count: int, nodes: list) -> list:
+    if not nodes or count < 1:
+        return []
+    if count == 1:
+        return list(nodes)
+    return [(KEYWORD_REPEAT, count, tuple(nodes))]
+
+
+# Lowers a block body run 'count' times in a row into REPEAT blocks, with no EVERY blocks left
+# With EVERY periods n_i, iterations repeat with period L = lcm(n_i), and the EVERY block i runs on the iterations
+# that are multiples of n_i. Consecutive identical iterations are grouped into REPEAT blocks.
+# At the top level ('count' None) one period is returned: the Program itself restarts it forever.
+# L is at most MAX_EVERY_PERIOD, see _Source.check_periods.
+def _lower(nodes: list, count: int = None) -> list:
+    periods = [node[1] for node in nodes if isinstance(node, tuple) and node[0] == KEYWORD_EVERY]
+    if not periods:
+        return list(nodes) if count is None else _repeat(count, nodes)
+
+    period = math.lcm(*periods)
+
+    def iteration(j: int) -> tuple:
+        return tuple(j % n == 0 for n in periods)
+
+    def body(runs: tuple) -> list:
+        lowered, k = [], 0
+        for node in nodes:
+            if isinstance(node, tuple) and node[0] == KEYWORD_EVERY:
+                if runs[k]:
+                    lowered.extend(node[2])
+                k += 1
+            else:
+                lowered.append(node)
+        return lowered
+
+    # Groups iterations 1..n into runs of identical iterations
+    def grouped(n: int) -> list:
+        lowered, j = [], 1
+        while j <= n:
+            runs = iteration(j)
+            length = 1
+            while j + length <= n and iteration(j + length) == runs:
+                length += 1
+            lowered.extend(_repeat(length, body(runs)))
+            j += length
+        return lowered
+
+    if count is None:
+        return grouped(period)
+    full, rest = divmod(count, period)
+    return _repeat(full, grouped(period)) + grouped(rest)
+
+
+# Flattens nodes into schedule entries
+def _flatten(nodes: list, schedule: list) -> None:
+    for node in nodes:
+        if isinstance(node, int):
+            schedule.append(("op", node))
+            continue
+        _, count, body = node
+        start = len(schedule)
+        schedule.append(None)
+        _flatten(body, schedule)
+        schedule[start] = ("repeat", count, len(schedule))
+        schedule.append(("end", start))
+
+
+# Compiles a Program source into a CompiledProgram
+# Each non-empty line is an operation, 'INSTRUCTION COST [DURATION_MS]', or starts/ends a block:
+#   REPEAT n ... END   runs its body n times in a row, e.g. sense 10 samples before transmitting;
+#   EVERY n ... END    runs its body on every n-th iteration of the enclosing REPEAT block (or every n-th run of
+#                      the whole Program, at the top level), e.g. transmit every 10th sample.
+# Text after '#' is a comment. Blocks nest; EVERY blocks compile into a compact schedule of REPEAT blocks.
+# NOTE: There is no conditional branching (e.g. retry RX on failure): operations never fail in the model, so
+# the schedule is fixed at compile time. A bounded retry is modelled as its worst case, e.g. 'REPEAT 3' around RX.
+# Lines that cannot be compiled are skipped, and reported in the diagnostics.
+# Results are memoised by source content, so e.g. sweeps over PROCESSING_CLOCK compile the source once.
+@functools.lru_cache(maxsize=PROGRAM_CACHE_SIZE)
+def compile_program(source: str) -> CompiledProgram:
+    parsed = _Source(source)
+    schedule = []
+    _flatten(_lower(parsed.check_periods(parsed.parse())), schedule)
+
+    return CompiledProgram(
+        key=content_hash(source),
+        codes=tuple(parsed.codes),
+        costs=tuple(parsed.costs),
+        durations=tuple(parsed.durations),
+        schedule=tuple(schedule),
+        diagnostics=tuple(parsed.diagnostics),
+    )
+
+
+# Quantises a CompiledProgram to PROCESSING_CLOCK ticks, memoised by program and clock
+# Operations with an unknown duration (0) need no ticks; they are skipped when the Program runs.
+@functools.lru_cache(maxsize=PROGRAM_CACHE_SIZE)
+def clock_program(compiled: CompiledProgram, processing_clock: float) -> ClockedProgram:
+    ticks_needed = tuple(
+        math.ceil(duration / processing_clock) if duration > 0 else 0 for duration in compiled.durations)
+
+    table = []
+    for code, cost, duration, ticks in zip(compiled.codes, compiled.costs, compiled.durations, ticks_needed):
+        instruction = INSTRUCTIONS[code]
+        op = Operation(name=_OPERATION_REGISTRY[instruction].name, instruction=instruction)
+        op.cost = cost
+        op.duration = duration
+        op.ticks_needed = ticks
+        op.unknown_duration = duration <= 0
+        op.code = code
+        op.is_cpu = instruction in CPU_INSTRUCTIONS
+        table.append(op)
+
+    entries = []
+    for entry in compiled.schedule:
+        if entry[0] == "op":
+            entries.append(table[entry[1]])
+        elif entry[0] == "repeat":
+            entries.append(Block(entry[1], len(entries) + 1, entry[2]))
+        else:
+            entries.append(BlockEnd(entries[entry[1]]))
+    for entry in entries:
+        if entry.kind == ENTRY_REPEAT:
+            _measure_block(entry, entries, processing_clock)
+
+    return ClockedProgram(program=compiled, processing_clock=processing_clock,
+                          ticks_needed=ticks_needed, operations=tuple(entries))
+
+
+# Sets what one iteration of a Block takes, counting nested blocks as their number of iterations
+def _measure_block(block: Block, entries: list, processing_clock: float) -> None:
+    runs = {}
+    index = block.start
+    stack = [1]
+    while index < block.end:
+        entry = entries[index]
+        if entry.kind == ENTRY_OP:
+            if not entry.unknown_duration:
+                runs[entry] = runs.get(entry, 0) + stack[-1]
+        elif entry.kind == ENTRY_REPEAT:
+            stack.append(stack[-1] * entry.count)
+        else:
+            stack.pop()
+        index += 1
+
+    seconds = list(_NO_OPS)
+    tick_seconds = list(_NO_OPS)
+    for op, n in runs.items():
+        block.duration += n * op.duration
+        block.ticks += n * op.ticks_needed
+        seconds[op.code] += n * op.duration
+        tick_seconds[op.code] += n * op.ticks_needed * processing_clock
+    block.seconds = tuple(seconds)
+    block.tick_seconds = tuple(tick_seconds)
+    block.ops = tuple(runs.items())
+    block.has_checkpoint = any(op.code == _CHECKPOINT_CODE for op in runs)
+
 
 # Class Program represents a script of code that will be executed by the MCU Load
-# It reads the program file and loads the operations and their duration
+# It compiles the program file (see compile_program) and executes its operations
 # Execution advances each PROCESSING_CLOCK, allowing multiple operations per simulation time step.
+# If 'source' is given (e.g. from a CompiledScenario), it is compiled instead of reading the file again.
 class Program:
     def __init__(self, filepath: str, cpu_active_cost: float, cpu_standby_cost: float,
-                 processing_clock: float, tick_model: str = CLOCK_TICK_MODEL_FLOAT):
+                 processing_clock: float, tick_model: str = CLOCK_TICK_MODEL_FLOAT, source: str = None):
 
         self.FILEPATH = filepath
         self.CPU_ACTIVE_COST = cpu_active_cost
@@ -50,12 +417,37 @@ class Program:
         self.TICK_MODEL = tick_model
         self.PROCESSING_CLOCK = processing_clock
 
-        operations_from_file = self._parse_program_file(filepath)
-        self.operations = self._parse_operations(operations_from_file)
-
-        # Tracks elapsed seconds per instruction during the last t_step
-        # Format: {instruction: elapsed_seconds}
-        self.executed_ops_last_step: dict[str, float] = {}
+        if source is None:
+            with open(filepath, 'r') as file:
+                source = file.read()
+        self.compiled = compile_program(source)
+        self.operations = clock_program(self.compiled, processing_clock).operations
+        self.has_loops = self.compiled.has_loops
+
+        # Execution policy deciding when operations may start (see policy.py), None to run them blindly
+        self.policy = None
+
+        # Completed runs through the whole Program, and time steps slept by the policy instead of starting an operation
+        # A Program whose operations all have unknown durations never completes a run.
+        self.cycles = 0
+        self.deferred_steps = 0
+        self.has_work = any(op.kind == ENTRY_OP and not op.unknown_duration for op in self.operations)
+        self.has_checkpoints = any(op.kind == ENTRY_OP and op.code == _CHECKPOINT_CODE for op in self.operations)
+
+        # Work accounting, in seconds of operation durations (see reset):
+        #   - progress: work kept for good, by a CHECKPOINT or by completing a run,
+        #   - reexecuted: work lost to a power loss, which has to be executed again,
+        #   - uncommitted: work done since the last CHECKPOINT or completed run.
+        self.progress_seconds = 0.0
+        self.reexecuted_seconds = 0.0
+        self.uncommitted_seconds = 0.0
+        self.checkpoints = 0
+        # Execution state saved by the last CHECKPOINT: (operation index, remaining seconds, remaining ticks, blocks)
+        self._saved = None
+
+        # Tracks elapsed seconds per instruction during the last t_step, indexed by instruction code
+        # The list is fixed-width and updated in place, so no per-step allocation is needed.
+        self.executed_ops: list[float] = list(_NO_OPS)
 
         # Control execution state:
         #   - index of the currently executing operation
@@ -63,6 +455,11 @@ class Program:
         self.current_op_index = 0
         self.current_op_remaining_ticks = 0           # integer model: ticks left
         self.current_op_remaining_seconds = 0.0       # float model: seconds left
+        #   - [Block, iterations left after the current one] for each REPEAT block being executed
+        #   - the Block whose iteration starts at the current operation, if any
+        self._blocks = []
+        self._iteration_start = None
+        self._block_costs = {}
         self._get_next_valid_op()
 
     # Print Program object
@@ -72,21 +469,75 @@ class Program:
             f"processing_clock={self.PROCESSING_CLOCK}, tick_model={self.TICK_MODEL}")
         print("operations=")
         self.print_operations()
+        for diagnostic in self.diagnostics:
+            print(f"Warning: {self.FILEPATH} {diagnostic}")
+
+    # Problems found when compiling the program source, as Diagnostic entries
+    @property
+    def diagnostics(self) -> tuple:
+        return self.compiled.diagnostics
 
     # Print operations list of the Program object
     def print_operations(self):
         for i, op in enumerate(self.operations):
-            print(
-                f"  #{i} | name={op.name}, inst={op.instruction}, cost={op.cost:.6f}A, duration={op.duration*1000:.2f}ms, ticks={op.ticks_needed}, unknown_duration={op.unknown_duration}")
+            if op.kind == ENTRY_REPEAT:
+                print(f"  #{i} | REPEAT {op.count} (duration={op.duration*1000:.2f}ms, ticks={op.ticks} per iteration)")
+            elif op.kind == ENTRY_END:
+                print(f"  #{i} | END")
+            else:
+                print(
+                    f"  #{i} | name={op.name}, inst={op.instruction}, cost={op.cost:.6f}A, duration={op.duration*1000:.2f}ms, ticks={op.ticks_needed}, unknown_duration={op.unknown_duration}")
 
-    # Reset program execution if program does not save state and Load loses power
+    # Resets program execution when the Load loses power
+    # The work done since the last CHECKPOINT (or completed run) is lost, including the elapsed part of the current
+    # operation. Execution resumes from the state saved by the last CHECKPOINT, or from the start without one.
+    # NOTE: The MCU resets the Program at every step without power, so a reset must leave a reset Program as is.
     def reset(self):
+        lost = self.uncommitted_seconds
+        if self.current_op_index < len(self.operations):
+            op = self.operations[self.current_op_index]
+            if self.TICK_MODEL == CLOCK_TICK_MODEL_FLOAT:
+                lost += op.duration - self.current_op_remaining_seconds
+            elif op.ticks_needed > 0:
+                lost += (op.ticks_needed - self.current_op_remaining_ticks) / op.ticks_needed * op.duration
+        self.reexecuted_seconds += lost
+        self.uncommitted_seconds = 0.0
+        self.executed_ops[:] = _NO_OPS
+        self._iteration_start = None
+
+        if self._saved is not None:
+            index, remaining_seconds, remaining_ticks, blocks = self._saved
+            self.current_op_index = index
+            self.current_op_remaining_seconds = remaining_seconds
+            self.current_op_remaining_ticks = remaining_ticks
+            self._blocks = [list(block) for block in blocks]
+            return
+
         self.current_op_index = 0
         self.current_op_remaining_ticks = 0
         self.current_op_remaining_seconds = 0.0
-        self.executed_ops_last_step = {}
+        self._blocks = []
         self._get_next_valid_op()
 
+    # Commits the work done so far and saves the execution state, after a CHECKPOINT operation completed
+    def _checkpoint(self):
+        self.progress_seconds += self.uncommitted_seconds
+        self.uncommitted_seconds = 0.0
+        self.checkpoints += 1
+        self._saved = (self.current_op_index, self.current_op_remaining_seconds, self.current_op_remaining_ticks,
+                       tuple(tuple(block) for block in self._blocks))
+
+    # Elapsed seconds per instruction during the last t_step, as {instruction: elapsed_seconds}
+    @property
+    def executed_ops_last_step(self) -> dict:
+        return ops_dict(self.executed_ops)
+
+    @executed_ops_last_step.setter
+    def executed_ops_last_step(self, ops: dict) -> None:
+        self.executed_ops[:] = _NO_OPS
+        for instruct, secs in ops.items():
+            self.executed_ops[INSTRUCTION_CODES[instruct]] = secs
+
     # Processes the execution cost of the Program for a given time step, t_step.
     # Goes through all the operations that fit (even partially) within t_step.
     # For each tick (PROCESSING_CLOCK), it computes:
@@ -113,10 +564,15 @@ class Program:
         # Safeguard: if t_step < PROCESSING_CLOCK, we still process at least one tick
         ticks_per_t_step = max(1, round(t_step / self.PROCESSING_CLOCK))
         estimated_zero = 1e-12
-        self.executed_ops_last_step = {}
+        executed_ops = self.executed_ops
+        executed_ops[:] = _NO_OPS
+        has_loops = self.has_loops
+        policy = self.policy
 
         total_cost = 0.0
-        for _ in range(ticks_per_t_step):
+        tick = 0
+        while tick < ticks_per_t_step:
+            tick += 1
             remaining_tick = self.PROCESSING_CLOCK
 
             # Finish inner loop when tick is complete or when there are no operations left
@@ -134,15 +590,43 @@ class Program:
                     if self.current_op_index >= len(self.operations):
                         break
 
+                # At the start of a REPEAT block iteration, the iterations that fit in the rest of t_step
+                # are evaluated at once, then the remaining time is split between the skipped ticks
+                if has_loops and self._iteration_start is not None:
+                    available = remaining_tick + (ticks_per_t_step - tick) * self.PROCESSING_CLOCK
+                    skipped, cost = self._skip_iterations(available, t_step, ticks_per_t_step)
+                    if skipped > 0:
+                        total_cost += cost
+                        if skipped <= remaining_tick:
+                            remaining_tick -= skipped
+                        else:
+                            rest = skipped - remaining_tick
+                            whole_ticks = int(rest / self.PROCESSING_CLOCK)
+                            partial = rest - whole_ticks * self.PROCESSING_CLOCK
+                            tick += whole_ticks
+                            remaining_tick = 0.0
+                            if partial > estimated_zero and tick < ticks_per_t_step:
+                                tick += 1
+                                remaining_tick = self.PROCESSING_CLOCK - partial
+                        continue
+
                 # Get the current operation and its elapsed time for this tick
                 op = self.operations[self.current_op_index]
+
+                # The policy may defer an operation before it starts: the CPU sleeps for the rest of t_step instead
+                if (policy is not None and op.code in policy.DEFERRED
+                        and self.current_op_remaining_seconds == op.duration
+                        and not policy.allows(total_cost + self._op_cost(op, t_step, ticks_per_t_step), t_step)):
+                    rest = remaining_tick + (ticks_per_t_step - tick) * self.PROCESSING_CLOCK
+                    executed_ops[_SLEEP_CODE] += rest
+                    self.deferred_steps += 1
+                    return total_cost + self.CPU_STANDBY_COST * (rest / t_step)
+
                 elapsed = min(remaining_tick,
                               self.current_op_remaining_seconds)
 
                 # Track elapsed seconds per instruction for this t_step
-                instruct = op.instruction
-                self.executed_ops_last_step[instruct] = self.executed_ops_last_step.get(
-                    instruct, 0.0) + elapsed
+                executed_ops[op.code] += elapsed
 
                 # Calculate operation cost for the elapsed time
                 if op.duration >= t_step:
@@ -151,7 +635,7 @@ class Program:
                     total_cost += op.cost * (elapsed / op.duration)
 
                 # Add active CPU cost for non-CPU instructions
-                if op.instruction not in ["SLEEP", "PROC"]:
+                if not op.is_cpu:
                     total_cost += self.CPU_ACTIVE_COST * (elapsed / t_step)
 
                 # Decrease the remaining seconds necessary to complete operation
@@ -162,8 +646,11 @@ class Program:
                 # NOTE: Since we are possibly dealing with very small floats, precision is an issue
                 # Instead of checking for remaining_seconds <= 0, we check for a small value close to 0
                 if self.current_op_remaining_seconds <= estimated_zero:
+                    self.uncommitted_seconds += op.duration
                     self.current_op_index += 1
                     self._get_next_valid_op()
+                    if op.code == _CHECKPOINT_CODE:
+                        self._checkpoint()
 
         return total_cost
 
@@ -181,10 +668,14 @@ class Program:
         # Determine how many PROCESSING_CLOCK ticks fit in this t_step
         # Safeguard: if t_step < PROCESSING_CLOCK, we still process at least one tick
         ticks_per_t_step = max(1, round(t_step / self.PROCESSING_CLOCK))
-        self.executed_ops_last_step = {}
+        executed_ops = self.executed_ops
+        executed_ops[:] = _NO_OPS
+        has_loops = self.has_loops
+        policy = self.policy
 
         total_cost = 0.0
-        for _ in range(ticks_per_t_step):
+        tick = 0
+        while tick < ticks_per_t_step:
             # If program is finished, start again from the beginning
             # TODO: Also start over if MCU is no longer in active mode - depends on interface
             if self.current_op_index >= len(self.operations):
@@ -196,13 +687,31 @@ class Program:
                 if self.current_op_index >= len(self.operations):
                     break
 
+            # At the start of a REPEAT block iteration, the iterations that fit in the rest of t_step
+            # are evaluated at once
+            if has_loops and self._iteration_start is not None:
+                skipped, cost = self._skip_iterations(ticks_per_t_step - tick, t_step, ticks_per_t_step)
+                if skipped > 0:
+                    total_cost += cost
+                    tick += skipped
+                    continue
+
             # Get the current operation for this tick
             op = self.operations[self.current_op_index]
 
+            # The policy may defer an operation before it starts: the CPU sleeps for the rest of t_step instead
+            if (policy is not None and op.code in policy.DEFERRED
+                    and self.current_op_remaining_ticks == op.ticks_needed
+                    and not policy.allows(total_cost + self._op_cost(op, t_step, ticks_per_t_step), t_step)):
+                rest = ticks_per_t_step - tick
+                executed_ops[_SLEEP_CODE] += rest * self.PROCESSING_CLOCK
+                self.deferred_steps += 1
+                return total_cost + self.CPU_STANDBY_COST * rest / ticks_per_t_step
+
+            tick += 1
+
             # Track elapsed seconds per instruction for this t_step
-            instruct = op.instruction
-            self.executed_ops_last_step[instruct] = self.executed_ops_last_step.get(
-                instruct, 0.0) + self.PROCESSING_CLOCK
+            executed_ops[op.code] += self.PROCESSING_CLOCK
 
             # Calculate total cost for this tick
             if op.duration >= t_step:
@@ -211,7 +720,7 @@ class Program:
                 total_cost += op.cost / op.ticks_needed
 
             # Add active CPU cost for non-CPU instructions
-            if op.instruction not in ["SLEEP", "PROC"]:
+            if not op.is_cpu:
                 total_cost += self.CPU_ACTIVE_COST / ticks_per_t_step
 
             # Decrease the remaining ticks necessary to complete operation
@@ -219,18 +728,46 @@ class Program:
 
             # Advance to next operation once there are no ticks left for operation
             if self.current_op_remaining_ticks <= 0:
+                self.uncommitted_seconds += op.duration
                 self.current_op_index += 1
                 self._get_next_valid_op()
+                if op.code == _CHECKPOINT_CODE:
+                    self._checkpoint()
 
         return total_cost
 
     # Makes current_op_index skip operations with zero duration
     # Defines current_op_remaining_time (seconds/ticks) for the next valid operation
+    # REPEAT block markers are followed here: entering a block or looping back to its start sets _iteration_start.
     def _get_next_valid_op(self):
+        self._iteration_start = None
         while self.current_op_index < len(self.operations):
             # Get the next operation that needs to be executed
             op = self.operations[self.current_op_index]
 
+            # Enter a REPEAT block, unless its body takes no time
+            if op.kind == ENTRY_REPEAT:
+                if op.duration <= 0:
+                    self.current_op_index = op.end + 1
+                    continue
+                self._blocks.append([op, op.count - 1])
+                self._iteration_start = op
+                self.current_op_index = op.start
+                continue
+
+            # Loop back to the start of the block, or leave it after its last iteration
+            if op.kind == ENTRY_END:
+                block = self._blocks[-1]
+                if block[1] > 0:
+                    block[1] -= 1
+                    self._iteration_start = op.block
+                    self.current_op_index = op.block.start
+                else:
+                    self._blocks.pop()
+                    self._iteration_start = None
+                    self.current_op_index += 1
+                continue
+
             # Skip operation if their duration is unknown
             # Otherwise, set how much time (seconds or ticks) is needed to execute it
             if op.unknown_duration:
@@ -241,54 +778,71 @@ class Program:
                 self.current_op_remaining_ticks = op.ticks_needed
                 return
 
-    # Read program file
-    def _parse_program_file(self, filepath: str) -> list[str]:
-        with open(filepath, 'r') as file:
-            return [line.strip() for line in file if line.strip()]
-
-    # Parse the program file and create a list of Operation objects
-    def _parse_operations(self, operations_from_file: list[str]) -> list[Operation]:
-        operations = []
-        for op in operations_from_file:
-            # Parse operation line: 'INSTRUCTION COST [DURATION]'
-            parts = op.split()
-            if len(parts) not in [2, 3]:
-                print(
-                    f"Warning: Operation '{op}' format is not recognized. Skipping.")
-                continue
-
-            # Validate instruction
-            instruction = parts[0]
-            if instruction not in _OPERATION_REGISTRY:
-                print(
-                    f"Warning: Instruction '{instruction}' is not recognized. Skipping.")
-                continue
-
-            # Validate cost
-            cost = float(parts[1]) if len(parts) >= 2 else 0.0
-
-            # Validate duration
-            duration = float(parts[2]) if len(parts) == 3 else 0.0
-            duration_in_seconds = duration / 1000.0
-
-            # Build new Operation object (copy to avoid mutating registry)
-            registry_op = _OPERATION_REGISTRY[instruction]
-            new_op = Operation(
-                name=registry_op.name,
-                instruction=registry_op.instruction,
-            )
-            new_op.cost = cost
-            new_op.duration = duration_in_seconds
-
-            # Get PROCESSING_CLOCK ticks needed to execute based on duration
-            # TODO: Process instructions of unknown duration
-            if duration_in_seconds > 0:
-                new_op.ticks_needed = math.ceil(
-                    duration_in_seconds / self.PROCESSING_CLOCK)
-            else:
-                new_op.unknown_duration = True
-
-            # Append Operation object to the list
-            operations.append(new_op)
-
-        return operations
+        # Past the last operation: the Program completed a run, and its work is kept
+        # The next run starts over, so a power loss no longer resumes from a CHECKPOINT of this one.
+        if self.has_work:
+            self.cycles += 1
+            self.progress_seconds += self.uncommitted_seconds
+            self.uncommitted_seconds = 0.0
+            self._saved = None
+
+    # Evaluates the whole iterations of the block starting at the current operation that fit in 'available'
+    # (seconds in the float model, ticks in the integer model), as the cost and ops of one iteration times
+    # their number. Returns the time (or ticks) they took and their cost, and moves on to the next operation.
+    # Blocks with a CHECKPOINT, or with operations the policy may defer, are executed one operation at a time.
+    def _skip_iterations(self, available: float, t_step: float, ticks_per_t_step: int) -> tuple:
+        block = self._iteration_start
+        self._iteration_start = None
+        if block.has_checkpoint:
+            return 0, 0.0
+        if self.policy is not None and any(op.code in self.policy.DEFERRED for op, _ in block.ops):
+            return 0, 0.0
+        iterations = self._blocks[-1][1] + 1
+        if self.TICK_MODEL == CLOCK_TICK_MODEL_FLOAT:
+            k = min(iterations, int((available + 1e-12) / block.duration))
+            taken, seconds = k * block.duration, block.seconds
+        else:
+            k = min(iterations, available // block.ticks) if block.ticks > 0 else 0
+            taken, seconds = k * block.ticks, block.tick_seconds
+        if k == 0:
+            return 0, 0.0
+
+        executed_ops = self.executed_ops
+        for code, secs in enumerate(seconds):
+            if secs:
+                executed_ops[code] += k * secs
+        self.uncommitted_seconds += k * block.duration
+
+        if k == iterations:
+            self._blocks.pop()
+            self.current_op_index = block.end + 1
+        else:
+            self._blocks[-1][1] -= k
+            self.current_op_index = block.start
+        self._get_next_valid_op()
+        return taken, k * self._block_cost(block, t_step, ticks_per_t_step)
+
+    # Cost of one iteration of a block, as the sum of the costs of its operations run whole (memoised per t_step)
+    def _block_cost(self, block: Block, t_step: float, ticks_per_t_step: int) -> float:
+        key = (block.start, t_step)
+        cost = self._block_costs.get(key)
+        if cost is not None:
+            return cost
+
+        cost = 0.0
+        for op, runs in block.ops:
+            cost += runs * self._op_cost(op, t_step, ticks_per_t_step)
+        self._block_costs[key] = cost
+        return cost
+
+    # Cost of an operation run whole, with the active CPU cost for non-CPU instructions
+    def _op_cost(self, op: Operation, t_step: float, ticks_per_t_step: int) -> float:
+        if self.TICK_MODEL == CLOCK_TICK_MODEL_FLOAT:
+            op_cost = op.cost * (op.duration / t_step) if op.duration >= t_step else op.cost
+            if not op.is_cpu:
+                op_cost += self.CPU_ACTIVE_COST * (op.duration / t_step)
+        else:
+            op_cost = op.cost * op.ticks_needed / ticks_per_t_step if op.duration >= t_step else op.cost
+            if not op.is_cpu:
+                op_cost += self.CPU_ACTIVE_COST * op.ticks_needed / ticks_per_t_step
+        return op_cost
@@ -0,0 +1,86 @@
+# Python client of the local simulation job server (see server.py)
+#
+#   client = Client("http://127.0.0.1:8765")
+#   job_id = client.submit(inp.load_config_from_file("src/input/files/config-simple.json"))
+#   client.wait(job_id)             # job record, once done
+#   client.result(job_id)           # run summary
+#   sim_output = client.output(job_id)  # {t: snapshot}, same as simulator.run
+#
+# Outputs come back as JSON: output() converts them back to what simulator.run returns
+# (program_executed_ops as tuples), so results compare equal to a local run.
+# Uses the standard library only, so notebooks need nothing else installed.
+# NOTE: The input form does not submit its runs here: it runs them in-process on a worker thread
+# (see interface/runner.py), so it works without a running server.
+
+import json
+import time
+import urllib.error
+import urllib.request
+
+from src.server.server import DEFAULT_HOST, DEFAULT_PORT, STATUS_PENDING
+
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_POLL_INTERVAL = 0.1
+
+
+# Class JobError is raised for error responses of the server, with their HTTP status
+class JobError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Client:
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = DEFAULT_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read())["error"]
+            except (ValueError, KeyError):
+                message = e.reason
+            raise JobError(e.code, message) from None
+
+    # Submits a config, returning the id of its job
+    def submit(self, config: dict) -> str:
+        return self._request("/jobs", config)["id"]
+
+    def status(self, job_id: str) -> dict:
+        return self._request(f"/jobs/{job_id}")
+
+    def jobs(self) -> list:
+        return self._request("/jobs")
+
+    # Polls a job until it is no longer pending, returning its record
+    def wait(self, job_id: str, timeout: float = None, poll_interval: float = DEFAULT_POLL_INTERVAL) -> dict:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            record = self.status(job_id)
+            if record["status"] != STATUS_PENDING:
+                return record
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job '{job_id}' is still pending after {timeout}s.")
+            time.sleep(poll_interval)
+
+    def result(self, job_id: str) -> dict:
+        return self._request(f"/jobs/{job_id}/result")["summary"]
+
+    def output(self, job_id: str) -> dict:
+        sim_output = {}
+        for t, data in self._request(f"/jobs/{job_id}/output"):
+            if "program_executed_ops" in data["load"]:
+                data["load"]["program_executed_ops"] = tuple(data["load"]["program_executed_ops"])
+            sim_output[t] = data
+        return sim_output
+
+    def health(self) -> dict:
+        return self._request("/health")
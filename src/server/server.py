@@ -0,0 +1,338 @@
+# Local simulation job server
+#
+# Accepts simulation configs (same schema as input.load_config_from_file) over HTTP on localhost,
+# and runs them on a pool of warm worker processes. Results are kept in a local job store on disk,
+# so clients (e.g. notebooks) submit jobs and fetch the results later, instead of running
+# the simulation in their own process:
+#
+#   python -m src.server.server --port 8765 --workers 4
+#
+# Endpoints (JSON bodies and responses):
+#   POST /jobs               config               -> 202 {"id", "status"}, 400 if the config is invalid
+#   GET  /jobs                                    -> [job record], most recent first
+#   GET  /jobs/<id>                               -> job record: {"id", "status", "error", "submitted_at", "finished_at"}
+#   GET  /jobs/<id>/result                        -> {"id", "summary"} (see pipeline.SummarySink)
+#   GET  /jobs/<id>/output                        -> [[t, snapshot]], i.e. the output of simulator.run
+#   GET  /health                                  -> {"status": "ok", "workers", "pending"}
+# Results of pending jobs answer 409, of failed jobs 422 with the error, of unknown jobs 404.
+# The store is bounded: outputs beyond --max-result-bytes are evicted (their output answers 410),
+# and the oldest finished jobs beyond --max-records are removed altogether.
+#
+# Workers import the simulator modules (and pandas, for harvested profiles) when they start, and keep
+# compiled scenarios, program sources and supply profiles in memory across jobs (see input.compile_config).
+# Relative paths in configs (e.g. 'profile_filepath') are resolved from the working directory of the server.
+#
+# NOTE: The input form does not submit jobs here, it runs simulations in-process (see interface/runner.py).
+# NOTE: The server binds to localhost and has no authentication, it is meant for a shared machine's users only.
+# See client.py for the Python client.
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.cache.cache import DEFAULT_CACHE_DIR, DiskCache, LRUDict
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_STORE_DIR = os.path.join(DEFAULT_CACHE_DIR, "jobs")
+
+# Job status codes, as reported in job records
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+# Largest accepted request body (in bytes)
+MAX_BODY_BYTES = 16 * 1024 ** 2
+
+# Default caps of the job store (total size of the stored outputs, number of finished job records)
+# and of the per-worker memo (number of compiled scenarios, program sources and supply profiles)
+DEFAULT_MAX_RESULT_BYTES = 1024 ** 3
+DEFAULT_MAX_RECORDS = 1000
+DEFAULT_MEMO_ENTRIES = 64
+
+
+# Class JobStore keeps job records (JSON, one file per job) and results (see cache.DiskCache) on disk
+# Records are written atomically, so they can be read while jobs are running.
+#   - max_result_bytes: least recently used outputs are evicted once they grow beyond it (None: unbounded)
+#   - max_records: oldest finished jobs (record and output) are pruned beyond it (None: unbounded)
+class JobStore:
+    def __init__(self, directory: str = DEFAULT_STORE_DIR, max_result_bytes: int = DEFAULT_MAX_RESULT_BYTES,
+                 max_records: int = DEFAULT_MAX_RECORDS):
+        self.directory = directory
+        self.records_dir = os.path.join(directory, "records")
+        os.makedirs(self.records_dir, exist_ok=True)
+        self.results = DiskCache(os.path.join(directory, "results"), max_bytes=max_result_bytes)
+        self.max_records = max_records
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.records_dir, job_id + ".json")
+
+    def get(self, job_id: str) -> dict:
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, record: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.records_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, self._path(record["id"]))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # Updates fields of a record, under a lock so concurrent updates of a job are not lost
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            record = self.get(job_id)
+            record.update(fields)
+            self.put(record)
+            return record
+
+    def list(self) -> list:
+        records = []
+        for name in os.listdir(self.records_dir):
+            if name.endswith(".json"):
+                record = self.get(name[:-len(".json")])
+                if record is not None:
+                    records.append(record)
+        return sorted(records, key=lambda record: record["submitted_at"], reverse=True)
+
+    # Removes the oldest finished jobs beyond max_records, returning how many were removed
+    # Pending jobs are never pruned.
+    def prune(self) -> int:
+        if self.max_records is None:
+            return 0
+        finished = [record for record in self.list() if record["status"] != STATUS_PENDING]
+        pruned = 0
+        with self._lock:
+            for record in finished[self.max_records:]:
+                try:
+                    os.remove(self._path(record["id"]))
+                except OSError:
+                    continue
+                self.results.delete(record["id"])
+                pruned += 1
+        return pruned
+
+    # Marks jobs left pending by a previous server process as failed, since their workers are gone
+    def recover(self) -> int:
+        recovered = 0
+        for record in self.list():
+            if record["status"] == STATUS_PENDING:
+                self.update(record["id"], status=STATUS_ERROR,
+                            error="Server stopped before the job finished.", finished_at=time.time())
+                recovered += 1
+        return recovered
+
+
+# Per-worker memo of compiled scenarios, program sources and supply profiles (see input.compile_config)
+# Bounded by entry count, so a long-running worker does not keep every config it has seen.
+_SHARED = LRUDict(DEFAULT_MEMO_ENTRIES)
+
+
+# Modules imported by each worker when it starts, so the first job does not pay for them
+# pandas is only needed to read harvesting datasets, it is skipped if missing.
+WARM_MODULES = ["src.behs.energysupply", "src.behs.energystorage", "src.behs.load", "src.behs.pmic",
+                "src.output.pipeline", "pandas"]
+
+
+def _warm_worker(memo_entries: int = DEFAULT_MEMO_ENTRIES) -> None:
+    _SHARED.max_entries = memo_entries
+    for module in WARM_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+# Worker entry point: runs one job, stores its output and returns its summary
+def _run_job(store_dir: str, max_result_bytes: int, job_id: str, config: dict) -> dict:
+    from src.output.pipeline import SummarySink
+
+    sim_output = simulator.run(inp.Input(inp.compile_config(config, shared=_SHARED)))
+    DiskCache(os.path.join(store_dir, "results"), max_bytes=max_result_bytes).put(job_id, sim_output)
+
+    summary = SummarySink()
+    summary.open()
+    if sim_output:
+        summary.write(list(sim_output.items()))
+    return summary.summary
+
+
+# Class JobServer is the HTTP server, holding the job store and the worker pool
+class JobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = None,
+                 store_dir: str = DEFAULT_STORE_DIR, max_result_bytes: int = DEFAULT_MAX_RESULT_BYTES,
+                 max_records: int = DEFAULT_MAX_RECORDS, memo_entries: int = DEFAULT_MEMO_ENTRIES):
+        if memo_entries is not None and memo_entries < 1:
+            raise ValueError(f"Worker memo must hold at least 1 entry, got {memo_entries}.")
+        self.store = JobStore(store_dir, max_result_bytes=max_result_bytes, max_records=max_records)
+        self.store.recover()
+        self.store.prune()
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                            initargs=(memo_entries,))
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        super().__init__((host, port), JobRequestHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # Validates a config and queues it, returning the new job record
+    def submit(self, config: dict) -> dict:
+        inp.validate_config(config)
+        record = {"id": uuid.uuid4().hex, "status": STATUS_PENDING, "error": None,
+                  "submitted_at": time.time(), "finished_at": None, "summary": None}
+        self.store.put(record)
+
+        with self._pending_lock:
+            self.pending += 1
+        future = self.executor.submit(_run_job, self.store.directory, self.store.results.max_bytes,
+                                      record["id"], config)
+        future.add_done_callback(lambda f: self._finish(record["id"], f))
+        return record
+
+    def _finish(self, job_id: str, future) -> None:
+        try:
+            summary = future.result()
+            self.store.update(job_id, status=STATUS_DONE, summary=summary, finished_at=time.time())
+        except Exception as e:
+            self.store.update(job_id, status=STATUS_ERROR, error=f"{type(e).__name__}: {e}",
+                              finished_at=time.time())
+        self.store.prune()
+        with self._pending_lock:
+            self.pending -= 1
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _is_job_id(value: str) -> bool:
+    return len(value) == 32 and all(c in "0123456789abcdef" for c in value)
+
+
+# Class JobRequestHandler maps the endpoints to the JobServer
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server: JobServer
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, {"error": message})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown endpoint '{self.path}'.")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        f"Config is larger than {MAX_BODY_BYTES} bytes.")
+            return
+        try:
+            config = json.loads(self.rfile.read(length) or b"null")
+            record = self.server.submit(config)
+        except (ValueError, TypeError) as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        self._send(HTTPStatus.ACCEPTED, {"id": record["id"], "status": record["status"]})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        store = self.server.store
+
+        if parts == ["health"]:
+            self._send(HTTPStatus.OK, {"status": "ok", "workers": self.server.workers,
+                                       "pending": self.server.pending})
+            return
+        if parts == ["jobs"]:
+            self._send(HTTPStatus.OK, store.list())
+            return
+        if len(parts) not in (2, 3) or parts[0] != "jobs" or (len(parts) == 3 and parts[2] not in ("result", "output")):
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown endpoint '{self.path}'.")
+            return
+
+        record = store.get(parts[1]) if _is_job_id(parts[1]) else None
+        if record is None:
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown job '{parts[1]}'.")
+            return
+        if len(parts) == 2:
+            self._send(HTTPStatus.OK, record)
+            return
+
+        if record["status"] == STATUS_PENDING:
+            self._error(HTTPStatus.CONFLICT, f"Job '{record['id']}' is still pending.")
+        elif record["status"] == STATUS_ERROR:
+            self._error(HTTPStatus.UNPROCESSABLE_ENTITY, record["error"])
+        elif parts[2] == "result":
+            self._send(HTTPStatus.OK, {"id": record["id"], "summary": record["summary"]})
+        else:
+            sim_output = store.results.get(record["id"])
+            if sim_output is None:
+                self._error(HTTPStatus.GONE, f"Output of job '{record['id']}' is no longer stored.")
+                return
+            self._send(HTTPStatus.OK, [[t, data] for t, data in sim_output.items()])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local BEHS simulation job server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: the CPU count)")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR,
+                        help=f"job store directory (default: {DEFAULT_STORE_DIR})")
+    parser.add_argument("--max-result-bytes", type=int, default=DEFAULT_MAX_RESULT_BYTES,
+                        help=f"total size of the stored job outputs (default: {DEFAULT_MAX_RESULT_BYTES})")
+    parser.add_argument("--max-records", type=int, default=DEFAULT_MAX_RECORDS,
+                        help=f"finished jobs kept in the store (default: {DEFAULT_MAX_RECORDS})")
+    parser.add_argument("--memo-entries", type=int, default=DEFAULT_MEMO_ENTRIES,
+                        help=f"compiled scenarios and profiles kept in memory by each worker (default: {DEFAULT_MEMO_ENTRIES})")
+    args = parser.parse_args(argv)
+
+    server = JobServer(args.host, args.port, args.workers, args.store, max_result_bytes=args.max_result_bytes,
+                       max_records=args.max_records, memo_entries=args.memo_entries)
+    print(f"Serving simulation jobs on {server.url} ({server.workers} workers)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# Energy-balance auditor fed from the simulator step loop
+#
+# At every step, the energy harvested must be accounted for:
+#   harvested = Δstored + consumed + PMIC losses + rejected (at V_BAT_OV) + clipped (at E_MAX) - shortfall (at 0)
+# where the PMIC terms are zero without a PMIC, and "shortfall" is energy the Load consumed that the
+# Capacitor did not have (its stored energy is clipped at 0).
+#
+# The auditor keeps running totals and the first 'max_flagged' unbalanced steps only, so memory is O(1)
+# regardless of the duration:
+#
+#   auditor = EnergyAuditor()
+#   simulator.run(sim_input, auditor=auditor)
+#   auditor.balanced, auditor.flagged, auditor.report()
+
+DEFAULT_ABS_TOLERANCE = 1e-15
+DEFAULT_REL_TOLERANCE = 1e-9
+DEFAULT_MAX_FLAGGED = 100
+
+# Accounting terms, in the order they appear in the balance and in the report
+TERMS = ["harvested", "stored", "consumed", "lost", "rejected", "clipped", "shortfall"]
+
+
+# Class EnergyAuditor checks the energy balance of each step of a run
+#   - abs_tolerance, rel_tolerance: a step is flagged if
+#       |imbalance| > abs_tolerance + rel_tolerance * max(|term| of the step)
+#   - max_flagged: number of flagged steps kept, as (step index, time, imbalance); all are counted.
+class EnergyAuditor:
+    def __init__(self, abs_tolerance: float = DEFAULT_ABS_TOLERANCE, rel_tolerance: float = DEFAULT_REL_TOLERANCE,
+                 max_flagged: int = DEFAULT_MAX_FLAGGED):
+        self.abs_tolerance = abs_tolerance
+        self.rel_tolerance = rel_tolerance
+        self.max_flagged = max_flagged
+        self.start()
+
+    # Resets the totals, called at the start of each run
+    def start(self, sim_input=None) -> None:
+        self.totals = dict.fromkeys(TERMS, 0.0)
+        self.steps = 0
+        self.flagged = []
+        self.flagged_count = 0
+        self.max_imbalance = 0.0
+        self.last_stored = sim_input.storage.energy_stored if sim_input is not None else 0.0
+
+    @property
+    def balanced(self) -> bool:
+        return self.flagged_count == 0
+
+    # Audits step i (at time t), after all components were refreshed
+    def check(self, sim_input, i: int, t: float) -> None:
+        storage, pmic = sim_input.storage, sim_input.pmic
+
+        harvested = sim_input.supply.energy_supply
+        consumed = sim_input.load.energy_consumed
+        stored = storage.energy_stored - self.last_stored
+        self.last_stored = storage.energy_stored
+        clipped = storage.energy_clipped
+        shortfall = storage.energy_shortfall
+        if pmic is not None:
+            lost = pmic.energy_lost
+            rejected = pmic.energy_rejected
+        else:
+            lost = rejected = 0.0
+
+        totals = self.totals
+        totals["harvested"] += harvested
+        totals["stored"] += stored
+        totals["consumed"] += consumed
+        totals["lost"] += lost
+        totals["rejected"] += rejected
+        totals["clipped"] += clipped
+        totals["shortfall"] += shortfall
+        self.steps += 1
+
+        imbalance = harvested - (stored + consumed + lost + rejected + clipped - shortfall)
+        magnitude = abs(imbalance)
+        if magnitude > self.max_imbalance:
+            self.max_imbalance = magnitude
+        scale = max(abs(harvested), abs(stored), abs(consumed), storage.energy_stored)
+        if magnitude > self.abs_tolerance + self.rel_tolerance * scale:
+            self.flagged_count += 1
+            if len(self.flagged) < self.max_flagged:
+                self.flagged.append((i, t, imbalance))
+
+    # Imbalance over the whole run
+    def residual(self) -> float:
+        totals = self.totals
+        return totals["harvested"] - (totals["stored"] + totals["consumed"] + totals["lost"]
+                                      + totals["rejected"] + totals["clipped"] - totals["shortfall"])
+
+    def report(self) -> str:
+        lines = [f"Energy balance over {self.steps} steps:"]
+        for term in TERMS:
+            lines.append(f"  {term:<10} {self.totals[term]:>16.9f}J")
+        lines.append(f"  {'residual':<10} {self.residual():>16.9f}J")
+        lines.append(
+            f"  {self.flagged_count} unbalanced steps, max imbalance {self.max_imbalance:.3e}J")
+        for i, t, imbalance in self.flagged[:10]:
+            lines.append(f"    step {i} (t={t}s): {imbalance:.3e}J")
+        return "\n".join(lines)
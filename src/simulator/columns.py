@@ -0,0 +1,232 @@
+# Columnar simulation output, with categorical state stored as run-length encoded transitions
+#
+# The Capacitor status, Load mode and PMIC status/vbat_ok hold constant for thousands of steps, and component
+# types never change, yet a {t: snapshot} output repeats them at every step. A ColumnarOutput keeps:
+#   - numeric fields as packed float columns (array("d")), one value per step,
+#   - categorical state fields (see STATE_FIELDS) and the Program's executed ops as (start_step, value) runs,
+#   - component types once per run (see 'types').
+#
+#   columns = ColumnarOutput()
+#   simulator.run(sim_input, recording=columns)   # returns 'columns'
+#   columns.time_in("load.mode", "standby")       # seconds, in O(#transitions)
+#   columns.transitions("storage.status")         # [(t, value), ...]
+#   columns.column("storage.voltage")             # one value per step
+#
+# It is a read-only Mapping {t: snapshot}, expanding snapshots on access, so it can be passed anywhere a
+# simulator.run output is expected (e.g. output.write_to_csv). ColumnarOutput.from_sim_output converts an
+# existing output.
+
+import bisect
+from array import array
+from collections.abc import Mapping
+
+# Fields of each component snapshot, in snapshot order (see simulator.snapshot)
+FIELDS = {
+    "supply": ("power_supply", "energy_supply"),
+    "storage": ("status", "voltage", "current", "energy_stored", "power_stored"),
+    "load": ("mode", "voltage", "current", "energy_consumed", "total_energy_consumed"),
+    "pmic": ("status", "vout", "vbat_ok", "energy_to_storage", "energy_from_storage"),
+}
+
+# Categorical fields, stored as runs
+STATE_FIELDS = ("storage.status", "load.mode", "pmic.status", "pmic.vbat_ok")
+
+# Program ops executed in the last step, stored as runs (a sleeping MCU repeats the same ops for many steps)
+OPS_FIELD = "load.program_executed_ops"
+
+# Component attributes named differently in the snapshot
+_ATTRIBUTES = {"pmic.vout": "v_out"}
+
+
+# Class RunLengthColumn stores a per-step value as the steps where it changes: starts[k] is the first step of values[k]
+class RunLengthColumn:
+    __slots__ = ("starts", "values")
+
+    def __init__(self):
+        self.starts = []
+        self.values = []
+
+    # Number of runs
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    # Sets the value of step i; steps must be appended in order
+    def append(self, i: int, value) -> None:
+        if not self.values or self.values[-1] != value:
+            self.starts.append(i)
+            self.values.append(value)
+
+    def value_at(self, i: int):
+        k = bisect.bisect_right(self.starts, i) - 1
+        if k < 0:
+            raise IndexError(f"Step {i} is before the first run of the column.")
+        return self.values[k]
+
+    # Yields (start, end, value) for each run, with 'end' exclusive
+    def runs(self, n_steps: int):
+        ends = self.starts[1:] + [n_steps]
+        yield from zip(self.starts, ends, self.values)
+
+    # Expands the runs into one value per step
+    def expand(self, n_steps: int) -> list:
+        expanded = []
+        for start, end, value in self.runs(n_steps):
+            expanded.extend([value] * (end - start))
+        return expanded
+
+    # Number of steps spent at each value: {value: steps}
+    def step_counts(self, n_steps: int) -> dict:
+        counts = {}
+        for start, end, value in self.runs(n_steps):
+            counts[value] = counts.get(value, 0) + end - start
+        return counts
+
+
+class ColumnarOutput(Mapping):
+    def __init__(self):
+        self.start()
+
+    # Resets the output, called at the start of each run (see simulator.run 'recording')
+    def start(self, sim_input=None) -> None:
+        self.t_step = 0.0
+        self.times = array("d")
+        self.types = {}
+        self.numeric = {}
+        self.states = {}
+        self._index = None
+        self._components = []
+        self._last_ops = None
+        if sim_input is not None:
+            self._bind(sim_input)
+
+    # Sets up the columns for the components of sim_input
+    def _bind(self, sim_input) -> None:
+        self.t_step = sim_input.t_step
+        for name in FIELDS:
+            component = getattr(sim_input, name)
+            if component is None:
+                continue
+            self.types[name] = component.type
+            fields = []
+            for field in FIELDS[name]:
+                key = f"{name}.{field}"
+                fields.append((key, _ATTRIBUTES.get(key, field)))
+                self._new_column(key)
+            self._components.append((component, fields))
+        if sim_input.load.program is not None:
+            self.states[OPS_FIELD] = RunLengthColumn()
+            self._last_ops = [None] * len(sim_input.load.program.executed_ops)
+
+    def _new_column(self, key: str) -> None:
+        if key in STATE_FIELDS:
+            self.states[key] = RunLengthColumn()
+        else:
+            self.numeric[key] = array("d")
+
+    # Records step i (at time t), after all components were refreshed
+    def add(self, i: int, t: float, sim_input) -> None:
+        self.times.append(t)
+        numeric, states = self.numeric, self.states
+        for component, fields in self._components:
+            for key, attribute in fields:
+                value = getattr(component, attribute)
+                if key in numeric:
+                    numeric[key].append(value)
+                else:
+                    states[key].append(i, value)
+        if OPS_FIELD in states:
+            # Compared against a copy updated in place, so nothing is allocated until the ops change
+            ops = sim_input.load.program.executed_ops
+            last_ops = self._last_ops
+            if ops != last_ops:
+                last_ops[:] = ops
+                states[OPS_FIELD].append(i, tuple(ops))
+
+    # Ends the recording: the components are released, so the output pickles on its own
+    def output(self) -> "ColumnarOutput":
+        self._index = None
+        self._components = []
+        return self
+
+    # Converts a {t: snapshot} output (e.g. from simulator.run or a cache) into columns
+    # 't_step' defaults to the interval between the first two steps.
+    @classmethod
+    def from_sim_output(cls, sim_output: dict, t_step: float = None) -> "ColumnarOutput":
+        columns = cls()
+        times = list(sim_output)
+        if t_step is None:
+            t_step = times[1] - times[0] if len(times) > 1 else 0.0
+        columns.t_step = t_step
+
+        for i, (t, data) in enumerate(sim_output.items()):
+            if i == 0:
+                for name in FIELDS:
+                    if name in data:
+                        columns.types[name] = data[name]["type"]
+                        for field in FIELDS[name]:
+                            columns._new_column(f"{name}.{field}")
+                if OPS_FIELD.split(".")[1] in data["load"]:
+                    columns.states[OPS_FIELD] = RunLengthColumn()
+            columns.times.append(t)
+            for key, column in columns.numeric.items():
+                name, field = key.split(".")
+                column.append(data[name][field])
+            for key, column in columns.states.items():
+                name, field = key.split(".")
+                column.append(i, data[name][field])
+        return columns
+
+    # Number of steps
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __iter__(self):
+        return iter(self.times)
+
+    def __getitem__(self, t: float) -> dict:
+        if self._index is None:
+            self._index = {time: i for i, time in enumerate(self.times)}
+        return self.snapshot(self._index[t])
+
+    # Expands step i into the same snapshot simulator.run records
+    def snapshot(self, i: int) -> dict:
+        data = {}
+        for name, component_type in self.types.items():
+            entry = {"type": component_type}
+            for field in FIELDS[name]:
+                key = f"{name}.{field}"
+                if key in self.numeric:
+                    entry[field] = self.numeric[key][i]
+                else:
+                    entry[field] = self.states[key].value_at(i)
+            data[name] = entry
+        if OPS_FIELD in self.states:
+            data["load"]["program_executed_ops"] = self.states[OPS_FIELD].value_at(i)
+        return data
+
+    # Full column of a field ("<component>.<field>", e.g. "storage.voltage"), one value per step
+    def column(self, key: str) -> list:
+        if key in self.numeric:
+            return self.numeric[key].tolist()
+        if key in self.states:
+            return self.states[key].expand(len(self))
+        raise ValueError(f"Simulation output has no column: {key!r}")
+
+    def _state(self, key: str) -> RunLengthColumn:
+        if key not in self.states:
+            raise ValueError(f"Simulation output has no state column: {key!r}")
+        return self.states[key]
+
+    # State changes of a categorical field, as (t, value), starting with the value at the first step
+    def transitions(self, key: str) -> list:
+        column = self._state(key)
+        return [(self.times[start], value) for start, value in zip(column.starts, column.values)]
+
+    # Simulated time (in seconds) spent at each value of a categorical field: {value: seconds}
+    def durations(self, key: str) -> dict:
+        counts = self._state(key).step_counts(len(self))
+        return {value: steps * self.t_step for value, steps in counts.items()}
+
+    # Simulated time (in seconds) a categorical field spent at 'value'
+    def time_in(self, key: str, value) -> float:
+        return self.durations(key).get(value, 0.0)
@@ -0,0 +1,206 @@
+# Fleet runner: simulates many independent sensor nodes on a shared clock, reporting fleet-level statistics
+#
+# Nodes are given as a list of configs, or as a template plus per-node overrides (nested dicts merged into it):
+#
+#   configs = fleet.node_configs(template, [{"storage": {"capacitance": 0.1}},
+#                                           {"supply": {"profile_filepath": "trace-b.csv"}}])
+#   result = fleet.run(configs, jobs=4)
+#
+# To keep the cost of a fleet well below one run per node:
+#   - Nodes are compiled with a shared memo (see input.compile_config), so identical supply profiles and
+#     program sources are loaded once. Nodes with identical scenarios are simulated once, and weighted.
+#   - Each unique node runs in the compiled kernel when it supports it (see kernel.py),
+#     and the reference step loop otherwise, in parallel batches when jobs > 1.
+#   - Per-node traces are reduced right away into per-step fleet aggregates, held as numpy arrays
+#     (one value per time step), and a small per-node summary. Full traces are never kept.
+#
+# All nodes must share the simulation step and duration, i.e. the same time grid.
+
+import copy
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.behs.load import MODE_STANDBY
+
+DEFAULT_BATCH_SIZE = 16
+
+
+# Deep-merges 'override' into a copy of 'template'
+def _merge(template: dict, override: dict) -> dict:
+    merged = copy.deepcopy(template)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+# Builds one config per node from a template and per-node overrides
+def node_configs(template: dict, overrides: list) -> list:
+    return [_merge(template, override) for override in overrides]
+
+
+# Simulates one node, returning (storage voltage per step, powered flag per step, harvested energy, its Input)
+# See simulator.load_is_powered for when a Load is powered.
+def simulate_node(scenario: inp.CompiledScenario) -> tuple:
+    from src.simulator import kernel
+
+    sim_input = inp.Input(scenario, verbose=False)
+    if kernel.supports(sim_input):
+        result = kernel.run(sim_input)
+        return (result["storage_voltage"], result["load_mode"] >= MODE_STANDBY,
+                float(result["energy_supply"].sum()), sim_input)
+
+    n_steps = len(sim_input.t_vector)
+    t_step = sim_input.t_step
+    voltage = np.empty(n_steps)
+    powered = np.empty(n_steps, dtype=np.bool_)
+    harvested = 0.0
+    supply, storage, load = sim_input.supply, sim_input.storage, sim_input.load
+    for i in range(n_steps):
+        simulator.step(sim_input, i, t_step)
+        voltage[i] = storage.voltage
+        powered[i] = simulator.load_is_powered(load)
+        harvested += supply.energy_supply
+    return voltage, powered, harvested, sim_input
+
+
+# Per-node summary, derived from its traces
+def _summarize(voltage, powered, harvested: float, sim_input) -> dict:
+    brownouts = np.flatnonzero(powered[:-1] & ~powered[1:]) + 1
+    t_vector = sim_input.t_vector
+    return {
+        "energy_harvested": harvested,
+        "energy_consumed": sim_input.load.total_energy_consumed,
+        "final_energy_stored": sim_input.storage.energy_stored,
+        "min_voltage": float(voltage.min()) if len(voltage) else 0.0,
+        "powered_time": float(np.count_nonzero(powered)) * sim_input.t_step,
+        "brownouts": len(brownouts),
+        "first_brownout": t_vector[int(brownouts[0])] if len(brownouts) else None,
+    }
+
+
+# Class FleetAggregate accumulates per-step statistics over nodes, with a weight per node
+class FleetAggregate:
+    def __init__(self, n_steps: int):
+        self.nodes = 0
+        self.voltage_sum = np.zeros(n_steps)
+        self.voltage_min = np.full(n_steps, np.inf)
+        self.voltage_max = np.full(n_steps, -np.inf)
+        self.powered = np.zeros(n_steps, dtype=np.int64)
+
+    def add(self, voltage, powered, weight: int = 1) -> None:
+        self.nodes += weight
+        self.voltage_sum += voltage * weight
+        np.minimum(self.voltage_min, voltage, out=self.voltage_min)
+        np.maximum(self.voltage_max, voltage, out=self.voltage_max)
+        self.powered += powered.astype(np.int64) * weight
+
+    def merge(self, other: "FleetAggregate") -> None:
+        self.nodes += other.nodes
+        self.voltage_sum += other.voltage_sum
+        np.minimum(self.voltage_min, other.voltage_min, out=self.voltage_min)
+        np.maximum(self.voltage_max, other.voltage_max, out=self.voltage_max)
+        self.powered += other.powered
+
+
+# Worker entry point: simulates a batch of unique nodes as [(scenario, weight)]
+# Returns the batch aggregate and the summary of each node.
+def _run_batch(nodes: list, n_steps: int) -> tuple:
+    aggregate = FleetAggregate(n_steps)
+    summaries = []
+    for scenario, weight in nodes:
+        voltage, powered, harvested, sim_input = simulate_node(scenario)
+        aggregate.add(voltage, powered, weight)
+        summaries.append(_summarize(voltage, powered, harvested, sim_input))
+    return aggregate, summaries
+
+
+# Runs a fleet of nodes, given as configs or CompiledScenarios
+#   - jobs: worker processes (defaults to the CPU count), 1 runs everything in this process.
+# Returns a dict with:
+#   - "nodes", "unique_nodes", "time" (the shared time grid),
+#   - "storage_voltage": {"mean", "min", "max"} over nodes, per step (numpy arrays),
+#   - "powered_fraction": fraction of nodes whose Load is powered, per step,
+#   - "brownout_fraction": fraction of nodes with at least one brown-out,
+#   - "node_summaries": one summary dict per node, in the given order.
+def run(nodes: list, jobs: int = None, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    if not nodes:
+        raise ValueError("Fleet must have at least one node.")
+
+    shared = {}
+    scenarios = [node if isinstance(node, inp.CompiledScenario) else inp.compile_config(node, shared=shared)
+                 for node in nodes]
+
+    simulation = scenarios[0].config["simulation"]
+    for scenario in scenarios[1:]:
+        if scenario.config["simulation"] != simulation:
+            raise ValueError(
+                "All fleet nodes must share the simulation 'step' and 'duration'.")
+    t_vector = inp.simulation_t_vector(simulation)
+    n_steps = len(t_vector)
+
+    # Identical nodes are simulated once
+    unique = {}
+    for scenario in scenarios:
+        if scenario.key in unique:
+            unique[scenario.key][1] += 1
+        else:
+            unique[scenario.key] = [scenario, 1]
+    unique_nodes = [(scenario, weight) for scenario, weight in unique.values()]
+    batches = [unique_nodes[i:i + batch_size]
+               for i in range(0, len(unique_nodes), batch_size)]
+
+    aggregate = FleetAggregate(n_steps)
+    summaries = {}
+
+    def consume(batch, batch_result):
+        batch_aggregate, batch_summaries = batch_result
+        aggregate.merge(batch_aggregate)
+        for (scenario, _), summary in zip(batch, batch_summaries):
+            summaries[scenario.key] = summary
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(batches) == 1:
+        for batch in batches:
+            consume(batch, _run_batch(batch, n_steps))
+    else:
+        # Supply profiles are shared with the workers through shared memory, instead of a copy per node
+        # (imported here: the pool is POSIX only, single-process runs work on any platform)
+        from src.input.profilepool import ProfilePool
+
+        with ProfilePool() as pool, ProcessPoolExecutor(max_workers=jobs) as executor:
+            batches = [[(pool.share(scenario), weight) for scenario, weight in batch]
+                       for batch in batches]
+            pending = deque()
+            for batch in batches:
+                pending.append(
+                    (batch, executor.submit(_run_batch, batch, n_steps)))
+                if len(pending) >= 2 * jobs:
+                    batch_done, future = pending.popleft()
+                    consume(batch_done, future.result())
+            while pending:
+                batch_done, future = pending.popleft()
+                consume(batch_done, future.result())
+
+    node_summaries = [summaries[scenario.key] for scenario in scenarios]
+    with_brownouts = sum(1 for summary in node_summaries if summary["brownouts"])
+    return {
+        "nodes": len(scenarios),
+        "unique_nodes": len(unique_nodes),
+        "time": t_vector,
+        "storage_voltage": {
+            "mean": aggregate.voltage_sum / aggregate.nodes,
+            "min": aggregate.voltage_min,
+            "max": aggregate.voltage_max,
+        },
+        "powered_fraction": aggregate.powered / aggregate.nodes,
+        "brownout_fraction": with_brownouts / len(scenarios),
+        "node_summaries": node_summaries,
+    }
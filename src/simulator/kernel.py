@@ -0,0 +1,529 @@
+# Compiled backend for the coupled Supply -> (PMIC) -> Capacitor <- MCU + Program loop
+#
+# The MCU mode depends on the previous step's voltage and the Program state carries over between steps,
+# so the loop cannot be vectorised. Instead, every component is flattened into scalars and arrays
+# (Program operations become arrays of instruction codes, costs, durations and ticks), and the whole loop
+# runs in a single function compiled with Numba's njit.
+# Numba is optional: without it the same function runs as plain Python, which gives the same results
+# but is slower than simulator.run (numpy scalar access), so callers should check NUMBA_AVAILABLE.
+#
+# The equations mirror the reference components step by step (see src/behs/ and src/program/),
+# so results match simulator.run.
+#
+# Usage:
+#   result = kernel.run(sim_input)                 # dict of numpy arrays, one entry per step
+#   sim_output = kernel.to_sim_output(sim_input, result)  # same format as simulator.run (slow for long runs)
+
+import math
+
+import numpy as np
+
+from src.behs import energystorage, energysupply, load, pmic as pmic_module
+from src.program import program as program_module
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **_kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# Instruction codes, indexed like the Program operation registry
+INSTRUCTIONS = program_module.INSTRUCTIONS
+
+_TICK_MODEL_CODES = {
+    program_module.CLOCK_TICK_MODEL_FLOAT: 0,
+    program_module.CLOCK_TICK_MODEL_INTEGER: 1,
+}
+
+# Same tolerance as Program._get_cost_float
+_ESTIMATED_ZERO = 1e-12
+
+
+# Makes op_index skip operations of unknown duration
+# Returns (op_index, remaining_seconds, remaining_ticks) for the next valid operation.
+@njit(cache=True)
+def _next_valid_op(op_index, remaining_seconds, remaining_ticks, op_duration, op_ticks, op_unknown):
+    n_ops = op_duration.shape[0]
+    while op_index < n_ops:
+        if op_unknown[op_index]:
+            op_index += 1
+        else:
+            return op_index, op_duration[op_index], op_ticks[op_index]
+    return op_index, remaining_seconds, remaining_ticks
+
+
+@njit(cache=True)
+def _kernel(n_steps, t_step, profile,
+            # MCU
+            v_min, v_max, v_oper_shutdown, v_oper_standby, v_oper_active,
+            active_cost, standby_cost, shutdown_cost, mcu_mode, total_energy,
+            # Program
+            has_program, tick_model, processing_clock, ticks_per_t_step, cpu_active_cost,
+            op_code, op_cost, op_duration, op_ticks, op_unknown, op_is_cpu,
+            op_index, remaining_seconds, remaining_ticks, ops_last_step, has_work, cycles,
+            progress, reexecuted, uncommitted,
+            # PMIC
+            has_pmic, v_boost_thresh, v_bat_uv, v_bat_ov, v_bat_ok_low, v_bat_ok_high, v_out_reg,
+            mppt_eff, boost_eff, buck_eff, cold_start_eff, vbat_ok, v_out, pmic_status,
+            # Capacitor
+            capacitance, e_max, energy_stored, voltage, storage_status,
+            # Outputs
+            out_power_supply, out_energy_supply,
+            out_storage_status, out_storage_voltage, out_storage_current, out_energy_stored, out_power_stored,
+            out_load_mode, out_load_voltage, out_load_current, out_energy_consumed, out_total_energy,
+            out_ops,
+            out_pmic_status, out_v_out, out_vbat_ok, out_energy_to_storage, out_energy_from_storage):
+    n_ops = op_cost.shape[0]
+    n_instructions = ops_last_step.shape[0]
+    profile_len = profile.shape[0]
+    e_to_storage = 0.0
+    e_from_storage = 0.0
+
+    for i in range(n_steps):
+        # 1. Energy Supply
+        power_supply = profile[i % profile_len]
+        energy_supply = power_supply * t_step
+
+        # 2. Load (MCU), based on v_supply at (t-1)
+        v_supply = v_out if has_pmic else voltage
+        if v_supply < v_min:
+            mcu_mode = load.MODE_OFF
+        elif v_supply < v_oper_shutdown:
+            mcu_mode = load.MODE_IDLE
+        elif v_supply < v_oper_standby:
+            mcu_mode = load.MODE_SHUTDOWN
+        elif v_supply < v_oper_active:
+            mcu_mode = load.MODE_STANDBY
+        else:
+            mcu_mode = load.MODE_ACTIVE
+
+        # Program is reset if the MCU loses power (not "active" or "standby"), losing its uncommitted work
+        if has_program and mcu_mode < load.MODE_STANDBY:
+            lost = uncommitted
+            if op_index < n_ops:
+                if tick_model == 0:
+                    lost += op_duration[op_index] - remaining_seconds
+                elif op_ticks[op_index] > 0:
+                    lost += (op_ticks[op_index] - remaining_ticks) / op_ticks[op_index] * op_duration[op_index]
+            reexecuted += lost
+            uncommitted = 0.0
+            op_index, remaining_ticks, remaining_seconds = 0, 0, 0.0
+            for k in range(n_instructions):
+                ops_last_step[k] = 0.0
+            op_index, remaining_seconds, remaining_ticks = _next_valid_op(
+                op_index, remaining_seconds, remaining_ticks, op_duration, op_ticks, op_unknown)
+
+        load_voltage = 0.0
+        if v_supply >= v_min:
+            load_voltage = v_max if v_max < v_supply else v_supply
+
+        if mcu_mode == load.MODE_ACTIVE:
+            if has_program:
+                for k in range(n_instructions):
+                    ops_last_step[k] = 0.0
+                load_current = 0.0
+
+                # FLOAT MODEL, see Program._get_cost_float
+                if tick_model == 0:
+                    for _ in range(ticks_per_t_step):
+                        remaining_tick = processing_clock
+                        while remaining_tick > _ESTIMATED_ZERO:
+                            if op_index >= n_ops:
+                                op_index = 0
+                                op_index, remaining_seconds, remaining_ticks = _next_valid_op(
+                                    op_index, remaining_seconds, remaining_ticks, op_duration, op_ticks, op_unknown)
+                                if op_index >= n_ops:
+                                    break
+
+                            elapsed = remaining_seconds if remaining_seconds < remaining_tick else remaining_tick
+                            ops_last_step[op_code[op_index]] += elapsed
+
+                            if op_duration[op_index] >= t_step:
+                                load_current += op_cost[op_index] * \
+                                    (elapsed / t_step)
+                            else:
+                                load_current += op_cost[op_index] * \
+                                    (elapsed / op_duration[op_index])
+                            if not op_is_cpu[op_index]:
+                                load_current += cpu_active_cost * \
+                                    (elapsed / t_step)
+
+                            remaining_seconds -= elapsed
+                            remaining_tick -= elapsed
+                            if remaining_seconds <= _ESTIMATED_ZERO:
+                                uncommitted += op_duration[op_index]
+                                op_index += 1
+                                op_index, remaining_seconds, remaining_ticks = _next_valid_op(
+                                    op_index, remaining_seconds, remaining_ticks, op_duration, op_ticks, op_unknown)
+                                if op_index >= n_ops and has_work:
+                                    cycles += 1
+                                    progress += uncommitted
+                                    uncommitted = 0.0
+
+                # INTEGER MODEL, see Program._get_cost_integer
+                else:
+                    for _ in range(ticks_per_t_step):
+                        if op_index >= n_ops:
+                            op_index = 0
+                            op_index, remaining_seconds, remaining_ticks = _next_valid_op(
+                                op_index, remaining_seconds, remaining_ticks, op_duration, op_ticks, op_unknown)
+                            if op_index >= n_ops:
+                                break
+
+                        ops_last_step[op_code[op_index]] += processing_clock
+                        if op_duration[op_index] >= t_step:
+                            load_current += op_cost[op_index] / \
+                                ticks_per_t_step
+                        else:
+                            load_current += op_cost[op_index] / \
+                                op_ticks[op_index]
+                        if not op_is_cpu[op_index]:
+                            load_current += cpu_active_cost / ticks_per_t_step
+
+                        remaining_ticks -= 1
+                        if remaining_ticks <= 0:
+                            uncommitted += op_duration[op_index]
+                            op_index += 1
+                            op_index, remaining_seconds, remaining_ticks = _next_valid_op(
+                                op_index, remaining_seconds, remaining_ticks, op_duration, op_ticks, op_unknown)
+                            if op_index >= n_ops and has_work:
+                                cycles += 1
+                                progress += uncommitted
+                                uncommitted = 0.0
+            else:
+                load_current = active_cost
+        elif mcu_mode == load.MODE_STANDBY:
+            load_current = standby_cost
+        elif mcu_mode == load.MODE_SHUTDOWN:
+            load_current = shutdown_cost
+        else:
+            load_current = 0.0
+
+        energy_consumed = load_voltage * load_current * t_step
+        total_energy += energy_consumed
+
+        # 3. PMIC (if applicable), based on v_storage at (t-1)
+        if has_pmic:
+            v_storage = voltage
+            if vbat_ok:
+                vbat_ok = v_storage >= v_bat_ok_low
+            else:
+                vbat_ok = v_storage >= v_bat_ok_high
+
+            if not vbat_ok or v_storage <= v_bat_uv:
+                v_out = 0.0
+            elif v_storage < v_out_reg:
+                v_out = v_storage
+            else:
+                v_out = v_out_reg
+
+            if energy_supply <= 0.0 or v_storage >= v_bat_ov:
+                e_to_storage = 0.0
+            elif v_storage < v_boost_thresh:
+                e_to_storage = energy_supply * cold_start_eff
+            else:
+                e_to_storage = energy_supply * mppt_eff * boost_eff
+
+            if energy_consumed <= 0.0 or not vbat_ok or v_storage <= v_bat_uv:
+                e_from_storage = 0.0
+            else:
+                e_from_storage = energy_consumed / buck_eff
+
+            if v_storage < v_boost_thresh:
+                pmic_status = pmic_module.STATUS_COLD_START
+            elif v_storage < v_bat_uv:
+                pmic_status = pmic_module.STATUS_BOOST_ONLY
+            elif v_storage >= v_bat_ov:
+                pmic_status = pmic_module.STATUS_FULL
+            elif e_to_storage > e_from_storage:
+                pmic_status = pmic_module.STATUS_CHARGING
+            elif e_from_storage > e_to_storage:
+                pmic_status = pmic_module.STATUS_DISCHARGING
+            else:
+                pmic_status = pmic_module.STATUS_IDLE
+
+            e_in = e_to_storage
+            e_out = e_from_storage
+        else:
+            e_in = energy_supply
+            e_out = energy_consumed
+
+        # 4. Energy Storage (Capacitor)
+        energy = energy_stored + e_in - e_out
+        if energy > 0:
+            energy_stored = energy if energy <= e_max else e_max
+            voltage = math.sqrt(2 * energy_stored / capacitance)
+            power_stored = energy_stored / t_step
+        else:
+            energy_stored = 0.0
+            voltage = 0.0
+            power_stored = 0.0
+        storage_current = (power_stored / voltage) if voltage > 0 else 0.0
+
+        if energy_stored >= e_max:
+            storage_status = energystorage.STATUS_FULL
+        elif energy_stored <= 0:
+            storage_status = energystorage.STATUS_EMPTY
+        elif e_in > e_out:
+            storage_status = energystorage.STATUS_CHARGING
+        elif e_in < e_out:
+            storage_status = energystorage.STATUS_DISCHARGING
+        else:
+            storage_status = energystorage.STATUS_IDLE
+
+        # Outputs
+        out_power_supply[i] = power_supply
+        out_energy_supply[i] = energy_supply
+        out_storage_status[i] = storage_status
+        out_storage_voltage[i] = voltage
+        out_storage_current[i] = storage_current
+        out_energy_stored[i] = energy_stored
+        out_power_stored[i] = power_stored
+        out_load_mode[i] = mcu_mode
+        out_load_voltage[i] = load_voltage
+        out_load_current[i] = load_current
+        out_energy_consumed[i] = energy_consumed
+        out_total_energy[i] = total_energy
+        for k in range(n_instructions):
+            out_ops[i, k] = ops_last_step[k]
+        out_pmic_status[i] = pmic_status
+        out_v_out[i] = v_out
+        out_vbat_ok[i] = vbat_ok
+        out_energy_to_storage[i] = e_to_storage
+        out_energy_from_storage[i] = e_from_storage
+
+    return (mcu_mode, total_energy, op_index, remaining_seconds, remaining_ticks,
+            cycles, progress, reexecuted, uncommitted, vbat_ok, v_out, pmic_status, energy_stored, voltage, storage_status)
+
+
+# Flattens the Program operations into arrays
+def _program_arrays(prog):
+    operations = prog.operations if prog is not None else []
+    return (
+        np.array([op.code for op in operations], dtype=np.int64),
+        np.array([op.cost for op in operations], dtype=np.float64),
+        np.array([op.duration for op in operations], dtype=np.float64),
+        np.array([op.ticks_needed for op in operations], dtype=np.int64),
+        np.array([op.unknown_duration for op in operations], dtype=np.bool_),
+        np.array([op.is_cpu for op in operations], dtype=np.bool_),
+    )
+
+
+# Supply power profile as an array (a constant supply is a single value, repeated by the kernel)
+def _supply_profile(supply, n_steps):
+    if type(supply) is energysupply.ConstantSupply:
+        return np.array([supply.P_BASE], dtype=np.float64)
+    if type(supply) is not energysupply.HarvestingSupply:
+        raise ValueError(f"Compiled backend does not support Energy Supply type: {supply.type!r}")
+    profile = np.asarray(supply.profile, dtype=np.float64)
+    if profile.shape[0] < n_steps:
+        raise IndexError("Supply profile is shorter than the simulation")
+    return profile
+
+
+# Returns why sim_input cannot run in the compiled kernel, or None if it can
+# Components are matched by exact type: the kernel mirrors the equations of the built-in classes only,
+# so subclasses (e.g. plugin components overriding 'refresh') run in the reference engine.
+# Programs with REPEAT blocks, CHECKPOINT operations or an execution policy run in the reference engine only.
+def _unsupported(sim_input) -> str:
+    mcu, capacitor, pmic, supply = sim_input.load, sim_input.storage, sim_input.pmic, sim_input.supply
+    if type(supply) not in (energysupply.ConstantSupply, energysupply.HarvestingSupply):
+        return f"Compiled backend does not support Energy Supply type: {supply.type!r}"
+    if type(mcu) is not load.MCU:
+        return f"Compiled backend does not support Load type: {mcu.type!r}"
+    if type(capacitor) is not energystorage.Capacitor:
+        return f"Compiled backend does not support Energy Storage type: {capacitor.type!r}"
+    if pmic is not None and type(pmic) is not pmic_module.BoostBuckPMIC:
+        return f"Compiled backend does not support PMIC type: {pmic.type!r}"
+    if mcu.program is not None and mcu.program.has_loops:
+        return "Compiled backend does not support Programs with REPEAT or EVERY blocks"
+    if mcu.program is not None and mcu.program.policy is not None:
+        return "Compiled backend does not support Programs with an execution policy"
+    if mcu.program is not None and mcu.program.has_checkpoints:
+        return "Compiled backend does not support Programs with CHECKPOINT operations"
+    return None
+
+
+# Returns True if sim_input can run in the compiled kernel (and Numba is there to compile it)
+def supports(sim_input) -> bool:
+    return NUMBA_AVAILABLE and _unsupported(sim_input) is None
+
+
+# Runs the whole simulation of sim_input in the compiled kernel
+# Supports a constant or harvesting supply, an MCU Load (with or without Program), a Capacitor storage
+# and an optional BoostBuckPMIC (built-in classes only, see _unsupported).
+# Returns a dict of per-step numpy arrays (mode/status columns hold the components' int codes),
+# and leaves the components in the same final state as the reference engine.
+def run(sim_input) -> dict:
+    mcu, capacitor, pmic, supply = sim_input.load, sim_input.storage, sim_input.pmic, sim_input.supply
+    reason = _unsupported(sim_input)
+    if reason is not None:
+        raise ValueError(reason)
+
+    n_steps = len(sim_input.t_vector)
+    t_step = float(sim_input.t_step)
+    prog = mcu.program
+    has_program = prog is not None
+    ops = _program_arrays(prog)
+
+    ops_last_step = np.zeros(len(INSTRUCTIONS), dtype=np.float64)
+    if has_program:
+        ops_last_step[:] = prog.executed_ops
+
+    result = {
+        "power_supply": np.empty(n_steps),
+        "energy_supply": np.empty(n_steps),
+        "storage_status": np.empty(n_steps, dtype=np.int8),
+        "storage_voltage": np.empty(n_steps),
+        "storage_current": np.empty(n_steps),
+        "energy_stored": np.empty(n_steps),
+        "power_stored": np.empty(n_steps),
+        "load_mode": np.empty(n_steps, dtype=np.int8),
+        "load_voltage": np.empty(n_steps),
+        "load_current": np.empty(n_steps),
+        "energy_consumed": np.empty(n_steps),
+        "total_energy_consumed": np.empty(n_steps),
+        "program_executed_ops": np.empty((n_steps, len(INSTRUCTIONS))),
+        "pmic_status": np.empty(n_steps, dtype=np.int8),
+        "vout": np.empty(n_steps),
+        "vbat_ok": np.empty(n_steps, dtype=np.bool_),
+        "energy_to_storage": np.empty(n_steps),
+        "energy_from_storage": np.empty(n_steps),
+    }
+
+    has_pmic = pmic is not None
+    initial_state = (float(capacitor.energy_stored), float(capacitor.voltage),
+                     bool(pmic.vbat_ok) if has_pmic else False)
+    final_state = _kernel(
+        n_steps, t_step, _supply_profile(supply, n_steps),
+        float(mcu.V_MIN), float(mcu.V_MAX), float(mcu.V_OPER_SHUTDOWN), float(
+            mcu.V_OPER_STANDBY), float(mcu.V_OPER_ACTIVE),
+        mcu.ACTIVE_COST, mcu.STANDBY_COST, mcu.SHUTDOWN_COST, mcu.mode_code, float(
+            mcu.total_energy_consumed),
+        has_program,
+        _TICK_MODEL_CODES[prog.TICK_MODEL] if has_program else 0,
+        float(prog.PROCESSING_CLOCK) if has_program else 1.0,
+        max(1, round(t_step / prog.PROCESSING_CLOCK)) if has_program else 1,
+        float(prog.CPU_ACTIVE_COST) if has_program else 0.0,
+        *ops,
+        prog.current_op_index if has_program else 0,
+        float(prog.current_op_remaining_seconds) if has_program else 0.0,
+        prog.current_op_remaining_ticks if has_program else 0,
+        ops_last_step,
+        bool(prog.has_work) if has_program else False,
+        prog.cycles if has_program else 0,
+        *(float(getattr(prog, name)) if has_program else 0.0
+          for name in ["progress_seconds", "reexecuted_seconds", "uncommitted_seconds"]),
+        has_pmic,
+        *(float(getattr(pmic, name)) if has_pmic else 0.0 for name in [
+            "V_BOOST_THRESH", "V_BAT_UV", "V_BAT_OV", "V_BAT_OK_LOW", "V_BAT_OK_HIGH", "V_OUT_REG",
+            "MPPT_EFFICIENCY", "BOOST_EFFICIENCY", "BUCK_EFFICIENCY", "COLD_START_EFFICIENCY"]),
+        bool(pmic.vbat_ok) if has_pmic else False,
+        float(pmic.v_out) if has_pmic else 0.0,
+        pmic.status_code if has_pmic else pmic_module.STATUS_OFF,
+        float(capacitor.CAPACITANCE), float(
+            capacitor.E_MAX), float(capacitor.energy_stored),
+        float(capacitor.voltage), capacitor.status_code,
+        *result.values(),
+    )
+
+    _write_back_state(sim_input, result, initial_state,
+                      final_state, ops_last_step)
+    return result
+
+
+# Leaves the components in the final state of the run, as if the reference engine had run them
+# The PMIC and Capacitor replay the last step from the previous state, which also sets their energy accounting.
+def _write_back_state(sim_input, result, initial_state, final_state, ops_last_step):
+    (mcu_mode, total_energy, op_index, remaining_seconds, remaining_ticks,
+     cycles, progress, reexecuted, uncommitted, _, _, _, _, _, _) = final_state
+    n_steps = len(sim_input.t_vector)
+    if n_steps == 0:
+        return
+
+    supply, mcu, capacitor, pmic = sim_input.supply, sim_input.load, sim_input.storage, sim_input.pmic
+    t_step = float(sim_input.t_step)
+    supply.power_supply = float(result["power_supply"][-1])
+    supply.energy_supply = float(result["energy_supply"][-1])
+
+    mcu.mode_code = int(mcu_mode)
+    mcu.voltage = float(result["load_voltage"][-1])
+    mcu.current = float(result["load_current"][-1])
+    mcu.energy_consumed = float(result["energy_consumed"][-1])
+    mcu.total_energy_consumed = float(total_energy)
+    if mcu.program is not None:
+        mcu.program.current_op_index = int(op_index)
+        mcu.program.current_op_remaining_seconds = float(remaining_seconds)
+        mcu.program.current_op_remaining_ticks = int(remaining_ticks)
+        mcu.program.cycles = int(cycles)
+        mcu.program.progress_seconds = float(progress)
+        mcu.program.reexecuted_seconds = float(reexecuted)
+        mcu.program.uncommitted_seconds = float(uncommitted)
+        mcu.program.executed_ops[:] = ops_last_step.tolist()
+
+    energy_stored, voltage, vbat_ok = initial_state
+    if n_steps > 1:
+        energy_stored = float(result["energy_stored"][-2])
+        voltage = float(result["storage_voltage"][-2])
+        vbat_ok = bool(result["vbat_ok"][-2])
+
+    e_supply, e_load = supply.energy_supply, mcu.energy_consumed
+    if pmic is not None:
+        pmic.vbat_ok = vbat_ok
+        pmic.refresh(e_supply, e_load, voltage, t_step)
+        e_supply, e_load = pmic.energy_to_storage, pmic.energy_from_storage
+
+    capacitor.energy_stored = energy_stored
+    capacitor.refresh(e_supply, e_load, t_step)
+
+
+# Converts kernel results into the simulator.run output format: {t: snapshot}
+def to_sim_output(sim_input, result: dict) -> dict:
+    supply_type, storage_type, load_type = sim_input.supply.type, sim_input.storage.type, sim_input.load.type
+    has_program = sim_input.load.program is not None
+    pmic = sim_input.pmic
+
+    sim_output = {}
+    for i, t in enumerate(sim_input.t_vector):
+        data = {
+            "supply": {
+                "type": supply_type,
+                "power_supply": float(result["power_supply"][i]),
+                "energy_supply": float(result["energy_supply"][i]),
+            },
+            "storage": {
+                "type": storage_type,
+                "status": energystorage.STATUS_NAMES[result["storage_status"][i]],
+                "voltage": float(result["storage_voltage"][i]),
+                "current": float(result["storage_current"][i]),
+                "energy_stored": float(result["energy_stored"][i]),
+                "power_stored": float(result["power_stored"][i]),
+            },
+            "load": {
+                "type": load_type,
+                "mode": load.MODE_NAMES[result["load_mode"][i]],
+                "voltage": float(result["load_voltage"][i]),
+                "current": float(result["load_current"][i]),
+                "energy_consumed": float(result["energy_consumed"][i]),
+                "total_energy_consumed": float(result["total_energy_consumed"][i]),
+            },
+        }
+        if has_program:
+            data["load"]["program_executed_ops"] = tuple(
+                result["program_executed_ops"][i].tolist())
+        if pmic is not None:
+            data["pmic"] = {
+                "type": pmic.type,
+                "status": pmic_module.STATUS_NAMES[result["pmic_status"][i]],
+                "vout": float(result["vout"][i]),
+                "vbat_ok": bool(result["vbat_ok"][i]),
+                "energy_to_storage": float(result["energy_to_storage"][i]),
+                "energy_from_storage": float(result["energy_from_storage"][i]),
+            }
+        sim_output[t] = data
+    return sim_output
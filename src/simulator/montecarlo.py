@@ -0,0 +1,293 @@
+# Monte Carlo uncertainty engine over component tolerances
+#
+# Component parameters are sampled from user-specified distributions, and the scenario is simulated once per
+# replica, in parallel batches. Instead of keeping every trajectory, each replica is reduced on the fly to:
+#   - the storage voltage at 'bins' time points, fed into online P² quantile sketches (one per time point);
+#   - the time of its first brown-out, if any.
+# Memory therefore stays bounded by bins x quantiles, regardless of the number of replicas.
+#
+# Parameters are given by their path in the config, with a distribution:
+#   {
+#     "storage.capacitance": {"distribution": "uniform", "tolerance": 0.2},
+#     "pmic.boost_efficiency": {"distribution": "normal", "std": 0.03, "max": 1.0},
+#   }
+# Supported distributions:
+#   - "uniform": "tolerance" (relative to the nominal value), or "low" and "high".
+#   - "normal": "std", and "mean" (defaults to the nominal value).
+# Optional "min"/"max" clip the sampled values, e.g. to keep efficiencies <= 1.0.
+# Values outside the physical bounds of their field (see input.field_in_bounds, e.g. a negative capacitance)
+# are drawn again, i.e. distributions are truncated to the valid range.
+#
+# NOTE: Parameters are sampled once per replica, e.g. an efficiency does not vary with input power within a run.
+
+import math
+import os
+import random
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.behs.load import MODE_STANDBY
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+DEFAULT_BINS = 100
+DEFAULT_BATCH_SIZE = 50
+
+# Draws per sampled value before giving up on a distribution that is mostly out of range
+MAX_DRAWS = 1000
+
+_DISTRIBUTIONS = ["uniform", "normal"]
+
+
+# Online estimate of a single quantile with the P² algorithm (Jain & Chlamtac, 1985)
+# Keeps five markers instead of the observations, so memory is constant.
+class P2Quantile:
+    __slots__ = ("p", "count", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError(f"Quantile must be between 0 and 1, got {p}")
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        q = self.heights
+
+        # The first five observations are the initial markers
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell k of x, extending the extreme markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect_right(q, x) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the middle markers if they are off their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    # Current estimate (exact, by linear interpolation, while there are at most five observations)
+    def value(self) -> float:
+        if self.count == 0:
+            return math.nan
+        if self.count > 5:
+            return self.heights[2]
+        rank = self.p * (self.count - 1)
+        lo = math.floor(rank)
+        hi = min(lo + 1, self.count - 1)
+        return self.heights[lo] + (rank - lo) * (self.heights[hi] - self.heights[lo])
+
+
+# Checks every parameter spec against the (normalised) config
+def validate_parameters(config: dict, parameters: dict) -> None:
+    for path, spec in parameters.items():
+        nominal = inp.get_config_value(config, path)
+        if not isinstance(nominal, (int, float)) or isinstance(nominal, bool):
+            raise ValueError(
+                f"Monte Carlo parameter '{path}' must be numeric in the config.")
+
+        distribution = spec.get("distribution")
+        if distribution not in _DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown distribution for '{path}': {distribution!r}. Available: {_DISTRIBUTIONS}")
+        if distribution == "uniform" and "tolerance" not in spec and not ("low" in spec and "high" in spec):
+            raise ValueError(
+                f"Uniform distribution for '{path}' needs 'tolerance', or 'low' and 'high'.")
+        if distribution == "normal" and "std" not in spec:
+            raise ValueError(
+                f"Normal distribution for '{path}' needs 'std'.")
+
+
+# Samples one value per parameter, as {path: value}
+# Out-of-range values are drawn again, at most MAX_DRAWS times per value.
+def sample_parameters(config: dict, parameters: dict, rng: random.Random) -> dict:
+    sample = {}
+    for path, spec in parameters.items():
+        nominal = inp.get_config_value(config, path)
+        for _ in range(MAX_DRAWS):
+            value = _draw(spec, nominal, rng)
+            if inp.field_in_bounds(path, value):
+                break
+        else:
+            raise ValueError(
+                f"Monte Carlo parameter '{path}' has no valid value in {MAX_DRAWS} draws, check its distribution.")
+        sample[path] = value
+    return sample
+
+
+def _draw(spec: dict, nominal: float, rng: random.Random) -> float:
+    if spec["distribution"] == "uniform":
+        if "tolerance" in spec:
+            low = nominal * (1 - spec["tolerance"])
+            high = nominal * (1 + spec["tolerance"])
+        else:
+            low, high = spec["low"], spec["high"]
+        value = rng.uniform(low, high)
+    else:
+        value = rng.gauss(spec.get("mean", nominal), spec["std"])
+
+    if "min" in spec:
+        value = max(value, spec["min"])
+    if "max" in spec:
+        value = min(value, spec["max"])
+    return value
+
+
+# Simulates one replica, returning (storage voltage at sample_indices, step index of the first brown-out or None)
+# A brown-out is the Load losing power after having been powered.
+def simulate_replica(scenario: inp.CompiledScenario, sample_indices: list) -> tuple:
+    from src.simulator import kernel
+
+    sim_input = inp.Input(scenario, verbose=False)
+    if kernel.supports(sim_input):
+        import numpy as np
+
+        result = kernel.run(sim_input)
+        voltages = result["storage_voltage"][sample_indices].tolist()
+        powered = result["load_mode"] >= MODE_STANDBY
+        lost = np.flatnonzero(np.maximum.accumulate(powered) & ~powered)
+        return voltages, (int(lost[0]) if len(lost) else None)
+
+    t_step = sim_input.t_step
+    storage, sim_load = sim_input.storage, sim_input.load
+    wanted = set(sample_indices)
+    voltages = []
+    brownout = None
+    was_powered = False
+    for i in range(len(sim_input.t_vector)):
+        simulator.step(sim_input, i, t_step)
+        if i in wanted:
+            voltages.append(storage.voltage)
+        if brownout is None:
+            powered = simulator.load_is_powered(sim_load)
+            if was_powered and not powered:
+                brownout = i
+            was_powered = was_powered or powered
+    return voltages, brownout
+
+
+# Worker entry point: simulates a batch of replicas of the same base scenario
+def _run_batch(scenario: inp.CompiledScenario, samples: list, sample_indices: list) -> list:
+    return [simulate_replica(inp.override_scenario(scenario, sample), sample_indices) for sample in samples]
+
+
+# Runs 'replicas' Monte Carlo replicas of a config (or CompiledScenario), with 'parameters' sampled as above
+#   - seed:       seed of the parameter sampling, results are reproducible for any number of jobs.
+#   - quantiles:  storage voltage quantiles tracked over time.
+#   - bins:       number of time points at which the storage voltage is tracked.
+#   - batch_size: replicas per worker task.
+#   - jobs:       worker processes (defaults to the CPU count), 1 runs everything in this process.
+# Returns a dict with:
+#   - "replicas", "time" (the tracked time points),
+#   - "storage_voltage": {quantile: [value per time point]},
+#   - "brownout_probability": fraction of replicas with a brown-out,
+#   - "brownout_fraction": fraction of replicas with a brown-out up to each time point.
+def run(config, parameters: dict, replicas: int = 1000, seed: int = None, quantiles=DEFAULT_QUANTILES,
+        bins: int = DEFAULT_BINS, batch_size: int = DEFAULT_BATCH_SIZE, jobs: int = None) -> dict:
+    if replicas <= 0:
+        raise ValueError("Number of Monte Carlo replicas must be positive.")
+    scenario = config if isinstance(
+        config, inp.CompiledScenario) else inp.compile_config(config)
+    base_config = scenario.config
+    validate_parameters(base_config, parameters)
+
+    sim_cfg = base_config["simulation"]
+    t_vector = inp.simulation_t_vector(sim_cfg)
+    n_steps = len(t_vector)
+    n_bins = max(1, min(bins, n_steps))
+    sample_indices = sorted({round(j * (n_steps - 1) / max(1, n_bins - 1))
+                             for j in range(n_bins)})
+
+    sketches = [[P2Quantile(q) for q in quantiles] for _ in sample_indices]
+    brownouts_per_bin = [0] * len(sample_indices)
+    brownouts = 0
+
+    def consume(batch_result):
+        nonlocal brownouts
+        for voltages, brownout in batch_result:
+            for bin_sketches, voltage in zip(sketches, voltages):
+                for sketch in bin_sketches:
+                    sketch.add(voltage)
+            if brownout is not None:
+                brownouts += 1
+                first_bin = bisect_left(sample_indices, brownout)
+                if first_bin < len(sample_indices):
+                    brownouts_per_bin[first_bin] += 1
+
+    rng = random.Random(seed)
+
+    def batches():
+        remaining = replicas
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+            yield [sample_parameters(base_config, parameters, rng) for _ in range(size)]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for samples in batches():
+            consume(_run_batch(scenario, samples, sample_indices))
+    else:
+        # Results are consumed in submission order, with a bounded number of batches in flight
+        # The supply profile is shared with the workers through shared memory, instead of a copy per batch
+        # (imported here: the pool is POSIX only, single-process runs work on any platform)
+        from src.input.profilepool import ProfilePool
+
+        with ProfilePool() as pool, ProcessPoolExecutor(max_workers=jobs) as executor:
+            scenario = pool.share(scenario)
+            pending = deque()
+            for samples in batches():
+                pending.append(executor.submit(
+                    _run_batch, scenario, samples, sample_indices))
+                if len(pending) >= 2 * jobs:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+
+    cumulative = 0
+    brownout_fraction = []
+    for count in brownouts_per_bin:
+        cumulative += count
+        brownout_fraction.append(cumulative / replicas)
+
+    return {
+        "replicas": replicas,
+        "time": [t_vector[i] for i in sample_indices],
+        "storage_voltage": {q: [bin_sketches[k].value() for bin_sketches in sketches]
+                            for k, q in enumerate(quantiles)},
+        "brownout_probability": brownouts / replicas,
+        "brownout_fraction": brownout_fraction,
+    }
@@ -0,0 +1,163 @@
+# Design optimizer over a single numeric config parameter
+#
+# Answers questions like "smallest capacitance such that the MCU never drops out of active/standby",
+# for a given supply profile and program, without manual reruns:
+#   - minimize_feasible: monotonic bisection for the smallest (or largest) value that satisfies the constraint.
+#   - golden_section:    golden-section search for the value that minimizes a unimodal objective.
+#
+# The config is compiled once, so every probe reuses the loaded supply profile and program source
+# (see input.override_scenario). Feasibility probes stop as soon as the constraint is violated,
+# so an infeasible probe only costs the steps until its first brown-out.
+#
+# Usage:
+#   result = optimizer.minimize_feasible(config, "storage.capacitance", low=1e-4, high=1.0)
+#   result.value  # smallest feasible capacitance found (None if even 'high' is infeasible)
+
+import math
+from dataclasses import dataclass, field
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.simulator.stop import Brownout, StopConditions
+
+DEFAULT_RELATIVE_TOLERANCE = 1e-3
+DEFAULT_MAX_PROBES = 64
+
+_INV_PHI = (math.sqrt(5) - 1) / 2
+
+
+# Class Probe records one simulation run of the search
+#   - feasible: the constraint held for the whole run (None for objective probes)
+#   - steps:    number of steps simulated before the run finished or was stopped
+#   - stopped_at: time of the violation, if the run stopped early
+@dataclass
+class Probe:
+    value: float
+    feasible: bool = None
+    objective: float = None
+    steps: int = 0
+    stopped_at: float = None
+
+
+# Class OptimizationResult holds the best value found and every probe run to find it
+@dataclass
+class OptimizationResult:
+    parameter: str
+    value: float
+    probes: list = field(default_factory=list)
+
+    @property
+    def steps_simulated(self) -> int:
+        return sum(probe.steps for probe in self.probes)
+
+
+def _compile(config) -> inp.CompiledScenario:
+    return config if isinstance(config, inp.CompiledScenario) else inp.compile_config(config)
+
+
+# Default constraint: the Load is powered at some point and never browns out afterwards
+# Runs until the first violation only, see stop.Brownout.
+# NOTE: Same loop as simulator.run with 'stop', without building the per-step output nobody reads here.
+def probe_no_brownout(scenario: inp.CompiledScenario, parameter: str, value: float) -> Probe:
+    sim_input = inp.Input(inp.override_scenario(scenario, {parameter: value}), verbose=False)
+    t_step = sim_input.t_step
+    t_vector = sim_input.t_vector
+
+    stop = StopConditions([Brownout()])
+    stop.start()
+    for i, t in enumerate(t_vector):
+        simulator.step(sim_input, i, t_step)
+        if stop.check(sim_input, i, t):
+            break
+    else:
+        stop.finish(t_vector)
+
+    if stop.stopped:
+        return Probe(value, feasible=False, steps=stop.steps, stopped_at=stop.stopped_at)
+    powered = stop.conditions[0].was_powered
+    return Probe(value, feasible=powered, steps=stop.steps)
+
+
+# Finds the smallest value in [low, high] for which the constraint holds, by bisection
+# The constraint must be monotonic in the parameter: infeasible below some threshold, feasible above it.
+# With 'largest=True' the direction is reversed (feasible below the threshold), e.g. for the processing clock.
+#   - probe: callable (scenario, parameter, value) -> Probe, defaults to probe_no_brownout.
+#   - tolerance: absolute width of the final bracket, defaults to 1e-3 of the search range.
+def minimize_feasible(config, parameter: str, low: float, high: float, largest: bool = False,
+                      probe=probe_no_brownout, tolerance: float = None,
+                      max_probes: int = DEFAULT_MAX_PROBES) -> OptimizationResult:
+    if not low < high:
+        raise ValueError(
+            f"Search range must satisfy low < high, got [{low}, {high}].")
+    scenario = _compile(config)
+    inp.get_config_value(scenario.config, parameter)
+    tolerance = tolerance if tolerance is not None else (
+        high - low) * DEFAULT_RELATIVE_TOLERANCE
+
+    result = OptimizationResult(parameter, None)
+
+    def run_probe(value):
+        outcome = probe(scenario, parameter, value)
+        result.probes.append(outcome)
+        return outcome.feasible
+
+    # 'good' is the end of the range expected to be feasible, 'bad' the other one
+    good, bad = (low, high) if largest else (high, low)
+    if not run_probe(good):
+        return result
+    if run_probe(bad):
+        result.value = bad
+        return result
+
+    while abs(good - bad) > tolerance and len(result.probes) < max_probes:
+        middle = (good + bad) / 2
+        if run_probe(middle):
+            good = middle
+        else:
+            bad = middle
+
+    result.value = good
+    return result
+
+
+# Finds the value in [low, high] that minimizes a unimodal objective, by golden-section search
+#   - objective: callable (sim_input) -> float, evaluated after a full run of the probed scenario.
+#   - tolerance: absolute width of the final bracket, defaults to 1e-3 of the search range.
+def golden_section(config, parameter: str, low: float, high: float, objective,
+                   tolerance: float = None, max_probes: int = DEFAULT_MAX_PROBES) -> OptimizationResult:
+    if not low < high:
+        raise ValueError(
+            f"Search range must satisfy low < high, got [{low}, {high}].")
+    scenario = _compile(config)
+    inp.get_config_value(scenario.config, parameter)
+    tolerance = tolerance if tolerance is not None else (
+        high - low) * DEFAULT_RELATIVE_TOLERANCE
+
+    result = OptimizationResult(parameter, None)
+
+    def evaluate(value):
+        sim_input = inp.Input(inp.override_scenario(
+            scenario, {parameter: value}), verbose=False)
+        for i in range(len(sim_input.t_vector)):
+            simulator.step(sim_input, i, sim_input.t_step)
+        outcome = Probe(value, objective=objective(sim_input),
+                        steps=len(sim_input.t_vector))
+        result.probes.append(outcome)
+        return outcome.objective
+
+    a, b = low, high
+    c = b - _INV_PHI * (b - a)
+    d = a + _INV_PHI * (b - a)
+    fc, fd = evaluate(c), evaluate(d)
+    while b - a > tolerance and len(result.probes) < max_probes:
+        if fc <= fd:
+            b, d, fd = d, c, fc
+            c = b - _INV_PHI * (b - a)
+            fc = evaluate(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + _INV_PHI * (b - a)
+            fd = evaluate(d)
+
+    result.value = c if fc <= fd else d
+    return result
@@ -0,0 +1,96 @@
+# Opt-in instrumentation for simulator.run
+#
+# Records cumulative wall time and call counts per component phase (supply, load, load.program, pmic,
+# storage, output), using time.perf_counter_ns. To keep the overhead low on long runs, only one in
+# 'sample_every' steps is timed; the report scales sampled times to estimate the totals of the whole run.
+#
+# Usage:
+#   profiler = Profiler(sample_every=10)
+#   sim_output = simulator.run(sim_input, profiler=profiler)
+#   print(profiler.report())
+#   profiler.write_chrome_trace("profile.json")  # open in chrome://tracing, Perfetto or speedscope
+
+import json
+
+PHASES = ["supply", "load", "load.program", "pmic", "storage", "output"]
+
+# Maximum number of events kept for the trace file, so memory stays bounded on long runs
+DEFAULT_MAX_TRACE_EVENTS = 100_000
+
+
+class Profiler:
+    def __init__(self, sample_every: int = 1, max_trace_events: int = DEFAULT_MAX_TRACE_EVENTS):
+        if sample_every < 1:
+            raise ValueError("Profiler 'sample_every' must be at least 1.")
+
+        self.sample_every = sample_every
+        self.max_trace_events = max_trace_events
+        self.total_ns = {phase: 0 for phase in PHASES}
+        self.calls = {phase: 0 for phase in PHASES}
+        self.events = []  # trace events: (phase, start_ns, end_ns)
+        self.sampling = False
+        self.sampled_steps = 0
+        self.total_steps = 0
+
+    # Decides whether step i is timed, and remembers it for nested phases (e.g. load.program)
+    def sample(self, i: int) -> bool:
+        self.sampling = i % self.sample_every == 0
+        if self.sampling:
+            self.sampled_steps += 1
+        return self.sampling
+
+    def record(self, phase: str, start_ns: int, end_ns: int) -> None:
+        self.total_ns[phase] += end_ns - start_ns
+        self.calls[phase] += 1
+        if len(self.events) < self.max_trace_events:
+            self.events.append((phase, start_ns, end_ns))
+
+    def finish(self, total_steps: int) -> None:
+        self.sampling = False
+        self.total_steps = total_steps
+
+    # Estimated wall time (in seconds) of each phase over the whole run
+    def estimated_seconds(self) -> dict:
+        scale = self.total_steps / self.sampled_steps if self.sampled_steps else 0.0
+        return {phase: ns * scale / 1e9 for phase, ns in self.total_ns.items()}
+
+    # Breakdown table of the sampled phases
+    # "load" includes the time of its nested "load.program" phase.
+    def report(self) -> str:
+        estimated = self.estimated_seconds()
+        top_level = sum(ns for phase, ns in self.total_ns.items()
+                        if phase != "load.program")
+
+        lines = [
+            f"Profiled {self.sampled_steps} of {self.total_steps} steps (sample_every={self.sample_every})",
+            f"{'phase':<14}{'calls':>10}{'sampled (ms)':>15}{'mean (us)':>12}{'est. total (s)':>16}{'share':>8}",
+        ]
+        for phase in PHASES:
+            calls = self.calls[phase]
+            if calls == 0:
+                continue
+            total_ns = self.total_ns[phase]
+            share = total_ns / top_level * 100 if top_level else 0.0
+            lines.append(
+                f"{phase:<14}{calls:>10}{total_ns / 1e6:>15.3f}{total_ns / calls / 1e3:>12.3f}"
+                f"{estimated[phase]:>16.4f}{share:>7.1f}%")
+        return "\n".join(lines)
+
+    # Writes the sampled phases in Chrome trace event format (also read by Perfetto and speedscope)
+    def write_chrome_trace(self, filepath: str) -> None:
+        origin = self.events[0][1] if self.events else 0
+        trace_events = [
+            {
+                "name": phase,
+                "cat": "simulator",
+                "ph": "X",
+                "ts": (start - origin) / 1e3,
+                "dur": (end - start) / 1e3,
+                "pid": 0,
+                "tid": 0,
+            }
+            for phase, start, end in self.events
+        ]
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace_events,
+                      "displayTimeUnit": "ms"}, f)
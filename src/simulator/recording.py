@@ -0,0 +1,198 @@
+# Recording policies for long runs: which steps simulator.run keeps in its output
+#
+# The physics always runs at full 't_step' resolution; a RecordingPolicy only decides which snapshots are kept:
+#   - one in every 'every' steps (a coarse trace),
+#   - full resolution around state transitions: 'context' steps before and after each change of
+#     Capacitor status, Load mode or PMIC vbat_ok,
+#   - per-window min/mean/max of the main numeric traces (see TRACES), over windows of 'window' steps.
+#
+#   recording = RecordingPolicy(every=100, window=1000, context=20, max_snapshots=50_000)
+#   sim_output = simulator.run(sim_input, recording=recording)  # {t: snapshot}, kept steps only
+#   recording.windows      # [{"start", "end", "steps", "storage_voltage": (min, mean, max), ...}]
+#   recording.transitions  # number of state transitions seen
+#
+# Memory is bounded regardless of the duration:
+#   - Snapshots around transitions use at most half of 'max_snapshots'. Once it is used up, later transitions
+#     are counted in 'dropped_transitions' only.
+#   - When the snapshots go beyond 'max_snapshots', the coarse trace is thinned: 'every' doubles and
+#     the coarse snapshots off the new stride are dropped.
+#   - When the windows go beyond 'max_windows', adjacent windows are merged pairwise and 'window' doubles.
+
+from collections import deque
+
+from src.simulator.simulator import snapshot
+
+DEFAULT_EVERY = 100
+DEFAULT_WINDOW = 1000
+DEFAULT_CONTEXT = 10
+DEFAULT_MAX_SNAPSHOTS = 100_000
+DEFAULT_MAX_WINDOWS = 10_000
+
+# Numeric traces aggregated per window: name -> (component, attribute)
+TRACES = {
+    "supply_power": ("supply", "power_supply"),
+    "storage_voltage": ("storage", "voltage"),
+    "storage_energy": ("storage", "energy_stored"),
+    "load_voltage": ("load", "voltage"),
+    "load_current": ("load", "current"),
+}
+
+
+# Class _Window accumulates the traces over a window of steps
+class _Window:
+    __slots__ = ("start", "end", "steps", "mins", "maxs", "sums")
+
+    def __init__(self, t: float, values: list):
+        self.start = self.end = t
+        self.steps = 1
+        self.mins = list(values)
+        self.maxs = list(values)
+        self.sums = list(values)
+
+    def add(self, t: float, values: list) -> None:
+        self.end = t
+        self.steps += 1
+        mins, maxs, sums = self.mins, self.maxs, self.sums
+        for k, value in enumerate(values):
+            if value < mins[k]:
+                mins[k] = value
+            if value > maxs[k]:
+                maxs[k] = value
+            sums[k] += value
+
+    def merge(self, other: "_Window") -> None:
+        self.end = other.end
+        self.steps += other.steps
+        for k, (low, high, total) in enumerate(zip(other.mins, other.maxs, other.sums)):
+            self.mins[k] = min(self.mins[k], low)
+            self.maxs[k] = max(self.maxs[k], high)
+            self.sums[k] += total
+
+    def record(self) -> dict:
+        record = {"start": self.start, "end": self.end, "steps": self.steps}
+        for k, name in enumerate(TRACES):
+            record[name] = (self.mins[k], self.sums[k] / self.steps, self.maxs[k])
+        return record
+
+
+class RecordingPolicy:
+    def __init__(self, every: int = DEFAULT_EVERY, window: int = DEFAULT_WINDOW, context: int = DEFAULT_CONTEXT,
+                 max_snapshots: int = DEFAULT_MAX_SNAPSHOTS, max_windows: int = DEFAULT_MAX_WINDOWS):
+        if every < 1 or window < 1 or context < 0:
+            raise ValueError(
+                f"Recording needs every >= 1, window >= 1 and context >= 0, got {every}, {window} and {context}.")
+        if max_snapshots < 2 * (2 * context + 1) or max_windows < 2:
+            raise ValueError(
+                "Recording budget is too small: max_snapshots must hold two transitions with their context, "
+                "and max_windows at least 2 windows.")
+        self.initial_every = every
+        self.initial_window = window
+        self.context = context
+        self.max_snapshots = max_snapshots
+        self.max_windows = max_windows
+        self.start()
+
+    # Resets the recording, called at the start of each run
+    # simulator.run passes the Input to every recording (see ColumnarOutput.start), a policy does not need it.
+    def start(self, _sim_input=None) -> None:
+        self.every = self.initial_every
+        self.window = self.initial_window
+        self.transitions = 0
+        self.dropped_transitions = 0
+        self.steps = 0
+        self._coarse = {}  # t -> step index, for thinning
+        self._events = set()
+        self._snapshots = {}
+        self._recent = deque(maxlen=self.context)
+        self._after = 0
+        self._last_state = None
+        self._windows = []
+        self._current = None
+
+    @property
+    def windows(self) -> list:
+        windows = self._windows + ([self._current] if self._current is not None else [])
+        return [window.record() for window in windows]
+
+    # Component state whose changes are transitions: Capacitor status, Load mode and PMIC vbat_ok
+    # Int codes are compared when components have them (see Capacitor.status_code, MCU.mode_code)
+    @staticmethod
+    def _state(sim_input) -> tuple:
+        storage, load, pmic = sim_input.storage, sim_input.load, sim_input.pmic
+        storage_state = storage.status_code if hasattr(storage, "status_code") else storage.status
+        load_state = load.mode_code if hasattr(load, "mode_code") else load.mode
+        return storage_state, load_state, pmic.vbat_ok if pmic is not None else None
+
+    # Records step i (at time t), after all components were refreshed
+    def add(self, i: int, t: float, sim_input) -> None:
+        self.steps += 1
+        state = self._state(sim_input)
+        transition = self._last_state is not None and state != self._last_state
+        self._last_state = state
+
+        keep_event = False
+        if transition:
+            self.transitions += 1
+            if len(self._events) + 2 * self.context + 1 <= self.max_snapshots // 2:
+                for t_recent, data in self._recent:
+                    self._keep_event(t_recent, data)
+                self._after = self.context
+                keep_event = True
+            else:
+                self.dropped_transitions += 1
+        elif self._after > 0:
+            self._after -= 1
+            keep_event = True
+
+        coarse = i % self.every == 0
+        if keep_event or coarse or self.context:
+            data = snapshot(sim_input)
+            if keep_event:
+                self._keep_event(t, data)
+            elif coarse:
+                self._snapshots[t] = data
+                self._coarse[t] = i
+            if self.context:
+                self._recent.append((t, data))
+
+        if len(self._snapshots) > self.max_snapshots:
+            self._thin()
+        self._aggregate(i, t, sim_input)
+
+    def _keep_event(self, t: float, data: dict) -> None:
+        self._coarse.pop(t, None)
+        self._events.add(t)
+        self._snapshots[t] = data
+
+    # Halves the coarse trace until the snapshots fit the budget again
+    def _thin(self) -> None:
+        while len(self._snapshots) > self.max_snapshots and self._coarse:
+            self.every *= 2
+            for t, i in list(self._coarse.items()):
+                if i % self.every != 0:
+                    del self._coarse[t]
+                    del self._snapshots[t]
+
+    def _aggregate(self, i: int, t: float, sim_input) -> None:
+        values = [getattr(getattr(sim_input, component), attribute)
+                  for component, attribute in TRACES.values()]
+        if self._current is not None and i % self.window != 0:
+            self._current.add(t, values)
+            return
+
+        if self._current is not None:
+            self._windows.append(self._current)
+            if len(self._windows) >= self.max_windows:
+                merged = []
+                for k in range(0, len(self._windows) - 1, 2):
+                    self._windows[k].merge(self._windows[k + 1])
+                    merged.append(self._windows[k])
+                if len(self._windows) % 2:
+                    merged.append(self._windows[-1])
+                self._windows = merged
+                self.window *= 2
+        self._current = _Window(t, values)
+
+    # Kept snapshots, in time order: {t: snapshot}
+    def output(self) -> dict:
+        return {t: self._snapshots[t] for t in sorted(self._snapshots)}
@@ -1,84 +1,310 @@
-def run(sim_input):
+import os
+import time
+import src.input.input as inp
+from src.behs.load import MODE_STANDBY
+from src.cache.cache import DEFAULT_CACHE_DIR, DiskCache, content_hash
+
+# Version tag of the simulation model, part of every result cache key
+# NOTE: Bump it whenever a change to the components or the step loop alters simulation results.
+MODEL_VERSION = "5"
+
+# Default size budget for the on-disk result cache (in bytes)
+DEFAULT_RESULT_CACHE_MAX_BYTES = 1024 ** 3
+
+# Default number of steps per chunk yielded by iter_chunks
+DEFAULT_CHUNK_SIZE = 1000
+
+
+# Refreshes all components for time index i
+# For each time t in the simulation, refresh values for:
+#   1. Energy Supply        - Update energy supplied at time t.
+#   2. Load                 - Update energy consumed at time t, based on v_supply at (t-1).
+#   3. PMIC (if applicable) - Update v_out and vbat_ok, based on v_storage at (t-1).
+#                           - Update energy_to_storage and energy_from_storage at time t.
+#   4. Energy Storage       - Update energy stored at time t.
+def step(sim_input, i: int, t_step: float) -> None:
+    sim_input.supply.refresh(t_index=i, t_step=t_step)
+
+    # Mode 1: (Supply -> Storage <- Load)
+    # Storage is directly connected to the Supply and Load
+    if sim_input.pmic is None:
+        sim_input.load.refresh(
+            v_supply=sim_input.storage.voltage, t_step=t_step)
+        sim_input.storage.refresh(
+            e_supply=sim_input.supply.energy_supply,
+            e_load=sim_input.load.energy_consumed,
+            t_step=t_step
+        )
+    # Mode 2: (Supply -> PMIC -> Storage <- Load)
+    # We use a PMIC to manage the energy flow between the Supply, Storage, and Load
+    else:
+        sim_input.load.refresh(
+            v_supply=sim_input.pmic.v_out, t_step=t_step)
+        sim_input.pmic.refresh(
+            e_supply=sim_input.supply.energy_supply,
+            e_load=sim_input.load.energy_consumed,
+            v_storage=sim_input.storage.voltage,
+            t_step=t_step
+        )
+        sim_input.storage.refresh(
+            e_supply=sim_input.pmic.energy_to_storage,
+            e_load=sim_input.pmic.energy_from_storage,
+            t_step=t_step
+        )
+
+
+# The Load is powered while the MCU keeps its state ("standby" or "active"), or while other Loads are on
+# A brown-out is the Load losing power after having been powered.
+def load_is_powered(load) -> bool:
+    mode_code = getattr(load, "mode_code", None)
+    if mode_code is not None:
+        return mode_code >= MODE_STANDBY
+    return load.voltage > 0
+
+
+# Builds the output entry with the state of all components after a step
+# NOTE: Each snapshot is a new dict (and ops tuple), since {t: snapshot} outputs keep them all. Runs that must not
+# allocate per step record into a ColumnarOutput (see columns.py) or run in the compiled kernel (see kernel.py).
+def snapshot(sim_input) -> dict:
+    data = {
+        "supply": {
+            "type": sim_input.supply.type,
+            "power_supply": sim_input.supply.power_supply,
+            "energy_supply": sim_input.supply.energy_supply,
+        },
+        "storage": {
+            "type": sim_input.storage.type,
+            "status": sim_input.storage.status,
+            "voltage": sim_input.storage.voltage,
+            "current": sim_input.storage.current,
+            "energy_stored": sim_input.storage.energy_stored,
+            "power_stored": sim_input.storage.power_stored,
+        },
+        "load": {
+            "type": sim_input.load.type,
+            "mode": sim_input.load.mode,
+            "voltage": sim_input.load.voltage,
+            "current": sim_input.load.current,
+            "energy_consumed": sim_input.load.energy_consumed,
+            "total_energy_consumed": sim_input.load.total_energy_consumed,
+        },
+    }
+
+    # Program ops are kept as elapsed seconds per instruction code (see program.INSTRUCTIONS), formatted on export
+    if sim_input.load.program is not None:
+        data["load"]["program_executed_ops"] = tuple(
+            sim_input.load.program.executed_ops)
+
+    if sim_input.pmic is not None:
+        data["pmic"] = {
+            "type": sim_input.pmic.type,
+            "status": sim_input.pmic.status,
+            "vout": sim_input.pmic.v_out,
+            "vbat_ok": sim_input.pmic.vbat_ok,
+            "energy_to_storage": sim_input.pmic.energy_to_storage,
+            "energy_from_storage": sim_input.pmic.energy_from_storage,
+        }
+
+    return data
+
+
+# Program throughput of a run of 'steps' steps, to compare execution policies (see program/policy.py) on the same trace:
+#   {"cycles", "cycles_per_hour", "deferred_steps", "checkpoints", "progress_seconds", "reexecuted_seconds"},
+#   or None if the Load runs no Program
+# Cycles are completed runs through the whole Program. 'steps' defaults to the whole simulation.
+# Progress is the work (in seconds of operations) kept by a CHECKPOINT or a completed run, and re-executed work
+# the work lost to power losses (see Program.reset).
+def program_throughput(sim_input, steps: int = None):
+    program = sim_input.load.program
+    if program is None:
+        return None
+    if steps is None:
+        steps = len(sim_input.t_vector)
+    hours = steps * sim_input.t_step / 3600
+    return {
+        "cycles": program.cycles,
+        "cycles_per_hour": program.cycles / hours if hours > 0 else 0.0,
+        "deferred_steps": program.deferred_steps,
+        "checkpoints": program.checkpoints,
+        "progress_seconds": program.progress_seconds,
+        "reexecuted_seconds": program.reexecuted_seconds,
+    }
+
+
+# Runs the simulation, returning the state of all components for each time t: {t: snapshot}
+#   - profiler: optional Profiler (see profiler.py) recording wall time per component phase.
+#               When it is None, the plain loop runs, with no instrumentation overhead at all.
+#   - stop:     optional StopConditions (see stop.py). The run ends after the first step at which
+#               a condition holds, and 'stop' records why and when. The output covers the simulated steps only.
+#   - auditor:  optional EnergyAuditor (see audit.py) checking the energy balance of every step.
+#   - recording: optional RecordingPolicy (see recording.py). The output then only has the steps it keeps,
+#               and the policy holds the per-window aggregates. A ColumnarOutput (see columns.py) records every step
+#               in columns instead, and is returned as the output. Cannot be combined with 'profiler'.
+def run(sim_input, profiler=None, stop=None, auditor=None, recording=None):
     if sim_input == {}:
         raise ValueError("Simulation input cannot be empty!")
+    if profiler is not None and recording is not None:
+        raise ValueError("Simulation cannot be profiled with a recording policy.")
+
+    if stop is not None:
+        stop.start()
+    if auditor is not None:
+        auditor.start(sim_input)
+    if recording is not None:
+        recording.start(sim_input)
+
+    if profiler is not None:
+        return _run_profiled(sim_input, profiler, stop, auditor)
 
     # Extract simulation parameters
     t_step = sim_input.t_step
     t_vector = sim_input.t_vector
 
-    # For each time t in the simulation, refresh values for:
-    #   1. Energy Supply        - Update energy supplied at time t.
-    #   2. Load                 - Update energy consumed at time t, based on v_supply at (t-1).
-    #   3. PMIC (if applicable) - Update v_out and vbat_ok, based on v_storage at (t-1).
-    #                           - Update energy_to_storage and energy_from_storage at time t.
-    #   4. Energy Storage       - Update energy stored at time t.
     sim_output = {}
+    if stop is None and auditor is None and recording is None:
+        for i, t in enumerate(t_vector):
+            step(sim_input, i, t_step)
+            sim_output[t] = snapshot(sim_input)
+        return sim_output
+
     for i, t in enumerate(t_vector):
-        sim_input.supply.refresh(t_index=i, t_step=t_step)
-
-        # Mode 1: (Supply -> Storage <- Load)
-        # Storage is directly connected to the Supply and Load
-        if sim_input.pmic is None:
-            sim_input.load.refresh(
-                v_supply=sim_input.storage.voltage, t_step=t_step)
-            sim_input.storage.refresh(
-                e_supply=sim_input.supply.energy_supply,
-                e_load=sim_input.load.energy_consumed,
-                t_step=t_step
-            )
-        # Mode 2: (Supply -> PMIC -> Storage <- Load)
-        # We use a PMIC to manage the energy flow between the Supply, Storage, and Load
+        step(sim_input, i, t_step)
+        if recording is None:
+            sim_output[t] = snapshot(sim_input)
         else:
-            sim_input.load.refresh(
-                v_supply=sim_input.pmic.v_out, t_step=t_step)
-            sim_input.pmic.refresh(
-                e_supply=sim_input.supply.energy_supply,
-                e_load=sim_input.load.energy_consumed,
-                v_storage=sim_input.storage.voltage,
-                t_step=t_step
-            )
-            sim_input.storage.refresh(
-                e_supply=sim_input.pmic.energy_to_storage,
-                e_load=sim_input.pmic.energy_from_storage,
-                t_step=t_step
-            )
-
-        sim_output[t] = {
-            "supply": {
-                "type": sim_input.supply.type,
-                "power_supply": sim_input.supply.power_supply,
-                "energy_supply": sim_input.supply.energy_supply,
-            },
-            "storage": {
-                "type": sim_input.storage.type,
-                "status": sim_input.storage.status,
-                "voltage": sim_input.storage.voltage,
-                "current": sim_input.storage.current,
-                "energy_stored": sim_input.storage.energy_stored,
-                "power_stored": sim_input.storage.power_stored,
-            },
-            "load": {
-                "type": sim_input.load.type,
-                "mode": sim_input.load.mode,
-                "voltage": sim_input.load.voltage,
-                "current": sim_input.load.current,
-                "energy_consumed": sim_input.load.energy_consumed,
-                "total_energy_consumed": sim_input.load.total_energy_consumed,
-            },
-        }
+            recording.add(i, t, sim_input)
+        if auditor is not None:
+            auditor.check(sim_input, i, t)
+        if stop is not None and stop.check(sim_input, i, t):
+            break
+    else:
+        if stop is not None:
+            stop.finish(t_vector)
+    return sim_output if recording is None else recording.output()
+
+
+# Same loop as run, yielding the output in chunks of up to 'chunk_size' steps, as lists of (t, snapshot)
+# Chunks are not kept once yielded, so memory stays bounded regardless of the duration (see output/pipeline.py).
+def iter_chunks(sim_input, chunk_size: int = DEFAULT_CHUNK_SIZE, stop=None, auditor=None):
+    if sim_input == {}:
+        raise ValueError("Simulation input cannot be empty!")
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be >= 1, got {chunk_size}.")
+
+    if stop is not None:
+        stop.start()
+    if auditor is not None:
+        auditor.start(sim_input)
+
+    t_step = sim_input.t_step
+    t_vector = sim_input.t_vector
+
+    chunk = []
+    for i, t in enumerate(t_vector):
+        step(sim_input, i, t_step)
+        chunk.append((t, snapshot(sim_input)))
+        if auditor is not None:
+            auditor.check(sim_input, i, t)
+        if stop is not None and stop.check(sim_input, i, t):
+            break
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    else:
+        if stop is not None:
+            stop.finish(t_vector)
+    if chunk:
+        yield chunk
+
+
+# Same loop as run, timing each component phase of every sampled step with a low-overhead clock
+# Phases are the component refreshes (see step) plus "output", the construction of the step snapshot.
+# The Program inside the Load is timed as its own nested phase, "load.program".
+def _run_profiled(sim_input, profiler, stop=None, auditor=None):
+    clock = time.perf_counter_ns
+    t_step = sim_input.t_step
+    supply, load, pmic, storage = sim_input.supply, sim_input.load, sim_input.pmic, sim_input.storage
+
+    program = load.program
+    if program is not None:
+        get_cost = program.get_cost_for_t_step
+
+        def timed_get_cost(step_t):
+            start = clock()
+            cost = get_cost(step_t)
+            if profiler.sampling:
+                profiler.record("load.program", start, clock())
+            return cost
+        program.get_cost_for_t_step = timed_get_cost
+
+    sim_output = {}
+    try:
+        for i, t in enumerate(sim_input.t_vector):
+            if not profiler.sample(i):
+                step(sim_input, i, t_step)
+                sim_output[t] = snapshot(sim_input)
+                if auditor is not None:
+                    auditor.check(sim_input, i, t)
+                if stop is not None and stop.check(sim_input, i, t):
+                    break
+                continue
+
+            t0 = clock()
+            supply.refresh(t_index=i, t_step=t_step)
+            t1 = clock()
+            if pmic is None:
+                load.refresh(v_supply=storage.voltage, t_step=t_step)
+                t2 = t3 = clock()
+                storage.refresh(e_supply=supply.energy_supply,
+                                e_load=load.energy_consumed, t_step=t_step)
+            else:
+                load.refresh(v_supply=pmic.v_out, t_step=t_step)
+                t2 = clock()
+                pmic.refresh(e_supply=supply.energy_supply, e_load=load.energy_consumed,
+                             v_storage=storage.voltage, t_step=t_step)
+                t3 = clock()
+                storage.refresh(e_supply=pmic.energy_to_storage,
+                                e_load=pmic.energy_from_storage, t_step=t_step)
+            t4 = clock()
+            sim_output[t] = snapshot(sim_input)
+            t5 = clock()
+
+            profiler.record("supply", t0, t1)
+            profiler.record("load", t1, t2)
+            if pmic is not None:
+                profiler.record("pmic", t2, t3)
+            profiler.record("storage", t3, t4)
+            profiler.record("output", t4, t5)
+            if auditor is not None:
+                auditor.check(sim_input, i, t)
+            if stop is not None and stop.check(sim_input, i, t):
+                break
+        else:
+            if stop is not None:
+                stop.finish(sim_input.t_vector)
+    finally:
+        if program is not None:
+            del program.get_cost_for_t_step
+        profiler.finish(len(sim_output))
+
+    return sim_output
 
-        if sim_input.load.program is not None:
-            sim_output[t]["load"]["program_executed_ops"] = dict(
-                sim_input.load.program.executed_ops_last_step)
 
-        if sim_input.pmic is not None:
-            sim_output[t]["pmic"] = {
-                "type": sim_input.pmic.type,
-                "status": sim_input.pmic.status,
-                "vout": sim_input.pmic.v_out,
-                "vbat_ok": sim_input.pmic.vbat_ok,
-                "energy_to_storage": sim_input.pmic.energy_to_storage,
-                "energy_from_storage": sim_input.pmic.energy_from_storage,
-            }
+# Runs the simulation for a config (or CompiledScenario), memoizing results on disk
+# The cache key covers the normalised config, the program file contents, the supply dataset fingerprint
+# and MODEL_VERSION, so a hit returns exactly the output a fresh run would produce.
+# Least recently used results are evicted once the cache grows beyond max_bytes.
+# A config is only compiled on a miss, so a hit skips loading and resampling the supply profile.
+def run_cached(config, cache_dir: str = DEFAULT_CACHE_DIR,
+               max_bytes: int = DEFAULT_RESULT_CACHE_MAX_BYTES):
+    compiled = isinstance(config, inp.CompiledScenario)
+    scenario_key = config.key if compiled else inp.scenario_key(config)
+    key = content_hash({"scenario": scenario_key, "model_version": MODEL_VERSION})
 
+    cache = DiskCache(os.path.join(cache_dir, "results"), max_bytes=max_bytes)
+    sim_output = cache.get(key)
+    if sim_output is None:
+        scenario = config if compiled else inp.compile_config(config)
+        sim_output = run(inp.Input(scenario))
+        cache.put(key, sim_output)
     return sim_output
@@ -0,0 +1,147 @@
+# Early-termination predicates for simulator.run
+#
+# A run given a StopConditions stops after the first step at which any of its conditions holds,
+# and the StopConditions records why and when it stopped:
+#
+#   stop = StopConditions([LoadOffFor(600), EnergyBudget(5.0)])
+#   sim_output = simulator.run(sim_input, stop=stop)
+#   stop.reason, stop.stopped_at, stop.steps  # e.g. "load off for 600s", 1234.5, 2470
+#
+# Each condition is evaluated every 'every' steps (default 1), so expensive predicates can run less often.
+# Conditions may keep state across steps (e.g. how long the Load has been off), reset at the start of each run.
+
+from abc import ABC, abstractmethod
+
+from src.simulator.simulator import load_is_powered
+
+
+# Class StopCondition is the base of all stop conditions
+class StopCondition(ABC):
+    reason = "stop condition"
+
+    def __init__(self, every: int = 1):
+        if every < 1:
+            raise ValueError(
+                f"Stop condition must be evaluated every >= 1 steps, got {every}.")
+        self.every = every
+
+    # Called at the start of each run
+    def reset(self) -> None:
+        pass
+
+    # Returns True if the run should stop after the current step (at time t)
+    @abstractmethod
+    def check(self, sim_input, t: float) -> bool:
+        pass
+
+
+# Stops when the Capacitor is full and the supply is constant, so the remaining run is uninformative
+class StorageFull(StopCondition):
+    reason = "storage full with constant supply"
+
+    def check(self, sim_input, t):
+        storage = sim_input.storage
+        return sim_input.supply.profile is None and storage.energy_stored >= storage.E_MAX
+
+
+# Stops when the Load has been off for more than 'seconds'
+# With every > 1, the off time is measured between evaluations, so it may be overestimated by (every - 1) steps.
+class LoadOffFor(StopCondition):
+    def __init__(self, seconds: float, every: int = 1):
+        super().__init__(every)
+        self.seconds = seconds
+        self.reason = f"load off for {seconds}s"
+        self.off_since = None
+
+    def reset(self):
+        self.off_since = None
+
+    def check(self, sim_input, t):
+        # The Load is off when it gets no voltage, i.e. below V_MIN (MCU) or v_on (Resistor)
+        if sim_input.load.voltage > 0:
+            self.off_since = None
+            return False
+        if self.off_since is None:
+            self.off_since = t
+        return t - self.off_since > self.seconds
+
+
+# Stops when the Load's total energy consumed exceeds 'joules'
+class EnergyBudget(StopCondition):
+    def __init__(self, joules: float, every: int = 1):
+        super().__init__(every)
+        self.joules = joules
+        self.reason = f"energy budget of {joules}J exceeded"
+
+    def check(self, sim_input, t):
+        return sim_input.load.total_energy_consumed > self.joules
+
+
+# Stops at the first brown-out: the Load losing power after having been powered
+# See simulator.load_is_powered.
+class Brownout(StopCondition):
+    reason = "brown-out"
+
+    def __init__(self, every: int = 1):
+        super().__init__(every)
+        self.was_powered = False
+
+    def reset(self):
+        self.was_powered = False
+
+    def check(self, sim_input, t):
+        powered = load_is_powered(sim_input.load)
+        if self.was_powered and not powered:
+            return True
+        self.was_powered = self.was_powered or powered
+        return False
+
+
+# Wraps any callable (sim_input, t) -> bool as a stop condition
+class Predicate(StopCondition):
+    def __init__(self, fn, reason: str = "predicate", every: int = 1):
+        super().__init__(every)
+        self.fn = fn
+        self.reason = reason
+
+    def check(self, sim_input, t):
+        return self.fn(sim_input, t)
+
+
+# Class StopConditions groups the conditions of a run, and records the outcome:
+#   - reason:     reason of the condition that stopped the run (None if it ran until 'duration')
+#   - stopped_at: time of the last simulated step
+#   - steps:      number of simulated steps
+class StopConditions:
+    def __init__(self, conditions: list):
+        self.conditions = list(conditions)
+        self.reason = None
+        self.stopped_at = None
+        self.steps = 0
+
+    @property
+    def stopped(self) -> bool:
+        return self.reason is not None
+
+    def start(self) -> None:
+        self.reason = None
+        self.stopped_at = None
+        self.steps = 0
+        for condition in self.conditions:
+            condition.reset()
+
+    # Evaluates the conditions due at step i, returning True if the run must stop
+    def check(self, sim_input, i: int, t: float) -> bool:
+        for condition in self.conditions:
+            if i % condition.every == 0 and condition.check(sim_input, t):
+                self.reason = condition.reason
+                self.stopped_at = t
+                self.steps = i + 1
+                return True
+        return False
+
+    # Records a run that was not stopped early
+    def finish(self, t_vector) -> None:
+        if self.reason is None:
+            self.steps = len(t_vector)
+            self.stopped_at = t_vector[-1] if len(t_vector) else None
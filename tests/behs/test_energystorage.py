@@ -1,6 +1,6 @@
 import unittest
 import math
-from src.behs.energystorage import Capacitor
+from src.behs.energystorage import Capacitor, STATUS_FULL, STATUS_EMPTY
 
 
 class TestEnergyStorage(unittest.TestCase):
@@ -230,5 +230,57 @@ class TestCapacitor(unittest.TestCase):
             self.storage_capacitor.energy_stored, expected_energy, places=5)
 
 
+class TestCapacitorCompactState(unittest.TestCase):
+    def setUp(self):
+        self.capacitor = Capacitor(
+            {"type": "capacitor", "capacitance": 0.047, "v_oper_max": 5.5})
+
+    def test_state_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.capacitor, "__dict__"))
+
+    def test_status_code_maps_to_name(self):
+        self.assertEqual(self.capacitor.status, "idle")
+        self.capacitor.refresh(e_supply=1.0, e_load=0.0, t_step=0.5)
+        self.assertEqual(self.capacitor.status_code, STATUS_FULL)
+        self.assertEqual(self.capacitor.status, "full")
+        self.capacitor.refresh(e_supply=0.0, e_load=2.0, t_step=0.5)
+        self.assertEqual(self.capacitor.status_code, STATUS_EMPTY)
+        self.assertEqual(self.capacitor.status, "empty")
+
+    def test_refresh_matches_calculate_methods(self):
+        self.capacitor.refresh(e_supply=0.2, e_load=0.05, t_step=0.5)
+        self.assertAlmostEqual(self.capacitor.energy_stored, 0.15)
+        self.assertEqual(self.capacitor.voltage,
+                         self.capacitor.calculate_voltage())
+        self.assertEqual(self.capacitor.power_stored,
+                         self.capacitor.calculate_power_stored(0.5))
+        self.assertEqual(self.capacitor.current,
+                         self.capacitor.calculate_current())
+        self.assertEqual(self.capacitor.status, "charging")
+
+
 if __name__ == '__main__':
     unittest.main()
+
+
+class TestCapacitorClipping(unittest.TestCase):
+    def setUp(self):
+        self.capacitor = Capacitor(
+            {"type": "capacitor", "capacitance": 0.047, "v_oper_max": 5.5})
+
+    def test_surplus_above_e_max_is_clipped(self):
+        self.capacitor.refresh(e_supply=1.0, e_load=0.0, t_step=0.5)
+        self.assertAlmostEqual(self.capacitor.energy_clipped,
+                               1.0 - self.capacitor.E_MAX)
+        self.assertEqual(self.capacitor.energy_shortfall, 0.0)
+
+    def test_deficit_below_zero_is_shortfall(self):
+        self.capacitor.refresh(e_supply=0.1, e_load=0.0, t_step=0.5)
+        self.capacitor.refresh(e_supply=0.0, e_load=0.3, t_step=0.5)
+        self.assertAlmostEqual(self.capacitor.energy_shortfall, 0.2)
+        self.assertEqual(self.capacitor.energy_clipped, 0.0)
+
+    def test_no_clipping_within_range(self):
+        self.capacitor.refresh(e_supply=0.2, e_load=0.05, t_step=0.5)
+        self.assertEqual(self.capacitor.energy_clipped, 0.0)
+        self.assertEqual(self.capacitor.energy_shortfall, 0.0)
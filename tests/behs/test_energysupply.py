@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
 from src.behs.energysupply import ConstantSupply, HarvestingSupply
+from src.input.input import TimeVector
 
 
 class TestEnergySupply(unittest.TestCase):
@@ -139,5 +140,25 @@ class TestHarvestingSupply(unittest.TestCase):
         self.assertEqual(self.supply_harvesting.profile, original_profile)
 
 
+class TestConstantSupplyScalarProfile(unittest.TestCase):
+    def setUp(self):
+        self.t_vector = TimeVector(0, 0.25, 5)
+        self.supply = ConstantSupply(
+            {"type": "constant", "p_base": 0.005}, self.t_vector, 0.25)
+
+    def test_profile_stored_as_scalar(self):
+        self.assertIsNone(self.supply.profile)
+        self.assertEqual(self.supply.P_BASE, 0.005)
+
+    def test_refresh_uses_scalar_profile(self):
+        self.supply.refresh(t_index=3, t_step=0.25)
+        self.assertEqual(self.supply.power_supply, 0.005)
+        self.assertEqual(self.supply.energy_supply, 0.005 * 0.25)
+
+    def test_refresh_out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.supply.refresh(t_index=len(self.t_vector), t_step=0.25)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from src.behs.load import Resistor, MCU
+from src.behs.load import Resistor, MCU, MODE_ACTIVE, MODE_STANDBY, MODE_OFF
 
 
 class TestLoad(unittest.TestCase):
@@ -166,5 +166,49 @@ class TestLoadMCU(unittest.TestCase):
                          MCU.ENERGY_CONSUMPTION * 2)
 
 
+_MCU_CONFIG = {
+    "type": "mcu",
+    "v_min": 1.8,
+    "v_max": 3.6,
+    "modes": {
+        "shutdown": {"cost": 0.0000003, "v_oper": 2.0},
+        "standby": {"cost": 0.000001, "v_oper": 2.2},
+        "active": {"cost": 0.00192, "v_oper": 3.0},
+    },
+}
+
+
+class TestMCUCompactState(unittest.TestCase):
+    def setUp(self):
+        self.mcu = MCU(_MCU_CONFIG)
+
+    def test_state_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.mcu, "__dict__"))
+        self.assertFalse(hasattr(Resistor(
+            {"type": "resistor", "resistance": 1600, "p_rating": 0.25, "v_max": 250}), "__dict__"))
+
+    def test_mode_costs_flattened(self):
+        self.assertEqual(self.mcu.ACTIVE_COST, 0.00192)
+        self.assertEqual(self.mcu.STANDBY_COST, 0.000001)
+        self.assertEqual(self.mcu.SHUTDOWN_COST, 0.0000003)
+
+    def test_mode_code_maps_to_name(self):
+        self.assertEqual(self.mcu.mode_code, MODE_OFF)
+        self.assertEqual(self.mcu.mode, "off")
+
+        self.mcu.refresh(v_supply=3.3, t_step=0.5)
+        self.assertEqual(self.mcu.mode_code, MODE_ACTIVE)
+        self.assertEqual(self.mcu.mode, "active")
+        self.assertEqual(self.mcu.current, 0.00192)
+
+        self.mcu.refresh(v_supply=2.5, t_step=0.5)
+        self.assertEqual(self.mcu.mode_code, MODE_STANDBY)
+        self.assertEqual(self.mcu.current, 0.000001)
+
+        for v_supply, mode in [(1.0, "off"), (1.9, "idle"), (2.1, "shutdown")]:
+            self.mcu.refresh(v_supply=v_supply, t_step=0.5)
+            self.assertEqual(self.mcu.mode, mode)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from benchmarks import bench
+
+
+def _results(**ns_per_step):
+    return {"results": {key: {"seconds": ns / 1e9, "ns_per_step": ns} for key, ns in ns_per_step.items()}}
+
+
+class TestBenchCompare(unittest.TestCase):
+    def test_no_regression_within_threshold(self):
+        baseline = _results(case_a=100.0, case_b=200.0)
+        current = _results(case_a=105.0, case_b=150.0)
+        self.assertEqual(bench.compare(baseline, current, threshold=0.10), [])
+
+    def test_regression_beyond_threshold(self):
+        baseline = _results(case_a=100.0)
+        current = _results(case_a=150.0)
+        regressions = bench.compare(baseline, current, threshold=0.10)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0][0], "case_a")
+        self.assertAlmostEqual(regressions[0][3], 1.5)
+
+    def test_new_cases_are_ignored(self):
+        self.assertEqual(bench.compare(
+            _results(), _results(case_a=100.0)), [])
+
+
+class TestBenchRun(unittest.TestCase):
+    def test_run_selected_case(self):
+        results = bench.run(sizes=[100], repeat=1,
+                            select="simulator.run[config-simple.json]")
+        entry = results["results"]["simulator.run[config-simple.json]@100"]
+        self.assertEqual(entry["size"], 100)
+        self.assertGreater(entry["seconds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from src.cache.cache import DiskCache, LRUDict, content_hash, file_fingerprint
+
+
+class TestContentHash(unittest.TestCase):
+    def test_key_order_does_not_change_hash(self):
+        self.assertEqual(content_hash({"a": 1, "b": 2}),
+                         content_hash({"b": 2, "a": 1}))
+
+    def test_chunks_change_hash(self):
+        self.assertNotEqual(content_hash({"a": 1}),
+                            content_hash({"a": 1}, b"data"))
+
+    def test_file_fingerprint_follows_content(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, "program.txt")
+            with open(filepath, "w") as f:
+                f.write("PROC 0.001 1\n")
+            first = file_fingerprint(filepath)
+
+            with open(filepath, "w") as f:
+                f.write("PROC 0.002 1\n")
+            os.utime(filepath, ns=(0, 0))
+            self.assertNotEqual(first, file_fingerprint(filepath))
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self._tmp_dir.name)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_put_and_get(self):
+        self.cache.put("key", {"value": [1, 2, 3]})
+        self.assertIn("key", self.cache)
+        self.assertEqual(self.cache.get("key"), {"value": [1, 2, 3]})
+
+    def test_get_missing_returns_default(self):
+        self.assertIsNone(self.cache.get("missing"))
+        self.assertEqual(self.cache.get("missing", 0), 0)
+
+    def test_delete_and_clear(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.delete("a")
+        self.assertNotIn("a", self.cache)
+        self.cache.clear()
+        self.assertNotIn("b", self.cache)
+
+    def test_corrupted_entry_is_a_miss(self):
+        self.cache.put("key", [1, 2, 3])
+        with open(os.path.join(self._tmp_dir.name, "key.pkl"), "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\x00")
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_lru_eviction(self):
+        cache = DiskCache(self._tmp_dir.name, max_bytes=2500)
+        payload = b"x" * 1000
+        cache.put("a", payload)
+        cache.put("b", payload)
+        os.utime(os.path.join(self._tmp_dir.name, "a.pkl"), ns=(1, 1))
+        os.utime(os.path.join(self._tmp_dir.name, "b.pkl"), ns=(2, 2))
+
+        # Reading "a" makes "b" the least recently used entry
+        cache.get("a")
+        cache.put("c", payload)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestLRUDict(unittest.TestCase):
+    def test_least_recently_used_entry_is_dropped(self):
+        memo = LRUDict(max_entries=2)
+        memo["a"] = 1
+        memo["b"] = 2
+
+        # Reading "a" makes "b" the least recently used entry
+        self.assertEqual(memo["a"], 1)
+        memo["c"] = 3
+        self.assertEqual(list(memo), ["a", "c"])
+
+    def test_unbounded_by_default(self):
+        memo = LRUDict()
+        for i in range(100):
+            memo[i] = i
+        self.assertEqual(len(memo), 100)
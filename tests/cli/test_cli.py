@@ -0,0 +1,87 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import src.cli.cli as cli
+
+_SIMPLE_CONFIG_PATH = "src/input/files/config-simple.json"
+
+
+class TestExpandConfigs(unittest.TestCase):
+    def test_globs_are_expanded_in_order_without_duplicates(self):
+        paths = cli.expand_configs(["src/input/files/config-s*.json", _SIMPLE_CONFIG_PATH])
+        self.assertEqual(paths, [_SIMPLE_CONFIG_PATH])
+
+    def test_unmatched_glob(self):
+        with self.assertRaises(ValueError):
+            cli.expand_configs(["src/input/files/*.missing"])
+
+    def test_output_dirs_are_unique(self):
+        self.assertEqual(cli.output_dirs(["a/config.json", "b/config.json"], "out"),
+                         [os.path.join("out", "config"), os.path.join("out", "config-2")])
+
+    def test_excel_requires_csv(self):
+        with self.assertRaises(ValueError):
+            cli.parse_sinks("log,excel")
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _main(self, argv):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            code = cli.main(argv)
+        return code, stdout.getvalue()
+
+    def test_report_on_stdout(self):
+        code, stdout = self._main([_SIMPLE_CONFIG_PATH, "-o", self.dir, "--report", "-"])
+        report = json.loads(stdout)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(report["failed"], 0)
+        record = report["records"][0]
+        self.assertEqual(record["status"], "ok")
+        self.assertEqual(record["summary"]["steps"], 9601)
+        for filename in ["output.log", "output.csv", "output-summary.json"]:
+            self.assertTrue(os.path.exists(os.path.join(record["output_dir"], filename)))
+
+    def test_failed_config_sets_exit_code(self):
+        report_path = os.path.join(self.dir, "report.json")
+        code, _ = self._main([_SIMPLE_CONFIG_PATH, "missing.json", "-o", self.dir,
+                              "--jobs", "2", "--sinks", "summary", "--profile", "--report", report_path])
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+
+        self.assertEqual(code, 1)
+        self.assertEqual([record["status"] for record in report["records"]], ["ok", "error"])
+        self.assertIn("output", report["records"][0]["profile"])
+        self.assertIn("FileNotFoundError", report["records"][1]["error"])
+
+    def test_setup_profile_generates_each_harvesting_profile_once(self):
+        harvesting = "src/input/files/config-complete.json"
+        with mock.patch("src.eh.eh.teg_dataset_to_csv") as to_csv:
+            generated = cli.set_up_profiles([harvesting, _SIMPLE_CONFIG_PATH, harvesting])
+
+        profile_filepath = cli.inp.load_config_from_file(harvesting)["supply"]["profile_filepath"]
+        to_csv.assert_called_once_with(profile_filepath)
+        self.assertEqual(generated, [profile_filepath])
+
+    def test_headless_run_does_not_import_gui_or_plotting(self):
+        code = ("import sys, src.cli.cli as cli; "
+                f"cli.main(['{_SIMPLE_CONFIG_PATH}', '-o', sys.argv[1]]); "
+                "print(sorted(m for m in ('tkinter', 'matplotlib', 'pandas') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code, self.dir], capture_output=True, text=True,
+                                check=True, env=dict(os.environ, PYTHONPATH="."))
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "[]")
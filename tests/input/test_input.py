@@ -1,5 +1,9 @@
 import unittest
-from src.input.input import Input
+import copy
+import tempfile
+from src.input.input import Input, TimeVector, CompiledScenario, _generate_t_vector, compile_config, simulation_t_vector, load_config_from_file, load_config_from_ui, \
+    override_scenario, validate_config, ConfigWarning
+from src.program.program import DEFAULT_PROCESSING_CLOCK
 from src.behs.energysupply import ConstantSupply, HarvestingSupply
 from src.behs.energystorage import Capacitor
 from src.behs.load import Resistor, MCU
@@ -104,3 +108,199 @@ class TestInputInvalidConfigs(unittest.TestCase):
         config = _INVALID_CONFIGS["missing_load"]
         with self.assertRaises(ValueError):
             Input(config, _T_VECTOR)
+
+
+class TestTimeVector(unittest.TestCase):
+    def test_generate_t_vector_with_float_interval(self):
+        t_vector = _generate_t_vector(start=0, end=1, interval=0.25)
+        self.assertEqual(len(t_vector), 5)
+        self.assertEqual(list(t_vector), [0, 0.25, 0.5, 0.75, 1.0])
+
+    def test_generate_t_vector_keeps_last_step(self):
+        # 0.3 / 0.1 evaluates to 2.9999999999999996 in floating point
+        t_vector = _generate_t_vector(start=0, end=0.3, interval=0.1)
+        self.assertEqual(len(t_vector), 4)
+
+    def test_simulation_t_vector(self):
+        t_vector = simulation_t_vector({"step": 0.25, "duration": 1})
+        self.assertEqual(list(t_vector), [0, 0.25, 0.5, 0.75, 1.0])
+
+    def test_index_to_time_without_drift(self):
+        t_vector = _generate_t_vector(start=0, end=604800, interval=0.01)
+        self.assertEqual(len(t_vector), 60480001)
+        self.assertEqual(t_vector[-1], 60480000 * 0.01)
+        self.assertEqual(t_vector[123456], 123456 * 0.01)
+
+    def test_index_out_of_range(self):
+        t_vector = TimeVector(0, 0.25, 5)
+        with self.assertRaises(IndexError):
+            _ = t_vector[5]
+        self.assertEqual(t_vector[-1], 1.0)
+
+
+_SIMPLE_CONFIG_PATH = "src/input/files/config-simple.json"
+_MIXED_CONFIG_PATH = "src/input/files/config-mixed.json"
+
+
+class TestCompileConfig(unittest.TestCase):
+    def setUp(self):
+        self.config = load_config_from_file(_SIMPLE_CONFIG_PATH)
+
+    def test_compile_normalises_optional_sections(self):
+        scenario = compile_config(self.config)
+        self.assertIsInstance(scenario, CompiledScenario)
+        self.assertIsNone(scenario.config["pmic"])
+        self.assertIsNone(scenario.config["program"])
+
+    def test_missing_program_clock_is_a_warning(self):
+        config = load_config_from_file(_MIXED_CONFIG_PATH)
+        config["program"].pop("processing_clock", None)
+        with self.assertWarns(ConfigWarning):
+            normalised = validate_config(config)
+        self.assertEqual(normalised["program"]["processing_clock"], DEFAULT_PROCESSING_CLOCK)
+
+    def test_compile_does_not_mutate_config(self):
+        original = copy.deepcopy(self.config)
+        compile_config(self.config)
+        self.assertEqual(self.config, original)
+
+    def test_compiled_scenario_is_immutable(self):
+        scenario = compile_config(self.config)
+        scenario.config["storage"]["capacitance"] = 1.0
+        self.assertEqual(scenario.config["storage"]["capacitance"], 0.047)
+        with self.assertRaises(AttributeError):
+            scenario.key = "other"
+
+    def test_same_content_same_key(self):
+        reordered = dict(reversed(list(self.config.items())))
+        self.assertEqual(compile_config(self.config).key,
+                         compile_config(reordered).key)
+
+        changed = copy.deepcopy(self.config)
+        changed["storage"]["capacitance"] = 0.1
+        self.assertNotEqual(compile_config(self.config).key,
+                            compile_config(changed).key)
+
+    def test_missing_field_names_path(self):
+        del self.config["storage"]["capacitance"]
+        with self.assertRaisesRegex(ValueError, "storage.capacitance"):
+            compile_config(self.config)
+
+    def test_invalid_field_type(self):
+        self.config["load"]["resistance"] = "1600"
+        with self.assertRaisesRegex(ValueError, "load.resistance"):
+            compile_config(self.config)
+
+    def test_pmic_efficiency_defaults_without_consider_efficiency(self):
+        config = load_config_from_file("src/input/files/config-complete-pmic.json")
+        config["supply"] = {"type": "constant", "p_base": 0.005}
+        config["pmic"] = {key: value for key, value in config["pmic"].items()
+                          if not key.endswith("efficiency")}
+        with self.assertRaisesRegex(ValueError, "pmic.mppt_efficiency"):
+            compile_config(config)
+
+        config["pmic"]["consider_efficiency"] = False
+        scenario = compile_config(config)
+        self.assertEqual(scenario.config["pmic"]["buck_efficiency"], 1.0)
+
+    def test_program_source_is_compiled(self):
+        scenario = compile_config(load_config_from_file(_MIXED_CONFIG_PATH))
+        with open("src/program/files/program01.txt", "r") as f:
+            self.assertEqual(scenario.program_source, f.read())
+
+    def test_compiled_scenario_cached_on_disk(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = compile_config(self.config, cache_dir=cache_dir)
+            second = compile_config(self.config, cache_dir=cache_dir)
+            self.assertEqual(first, second)
+            self.assertIsNot(first, second)
+
+
+class TestInputFromCompiledScenario(unittest.TestCase):
+    def test_missing_pmic_is_none(self):
+        sim_input = Input(load_config_from_file(_SIMPLE_CONFIG_PATH))
+        self.assertIsNone(sim_input.pmic)
+        self.assertIsInstance(sim_input.load, Resistor)
+
+    def test_input_from_compiled_scenario(self):
+        scenario = compile_config(load_config_from_file(_MIXED_CONFIG_PATH))
+        first = Input(scenario)
+        second = Input(scenario)
+        self.assertIsInstance(first.load, MCU)
+        self.assertIsNot(first.load, second.load)
+        self.assertEqual(len(first.load.program.operations), 6)
+
+    def test_shared_memo_reuses_scenarios_and_sources(self):
+        shared = {}
+        config = load_config_from_file(_MIXED_CONFIG_PATH)
+        other = copy.deepcopy(config)
+        other["storage"]["capacitance"] = 0.1
+
+        first = compile_config(config, shared=shared)
+        self.assertIs(compile_config(copy.deepcopy(config), shared=shared), first)
+        self.assertIs(compile_config(
+            other, shared=shared).program_source, first.program_source)
+
+
+class TestOverrideScenario(unittest.TestCase):
+    def test_override_reuses_program_and_profile(self):
+        scenario = compile_config(load_config_from_file(_MIXED_CONFIG_PATH))
+        overridden = override_scenario(
+            scenario, {"storage.capacitance": 0.1})
+
+        self.assertEqual(overridden.config["storage"]["capacitance"], 0.1)
+        self.assertEqual(scenario.config["storage"]["capacitance"], 0.047)
+        self.assertNotEqual(overridden.key, scenario.key)
+        self.assertIs(overridden.program_source, scenario.program_source)
+        self.assertEqual(Input(overridden).storage.CAPACITANCE, 0.1)
+
+    def test_override_unknown_or_non_numeric_field(self):
+        scenario = compile_config(load_config_from_file(_SIMPLE_CONFIG_PATH))
+        for overrides in [{"storage.missing": 1.0}, {"storage.type": 1.0}]:
+            with self.assertRaises(ValueError):
+                override_scenario(scenario, overrides)
+
+    def test_override_out_of_range_value(self):
+        scenario = compile_config(load_config_from_file(_SIMPLE_CONFIG_PATH))
+        with self.assertRaisesRegex(ValueError, "storage.capacitance"):
+            override_scenario(scenario, {"storage.capacitance": -0.01})
+
+
+_UI_VALUES = {
+    "sim_duration": "120", "sim_step": "0.25",
+    "supply_type": "constant", "supply_p_base": "0.05", "supply_filename": "", "supply_sampling_period": "2",
+    "storage_type": "capacitor", "storage_capacitance": "0.1", "storage_v_oper_max": "5.5",
+    "load_type": "mcu", "load_resistance": "1600", "load_p_rating": "0.25", "load_resistor_v_max": "5.5",
+    "load_v_min": "1.8", "load_v_max": "3.6",
+    "load_shutdown_cost": "0.0000003", "load_shutdown_v_oper": "2.0",
+    "load_standby_cost": "0.000001", "load_standby_v_oper": "2.2",
+    "load_active_cost": "0.00192", "load_active_v_oper": "3.0",
+    "program_filepath": "src/program/files/program01.txt", "program_processing_clock": "",
+}
+
+
+class TestLoadConfigFromUi(unittest.TestCase):
+    def test_mcu_config(self):
+        config = load_config_from_ui(_UI_VALUES)
+
+        self.assertEqual(config["supply"], {"type": "constant", "p_base": 0.05})
+        self.assertEqual(config["load"]["modes"]["standby"], {"cost": 0.000001, "v_oper": 2.2})
+        self.assertEqual(config["program"], {"filepath": "src/program/files/program01.txt"})
+        self.assertIsInstance(Input(config).load, MCU)
+
+    def test_resistor_config_ignores_mcu_fields(self):
+        values = dict(_UI_VALUES, load_type="resistor", load_v_max="invalid")
+        config = load_config_from_ui(values)
+
+        self.assertEqual(config["load"], {"type": "resistor", "resistance": 1600.0,
+                                          "p_rating": 0.25, "v_max": 5.5})
+        self.assertNotIn("program", config)
+        self.assertIsInstance(Input(config).load, Resistor)
+
+    def test_invalid_values_name_the_field(self):
+        for key, value, field in [("storage_capacitance", "abc", "storage.capacitance"),
+                                  ("load_active_cost", "", "load.modes.active.cost"),
+                                  ("supply_type", "solar", "supply type")]:
+            with self.assertRaises(ValueError) as context:
+                load_config_from_ui(dict(_UI_VALUES, **{key: value}))
+            self.assertIn(field, str(context.exception))
@@ -0,0 +1,87 @@
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.input.profilepool import ProfilePool, SharedProfile
+
+
+def _profile_stats(scenario):
+    return len(scenario.profile), sum(scenario.profile)
+
+
+class TestProfilePool(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        filepath = os.path.join(self._tmp_dir.name, "profile.csv")
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write("timestamp,power_out_w\n")
+            for i in range(400):
+                f.write(f"{i * 0.5},{0.0002 + 0.0001 * (i % 7):.9f}\n")
+
+        self.config = inp.load_config_from_file(
+            "src/input/files/config-complete-pmic.json")
+        self.config["supply"]["profile_filepath"] = filepath
+        self.config["simulation"]["duration"] = 150
+        self.scenario = inp.compile_config(self.config)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_identical_profiles_share_one_block(self):
+        other = dict(self.config, storage=dict(
+            self.config["storage"], capacitance=0.1))
+        with ProfilePool() as pool:
+            first = pool.share(self.scenario)
+            second = pool.share(inp.compile_config(other))
+
+            self.assertIsInstance(first.profile, SharedProfile)
+            self.assertEqual(first.profile, second.profile)
+            self.assertEqual(len(pool.profiles), 1)
+            self.assertEqual(list(first.profile), list(self.scenario.profile))
+            self.assertEqual(first.key, self.scenario.key)
+
+    def test_pickles_the_block_name_only(self):
+        with ProfilePool() as pool:
+            profile = pool.share(self.scenario).profile
+            data = pickle.dumps(profile)
+
+            self.assertLess(len(data), 200)
+            self.assertEqual(list(pickle.loads(data)),
+                             list(self.scenario.profile))
+
+    def test_array_copy_is_independent(self):
+        import numpy as np
+
+        with ProfilePool() as pool:
+            profile = pool.share(self.scenario).profile
+            copied = np.array(profile, copy=True)
+            copied[0] = -1.0
+            view = np.asarray(profile)
+
+            self.assertEqual(view[0], self.scenario.profile[0])
+            self.assertFalse(np.shares_memory(copied, view))
+            del view
+
+    def test_workers_attach_to_the_shared_block(self):
+        with ProfilePool() as pool, ProcessPoolExecutor(max_workers=2) as executor:
+            shared = pool.share(self.scenario)
+            results = list(executor.map(_profile_stats, [shared] * 4))
+        self.assertEqual(results, [_profile_stats(self.scenario)] * 4)
+
+    def test_block_is_unlinked_after_close(self):
+        pool = ProfilePool()
+        name = pool.share(self.scenario).profile.name
+        pool.close()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_simulation_matches_unshared_profile(self):
+        expected = simulator.run(inp.Input(self.scenario))
+        with ProfilePool() as pool:
+            sim_output = simulator.run(inp.Input(pool.share(self.scenario)))
+        self.assertEqual(sim_output, expected)
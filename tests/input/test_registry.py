@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from src.input.registry import ComponentRegistry, add_plugin_directory, remove_plugin_directory
+import src.input.input as inp
+
+# Budget (in seconds) to import the simulator and build the Input for config-simple.json
+_IMPORT_TIME_BUDGET = 0.5
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import src.input.input as inp
+import src.simulator.simulator as simulator
+inp.Input(inp.load_config_from_file("src/input/files/config-simple.json"))
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+_PLUGIN_SOURCE = """
+from src.behs.energysupply import ConstantSupply
+from src.input.input import REQUIRED
+
+
+class DoubledSupply(ConstantSupply):
+    CONFIG_SCHEMA = {"p_base": ((int, float), REQUIRED)}
+
+    def refresh(self, t_index, t_step):
+        super().refresh(t_index, t_step)
+        self.power_supply *= 2
+        self.energy_supply *= 2
+
+
+COMPONENTS = {"supply": {"doubled": DoubledSupply}}
+"""
+
+
+class TestComponentRegistry(unittest.TestCase):
+    def test_builtin_reference_is_imported_lazily(self):
+        registry = ComponentRegistry(
+            "supply", {"constant": "src.behs.energysupply:ConstantSupply"})
+        self.assertIn("constant", registry)
+        self.assertEqual(registry["constant"].__name__, "ConstantSupply")
+
+    def test_unknown_type(self):
+        registry = ComponentRegistry("supply", {})
+        self.assertNotIn("unknown", registry)
+        with self.assertRaises(KeyError):
+            _ = registry["unknown"]
+
+    def test_register_class(self):
+        registry = ComponentRegistry("load", {})
+        registry.register("custom", dict)
+        self.assertIs(registry["custom"], dict)
+
+    def test_plugin_directory(self):
+        with tempfile.TemporaryDirectory() as plugin_dir:
+            with open(os.path.join(plugin_dir, "doubled.py"), "w") as f:
+                f.write(_PLUGIN_SOURCE)
+            add_plugin_directory(plugin_dir)
+            self.addCleanup(remove_plugin_directory, plugin_dir)
+
+            config = inp.load_config_from_file(
+                "src/input/files/config-simple.json")
+            config["supply"] = {"type": "doubled", "p_base": 0.005}
+            sim_input = inp.Input(config)
+            sim_input.supply.refresh(t_index=0, t_step=0.25)
+            self.assertEqual(sim_input.supply.power_supply, 0.01)
+
+            del config["supply"]["p_base"]
+            with self.assertRaisesRegex(ValueError, "supply.p_base"):
+                inp.compile_config(config)
+
+    def test_removed_plugin_directory_is_not_searched(self):
+        with tempfile.TemporaryDirectory() as plugin_dir:
+            with open(os.path.join(plugin_dir, "doubled.py"), "w") as f:
+                f.write(_PLUGIN_SOURCE)
+            registry = ComponentRegistry("supply", {})
+            add_plugin_directory(plugin_dir)
+            self.assertIn("doubled", registry)
+
+            remove_plugin_directory(plugin_dir)
+            self.assertNotIn("doubled", registry)
+
+
+class TestStartupImports(unittest.TestCase):
+    def setUp(self):
+        result = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT], capture_output=True, text=True,
+            check=True, env=dict(os.environ, PYTHONPATH="."))
+        self.startup = json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_simple_config_does_not_import_heavy_modules(self):
+        for module in ["pandas", "h5py", "matplotlib", "numpy", "src.eh.eh", "src.behs.pmic"]:
+            self.assertNotIn(module, self.startup["modules"])
+
+    def test_simple_config_startup_within_budget(self):
+        self.assertLess(self.startup["elapsed"], _IMPORT_TIME_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
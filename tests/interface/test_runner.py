@@ -0,0 +1,65 @@
+import filecmp
+import os
+import tempfile
+import unittest
+
+import src.input.input as inp
+import src.output.output as out
+import src.simulator.simulator as simulator
+from src.interface.runner import STATE_CANCELLED, STATE_DONE, STATE_ERROR, BackgroundRun
+
+_SIMPLE_CONFIG_PATH = "src/input/files/config-simple.json"
+
+
+class TestBackgroundRun(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.config = inp.load_config_from_file(_SIMPLE_CONFIG_PATH)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_run_writes_outputs_and_summary(self):
+        run = BackgroundRun(self.config, output_dir=self._tmp_dir.name)
+        run.start()
+        run.join(timeout=60)
+        sim_output = simulator.run(inp.Input(self.config))
+        expected_csv = os.path.join(self._tmp_dir.name, "expected.csv")
+        out.write_to_csv(sim_output, expected_csv)
+
+        self.assertEqual(run.state, STATE_DONE)
+        self.assertEqual(run.progress, 1.0)
+        self.assertEqual(run.summary["steps"], len(sim_output))
+        self.assertTrue(filecmp.cmp(expected_csv, os.path.join(
+            self._tmp_dir.name, "output.csv"), shallow=False))
+        self.assertTrue(os.path.exists(os.path.join(self._tmp_dir.name, "output.xlsx")))
+
+    def test_preview_is_downsampled(self):
+        run = BackgroundRun(self.config, preview_points=100, chunk_size=37)
+        run.start()
+        run.join(timeout=60)
+        t_vector = inp.Input(self.config).t_vector
+        stride = -(-len(t_vector) // 100)
+
+        self.assertLessEqual(len(run.preview["time"]), 100)
+        self.assertEqual(run.preview["time"], list(t_vector)[::stride])
+        self.assertEqual(len(run.preview["storage_voltage"]), len(run.preview["time"]))
+
+    def test_cancel_stops_the_run(self):
+        run = BackgroundRun(self.config, chunk_size=10)
+        run.cancel()
+        run.start()
+        run.join(timeout=60)
+
+        self.assertEqual(run.state, STATE_CANCELLED)
+        self.assertEqual(run.steps, 10)
+        self.assertEqual(run.summary["steps"], 10)
+
+    def test_error_is_recorded(self):
+        del self.config["storage"]
+        run = BackgroundRun(self.config)
+        run.start()
+        run.join(timeout=60)
+
+        self.assertEqual(run.state, STATE_ERROR)
+        self.assertIsInstance(run.error, ValueError)
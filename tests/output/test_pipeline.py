@@ -0,0 +1,112 @@
+import filecmp
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import src.input.input as inp
+import src.output.output as out
+import src.output.pipeline as pipeline
+import src.simulator.simulator as simulator
+from src.simulator.stop import EnergyBudget, StopConditions
+
+
+def _config(filename, duration=300):
+    config = inp.load_config_from_file(f"src/input/files/{filename}")
+    config["supply"] = {"type": "constant", "p_base": 0.005}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+class _FailingSink(pipeline.Sink):
+    def write(self, chunk):
+        raise OSError("disk full")
+
+
+class _BuggySink(pipeline.Sink):
+    def write(self, chunk):
+        raise KeyError("storage")
+
+
+class TestIterChunks(unittest.TestCase):
+    def test_chunks_match_run(self):
+        config = _config("config-complete-pmic.json")
+        expected = simulator.run(inp.Input(config))
+        chunks = list(simulator.iter_chunks(inp.Input(config), chunk_size=7))
+
+        self.assertTrue(all(len(chunk) <= 7 for chunk in chunks))
+        self.assertEqual(dict(item for chunk in chunks for item in chunk), expected)
+
+    def test_stop_conditions(self):
+        config = _config("config-complete-pmic.json")
+        stop = StopConditions([EnergyBudget(1e-3)])
+        expected = simulator.run(inp.Input(config), stop=StopConditions([EnergyBudget(1e-3)]))
+        chunks = list(simulator.iter_chunks(inp.Input(config), chunk_size=50, stop=stop))
+
+        self.assertEqual(dict(item for chunk in chunks for item in chunk), expected)
+        self.assertEqual(stop.steps, len(expected))
+
+
+class TestOutputPipeline(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_files_match_sequential_writers(self):
+        for filename in ["config-complete-pmic.json", "config-complete.json", "config-simple.json"]:
+            config = _config(filename)
+            sim_output = simulator.run(inp.Input(config))
+            out.write_to_log(sim_output, self._path("expected.log"))
+            out.write_to_csv(sim_output, self._path("expected.csv"))
+
+            pipeline.run(inp.Input(config), [pipeline.LogSink(self._path("output.log")),
+                                             pipeline.CsvSink(self._path("output.csv"))],
+                         chunk_size=64, max_pending=2)
+
+            self.assertTrue(filecmp.cmp(self._path("expected.log"),
+                                        self._path("output.log"), shallow=False), filename)
+            self.assertTrue(filecmp.cmp(self._path("expected.csv"),
+                                        self._path("output.csv"), shallow=False), filename)
+
+    def test_summary(self):
+        config = _config("config-complete-pmic.json")
+        sim_output = simulator.run(inp.Input(config))
+        sink = pipeline.SummarySink(self._path("summary.json"))
+        pipeline.run(inp.Input(config), [sink], chunk_size=100)
+
+        voltages = [data["storage"]["voltage"] for data in sim_output.values()]
+        last = sim_output[max(sim_output)]
+        self.assertEqual(sink.summary["steps"], len(sim_output))
+        self.assertEqual(sink.summary["min_storage_voltage"], min(voltages))
+        self.assertEqual(sink.summary["max_storage_voltage"], max(voltages))
+        self.assertEqual(sink.summary["total_energy_consumed"],
+                         last["load"]["total_energy_consumed"])
+        self.assertEqual(sum(sink.summary["load_mode_steps"].values()), len(sim_output))
+        with open(self._path("summary.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["steps"], len(sim_output))
+
+    def test_sink_error_is_raised(self):
+        config = _config("config-simple.json")
+        csv_sink = pipeline.CsvSink(self._path("output.csv"))
+        with self.assertRaises(OSError):
+            pipeline.run(inp.Input(config), [_FailingSink(), csv_sink],
+                         chunk_size=10, max_pending=1)
+        self.assertIsNone(csv_sink.file)
+
+    def test_sink_bug_does_not_block_the_run(self):
+        config = _config("config-simple.json")
+        csv_sink = pipeline.CsvSink(self._path("output.csv"))
+        with mock.patch.object(threading, "excepthook") as excepthook:
+            with self.assertRaises(RuntimeError):
+                pipeline.run(inp.Input(config), [_BuggySink(), csv_sink],
+                             chunk_size=10, max_pending=1)
+        self.assertIs(excepthook.call_args[0][0].exc_type, KeyError)
+        self.assertIsNone(csv_sink.file)
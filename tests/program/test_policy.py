@@ -0,0 +1,136 @@
+import os
+import tempfile
+import types
+import unittest
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.program import policy, program
+
+# A radio transmission of a whole 0.5s step, which browns out a 10mF capacitor charged to the active mode voltage
+SOURCE = """SENSE 0.006 44
+PROC 0.00192 5
+TX 0.03 500
+SLEEP 0.000001 1000
+"""
+
+
+def _storage(energy_stored):
+    return types.SimpleNamespace(type="capacitor", CAPACITANCE=0.01, energy_stored=energy_stored)
+
+
+class TestEnergyAwarePolicy(unittest.TestCase):
+    def setUp(self):
+        self.storage = _storage(0.0)
+        self.load = types.SimpleNamespace(V_OPER_ACTIVE=3.0, voltage=3.0)
+        self.policy = policy.EnergyAwarePolicy(deferred=["TX"])
+        self.policy.bind(self.storage, self.load)
+        self.program = program.Program("p", 0.00192, 0.000001, 0.005, source="TX 0.03 100\nPROC 0.00192 1\n")
+        self.program.policy = self.policy
+
+    def test_defers_to_sleep(self):
+        self.storage.energy_stored = self.policy.e_reserve
+
+        for tick_model in [program.CLOCK_TICK_MODEL_FLOAT, program.CLOCK_TICK_MODEL_INTEGER]:
+            self.program.TICK_MODEL = tick_model
+            cost = self.program.get_cost_for_t_step(0.5)
+
+            self.assertAlmostEqual(cost, self.program.CPU_STANDBY_COST)
+            self.assertEqual(self.program.executed_ops_last_step, {"SLEEP": 0.5})
+            self.assertEqual(self.program.current_op_index, 0)
+        self.assertEqual(self.program.deferred_steps, 2)
+
+    def test_runs_when_storage_covers_the_operation(self):
+        self.storage.energy_stored = self.policy.e_reserve + 0.05
+
+        self.program.get_cost_for_t_step(0.5)
+
+        # The first run completes, the next transmission no longer fits in what is left
+        ops = self.program.executed_ops_last_step
+        self.assertAlmostEqual(ops["TX"], 0.1)
+        self.assertAlmostEqual(ops["SLEEP"], 0.399)
+        self.assertEqual(self.program.cycles, 1)
+        self.assertEqual(self.program.deferred_steps, 1)
+
+    def test_reserve_and_margin(self):
+        pmic = types.SimpleNamespace(V_BAT_OK_LOW=3.2, BUCK_EFFICIENCY=0.9)
+        strict = policy.EnergyAwarePolicy(margin=2.0)
+        strict.bind(self.storage, self.load, pmic)
+
+        self.assertAlmostEqual(strict.e_reserve, 0.5 * 0.01 * 3.2 ** 2)
+        self.storage.energy_stored = strict.e_reserve + 0.01
+        self.assertTrue(strict.allows(0.003, 0.5))
+        self.assertFalse(strict.allows(0.004, 0.5))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            policy.EnergyAwarePolicy(margin=0.5)
+        with self.assertRaises(ValueError):
+            policy.EnergyAwarePolicy(deferred=["JUMP"])
+        with self.assertRaises(ValueError):
+            policy.EnergyAwarePolicy().bind(types.SimpleNamespace(type="battery"), self.load)
+
+
+class TestProgramThroughput(unittest.TestCase):
+    def setUp(self):
+        handle, self.filepath = tempfile.mkstemp(suffix=".txt")
+        os.close(handle)
+        self._write(SOURCE)
+
+    def _write(self, source):
+        with open(self.filepath, "w") as file:
+            file.write(source)
+
+    def tearDown(self):
+        os.remove(self.filepath)
+
+    def _config(self, program_policy, config_path="src/input/files/config-complete.json"):
+        config = inp.load_config_from_file(config_path)
+        config["supply"] = {"type": "constant", "p_base": 0.005}
+        config["simulation"]["duration"] = 600
+        config["storage"]["capacitance"] = 0.01
+        config["program"] = {"filepath": self.filepath, "processing_clock": 0.005, "policy": program_policy}
+        return config
+
+    def _throughput(self, program_policy, config_path="src/input/files/config-complete.json"):
+        sim_input = inp.Input(self._config(program_policy, config_path))
+        simulator.run(sim_input)
+        return simulator.program_throughput(sim_input)
+
+    def test_energy_aware_completes_more_cycles(self):
+        blind = self._throughput(policy.POLICY_BLIND)
+        energy_aware = self._throughput(policy.POLICY_ENERGY_AWARE)
+
+        self.assertEqual(blind["deferred_steps"], 0)
+        self.assertGreater(energy_aware["deferred_steps"], 0)
+        self.assertGreater(energy_aware["cycles"], blind["cycles"])
+        self.assertAlmostEqual(energy_aware["cycles_per_hour"], energy_aware["cycles"] * 3600 / (1201 * 0.5))
+
+    def test_checkpoints_keep_progress(self):
+        # Three transmissions need more energy than one charge of the capacitor between the PMIC thresholds
+        volatile = "TX 0.03 500\nTX 0.03 500\nTX 0.03 500\nSLEEP 0.000001 1000\n"
+        self._write(volatile)
+        blind = self._throughput(policy.POLICY_BLIND, "src/input/files/config-complete-pmic.json")
+        self._write(volatile.replace("500\n", "500\nCHECKPOINT 0.002 1\n"))
+        checkpointed = self._throughput(policy.POLICY_BLIND, "src/input/files/config-complete-pmic.json")
+
+        self.assertEqual(blind["cycles"], 0)
+        self.assertEqual(blind["progress_seconds"], 0.0)
+        self.assertGreater(blind["reexecuted_seconds"], 0.0)
+        self.assertGreater(checkpointed["cycles"], 0)
+        self.assertGreater(checkpointed["progress_seconds"], checkpointed["reexecuted_seconds"])
+        self.assertGreaterEqual(checkpointed["checkpoints"], 3 * checkpointed["cycles"])
+
+    def test_config_validation(self):
+        config = self._config("eager")
+        with self.assertRaises(ValueError):
+            inp.compile_config(config)
+
+        config = self._config(policy.POLICY_ENERGY_AWARE)
+        config["program"]["deferred"] = ["TX", "JUMP"]
+        with self.assertRaises(ValueError):
+            inp.compile_config(config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import unittest
+
+from src.program import program
+
+SOURCE = """RX 0.027 102.5
+PROC 0.00192 1
+SLEEP 0.000001 60000
+"""
+
+
+class TestCompileProgram(unittest.TestCase):
+    def test_compiles_operations(self):
+        compiled = program.compile_program(SOURCE)
+
+        self.assertEqual(compiled.codes, tuple(program.INSTRUCTION_CODES[i] for i in ["RX", "PROC", "SLEEP"]))
+        self.assertEqual(compiled.costs, (0.027, 0.00192, 0.000001))
+        self.assertEqual(compiled.durations, (0.1025, 0.001, 60.0))
+        self.assertEqual(compiled.diagnostics, ())
+        self.assertEqual(hash(compiled), hash(program.compile_program(SOURCE)))
+
+    def test_diagnostics(self):
+        compiled = program.compile_program("PROC 0.001 1\n\nJUMP 0.1 1\nTX\nSENSE x 1\nTX 0.03\n")
+
+        self.assertEqual(len(compiled), 2)
+        self.assertEqual([d.line for d in compiled.diagnostics], [3, 4, 5])
+        self.assertIn("JUMP", compiled.diagnostics[0].message)
+        self.assertEqual(compiled.diagnostics[1].text, "TX")
+
+    def test_memoised_by_content_and_clock(self):
+        compiled = program.compile_program(SOURCE)
+        self.assertIs(program.compile_program(str(SOURCE)), compiled)
+
+        fine = program.clock_program(compiled, 0.001)
+        coarse = program.clock_program(compiled, 0.005)
+        self.assertIs(program.clock_program(compiled, 0.001), fine)
+        self.assertEqual(fine.ticks_needed, (103, 1, 60000))
+        self.assertEqual(coarse.ticks_needed, (21, 1, 12000))
+
+    def test_programs_share_operations(self):
+        first = program.Program("p", 0.002, 0.0001, 0.005, source=SOURCE)
+        second = program.Program("p", 0.002, 0.0001, 0.005, source=SOURCE)
+
+        self.assertIs(first.operations, second.operations)
+        first.get_cost_for_t_step(0.5)
+        self.assertEqual(second.current_op_index, 0)
+        self.assertEqual(second.current_op_remaining_seconds, 0.1025)
+
+
+LOOPED = """RX 0.027 102.5
+REPEAT 30
+  SENSE 0.006 44
+  REPEAT 3
+    PROC 0.00192 1.5  # processing
+  END
+  EVERY 10
+    TX 0.03 7
+  END
+  SLEEP 0.000001 1000
+END
+"""
+
+
+def _unrolled():
+    lines = ["RX 0.027 102.5"]
+    for j in range(1, 31):
+        lines += ["SENSE 0.006 44"] + ["PROC 0.00192 1.5"] * 3
+        lines += ["TX 0.03 7"] if j % 10 == 0 else []
+        lines += ["SLEEP 0.000001 1000"]
+    return "\n".join(lines)
+
+
+class TestProgramBlocks(unittest.TestCase):
+    def test_compiles_every_into_repeat_blocks(self):
+        compiled = program.compile_program(LOOPED)
+
+        self.assertTrue(compiled.has_loops)
+        self.assertEqual(len(compiled), 5)
+        self.assertEqual(compiled.diagnostics, ())
+        repeats = [entry[1] for entry in compiled.schedule if entry[0] == "repeat"]
+        # 30 iterations = 3 x (9 without TX, then 1 with it), with the PROC block in each
+        self.assertEqual(repeats, [3, 9, 3, 3])
+
+    def test_block_diagnostics(self):
+        compiled = program.compile_program("END\nREPEAT x\nPROC 0.001 1\nEVERY 2\nEVERY 3\nTX 0.03 1\nEND\nEND\nREPEAT 2\n")
+        messages = [(d.line, d.message.split()[0]) for d in compiled.diagnostics]
+
+        self.assertEqual(messages, [(1, "END"), (2, "REPEAT"), (5, "EVERY"), (9, "Block"), (2, "Block")])
+        self.assertFalse(compiled.has_loops)
+
+    def test_every_period_limit_is_a_diagnostic(self):
+        compiled = program.compile_program("REPEAT 2\nEVERY 9973\nPROC 0.001 1\nEND\nEVERY 9967\nTX 0.03 1\nEND\nEND\n")
+        messages = [(d.line, d.message.split()[0]) for d in compiled.diagnostics]
+
+        self.assertEqual(messages, [(5, "EVERY")])
+        self.assertTrue(compiled.has_loops)
+
+    def test_matches_unrolled_program(self):
+        for tick_model in [program.CLOCK_TICK_MODEL_FLOAT, program.CLOCK_TICK_MODEL_INTEGER]:
+            for t_step in [0.05, 0.5, 3.0]:
+                looped = program.Program("looped", 0.002, 0.0001, 0.001, tick_model, source=LOOPED)
+                unrolled = program.Program("unrolled", 0.002, 0.0001, 0.001, tick_model, source=_unrolled())
+                for _ in range(200):
+                    self.assertAlmostEqual(looped.get_cost_for_t_step(t_step),
+                                           unrolled.get_cost_for_t_step(t_step), places=12)
+                    for secs, expected in zip(looped.executed_ops, unrolled.executed_ops):
+                        self.assertAlmostEqual(secs, expected, places=9)
+
+    def test_reset_leaves_blocks(self):
+        looped = program.Program("looped", 0.002, 0.0001, 0.001, source=LOOPED)
+        looped.get_cost_for_t_step(0.5)
+        looped.reset()
+        fresh = program.Program("fresh", 0.002, 0.0001, 0.001, source=LOOPED)
+
+        self.assertEqual(looped.current_op_index, fresh.current_op_index)
+        self.assertEqual(looped.get_cost_for_t_step(0.5), fresh.get_cost_for_t_step(0.5))
+
+
+CHECKPOINTED = """PROC 0.002 100
+CHECKPOINT 0.001 10
+TX 0.03 200
+SLEEP 0.000001 1000
+"""
+
+
+class TestProgramCheckpoints(unittest.TestCase):
+    def test_resumes_from_last_checkpoint(self):
+        for tick_model in [program.CLOCK_TICK_MODEL_FLOAT, program.CLOCK_TICK_MODEL_INTEGER]:
+            prog = program.Program("p", 0.002, 0.0001, 0.005, tick_model, source=CHECKPOINTED)
+            prog.get_cost_for_t_step(0.2)
+            self.assertTrue(prog.has_checkpoints)
+            self.assertEqual(prog.checkpoints, 1)
+            self.assertAlmostEqual(prog.executed_ops_last_step["CHECKPOINT"], 0.01)
+
+            # Power is lost half-way through TX: it starts over, PROC is not executed again
+            prog.reset()
+            prog.reset()
+            self.assertEqual(prog.current_op_index, 2)
+            self.assertAlmostEqual(prog.progress_seconds, 0.11)
+            self.assertAlmostEqual(prog.reexecuted_seconds, 0.09)
+            prog.get_cost_for_t_step(0.2)
+            self.assertAlmostEqual(prog.executed_ops_last_step["TX"], 0.2)
+
+    def test_power_loss_after_completed_run_resumes_at_program_start(self):
+        prog = program.Program("p", 0.002, 0.0001, 0.001, source="SENSE 0.006 10\nCHECKPOINT 0.001 5\nTX 0.03 10\n")
+        for _ in range(3):
+            prog.get_cost_for_t_step(0.01)
+        # The second run started with half of SENSE
+        self.assertEqual(prog.cycles, 1)
+        self.assertAlmostEqual(prog.executed_ops_last_step["SENSE"], 0.005)
+
+        prog.reset()
+
+        self.assertEqual(prog.current_op_index, 0)
+        self.assertAlmostEqual(prog.progress_seconds, 0.025)
+        self.assertAlmostEqual(prog.reexecuted_seconds, 0.005)
+        prog.get_cost_for_t_step(0.01)
+        self.assertEqual(list(prog.executed_ops_last_step), ["SENSE"])
+        self.assertEqual(prog.cycles, 1)
+
+    def test_restarts_without_checkpoint(self):
+        prog = program.Program("p", 0.002, 0.0001, 0.005, source="PROC 0.002 100\nTX 0.03 200\n")
+        prog.get_cost_for_t_step(0.2)
+        prog.reset()
+
+        self.assertFalse(prog.has_checkpoints)
+        self.assertEqual(prog.current_op_index, 0)
+        self.assertEqual(prog.progress_seconds, 0.0)
+        self.assertAlmostEqual(prog.reexecuted_seconds, 0.2)
+
+    def test_resumes_inside_block(self):
+        source = "REPEAT 3\n  PROC 0.002 100\n  CHECKPOINT 0.001 10\nEND\nTX 0.03 200\n"
+        prog = program.Program("p", 0.002, 0.0001, 0.005, source=source)
+        prog.get_cost_for_t_step(0.25)
+        prog.reset()
+
+        # Two iterations were saved, only the third one and TX are left
+        self.assertEqual(prog.checkpoints, 2)
+        prog.get_cost_for_t_step(0.35)
+        self.assertEqual(prog.cycles, 1)
+        self.assertAlmostEqual(prog.executed_ops_last_step["PROC"], 0.1 + 0.04)
+        self.assertAlmostEqual(prog.progress_seconds, 0.53)
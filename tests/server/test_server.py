@@ -0,0 +1,93 @@
+import tempfile
+import threading
+import unittest
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.server.client import Client, JobError
+from src.server.server import STATUS_DONE, STATUS_ERROR, STATUS_PENDING, JobServer, JobStore
+
+_SIMPLE_CONFIG_PATH = "src/input/files/config-simple.json"
+
+
+class TestJobServer(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.server = JobServer(port=0, workers=2, store_dir=self._tmp_dir.name)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = Client(self.server.url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp_dir.cleanup()
+
+    def test_job_output_matches_local_run(self):
+        config = inp.load_config_from_file(_SIMPLE_CONFIG_PATH)
+        job_id = self.client.submit(config)
+        record = self.client.wait(job_id, timeout=60)
+        expected = simulator.run(inp.Input(config))
+
+        self.assertEqual(record["status"], STATUS_DONE)
+        self.assertEqual(self.client.output(job_id), expected)
+        self.assertEqual(self.client.result(job_id)["steps"], len(expected))
+        self.assertEqual([job["id"] for job in self.client.jobs()], [job_id])
+
+    def test_program_output_matches_local_run(self):
+        config = inp.load_config_from_file("src/input/files/config-complete-pmic.json")
+        config["supply"] = {"type": "constant", "p_base": 0.005}
+        config["simulation"]["duration"] = 60
+        job_id = self.client.submit(config)
+        self.client.wait(job_id, timeout=60)
+
+        self.assertEqual(self.client.output(job_id), simulator.run(inp.Input(config, verbose=False)))
+
+    def test_invalid_config_is_rejected(self):
+        config = inp.load_config_from_file(_SIMPLE_CONFIG_PATH)
+        del config["storage"]
+        with self.assertRaises(JobError) as context:
+            self.client.submit(config)
+        self.assertEqual(context.exception.status, 400)
+
+    def test_failed_job_reports_its_error(self):
+        config = inp.load_config_from_file("src/input/files/config-complete.json")
+        config["supply"]["profile_filepath"] = "missing.csv"
+        job_id = self.client.submit(config)
+        record = self.client.wait(job_id, timeout=60)
+
+        self.assertEqual(record["status"], STATUS_ERROR)
+        self.assertIn("missing.csv", record["error"])
+        with self.assertRaises(JobError) as context:
+            self.client.output(job_id)
+        self.assertEqual(context.exception.status, 422)
+
+    def test_unknown_job(self):
+        for job_id in ["0" * 32, "..", "not-a-job"]:
+            with self.assertRaises(JobError) as context:
+                self.client.status(job_id)
+            self.assertEqual(context.exception.status, 404)
+
+
+class TestJobStore(unittest.TestCase):
+    def test_recover_fails_jobs_left_pending(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = JobStore(store_dir)
+            store.put({"id": "a" * 32, "status": STATUS_PENDING, "error": None,
+                       "submitted_at": 0.0, "finished_at": None, "summary": None})
+
+            self.assertEqual(JobStore(store_dir).recover(), 1)
+            self.assertEqual(store.get("a" * 32)["status"], STATUS_ERROR)
+
+    def test_prune_keeps_newest_finished_jobs(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = JobStore(store_dir, max_records=2)
+            for i, status in enumerate([STATUS_DONE, STATUS_PENDING, STATUS_DONE, STATUS_ERROR]):
+                job_id = str(i) * 32
+                store.put({"id": job_id, "status": status, "error": None,
+                           "submitted_at": float(i), "finished_at": None, "summary": None})
+                store.results.put(job_id, {})
+
+            self.assertEqual(store.prune(), 1)
+            self.assertEqual([record["id"] for record in store.list()], ["3" * 32, "2" * 32, "1" * 32])
+            self.assertNotIn("0" * 32, store.results)
@@ -0,0 +1,58 @@
+import unittest
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.simulator.audit import EnergyAuditor
+
+
+def _input(filename, duration=600, p_base=0.01, capacitance=None):
+    config = inp.load_config_from_file(f"src/input/files/{filename}")
+    config["supply"] = {"type": "constant", "p_base": p_base}
+    config["simulation"]["duration"] = duration
+    if capacitance is not None:
+        config["storage"]["capacitance"] = capacitance
+    return inp.Input(config)
+
+
+class TestEnergyAuditor(unittest.TestCase):
+    def test_balanced_runs(self):
+        for filename in ["config-simple.json", "config-mixed.json", "config-complete-pmic.json"]:
+            auditor = EnergyAuditor()
+            sim_input = _input(filename, duration=3600)
+            simulator.run(sim_input, auditor=auditor)
+
+            self.assertTrue(auditor.balanced, auditor.report())
+            self.assertEqual(auditor.steps, len(sim_input.t_vector))
+            self.assertAlmostEqual(auditor.residual(), 0.0, places=9)
+            self.assertAlmostEqual(
+                auditor.totals["stored"], sim_input.storage.energy_stored)
+
+    def test_tracks_pmic_and_storage_terms(self):
+        auditor = EnergyAuditor()
+        simulator.run(_input("config-complete-pmic.json",
+                      duration=3600), auditor=auditor)
+        self.assertGreater(auditor.totals["lost"], 0.0)
+        self.assertGreater(auditor.totals["rejected"], 0.0)
+        self.assertGreater(auditor.totals["clipped"], 0.0)
+
+    def test_flags_unbalanced_steps_with_bounded_memory(self):
+        # The Load still draws energy in the step where the PMIC buck turns off (vbat_ok drops)
+        auditor = EnergyAuditor(max_flagged=3)
+        simulator.run(_input("config-complete-pmic.json", duration=3600,
+                      p_base=0.002, capacitance=0.005), auditor=auditor)
+
+        self.assertFalse(auditor.balanced)
+        self.assertGreater(auditor.flagged_count, 3)
+        self.assertEqual(len(auditor.flagged), 3)
+        i, t, imbalance = auditor.flagged[0]
+        self.assertLess(imbalance, 0.0)
+        self.assertIn("unbalanced steps", auditor.report())
+
+    def test_output_unchanged(self):
+        output = simulator.run(_input("config-complete-pmic.json"),
+                               auditor=EnergyAuditor())
+        self.assertEqual(output, simulator.run(
+            _input("config-complete-pmic.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
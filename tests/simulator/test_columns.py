@@ -0,0 +1,70 @@
+import unittest
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.simulator.columns import ColumnarOutput, RunLengthColumn
+
+
+def _config(filename, p_base=0.005, duration=600):
+    config = inp.load_config_from_file(f"src/input/files/{filename}")
+    config["supply"] = {"type": "constant", "p_base": p_base}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+class TestRunLengthColumn(unittest.TestCase):
+    def test_runs(self):
+        column = RunLengthColumn()
+        for i, value in enumerate("aaabbbbac"):
+            column.append(i, value)
+
+        self.assertEqual(column.starts, [0, 3, 7, 8])
+        self.assertEqual(column.values, ["a", "b", "a", "c"])
+        self.assertEqual(column.expand(9), list("aaabbbbac"))
+        self.assertEqual(column.value_at(6), "b")
+        self.assertEqual(column.step_counts(9), {"a": 4, "b": 4, "c": 1})
+
+
+class TestColumnarOutput(unittest.TestCase):
+    def _check(self, config):
+        full = simulator.run(inp.Input(config))
+        columns = ColumnarOutput()
+        self.assertIs(simulator.run(inp.Input(config), recording=columns), columns)
+
+        self.assertEqual(len(columns), len(full))
+        self.assertEqual(list(columns), list(full))
+        self.assertEqual(dict(columns.items()), full)
+        for key in columns.states:
+            self.assertLess(len(columns.states[key]), len(full))
+        return full, columns
+
+    def test_matches_full_output(self):
+        self._check(_config("config-complete.json"))
+
+    def test_matches_full_output_with_pmic(self):
+        self._check(_config("config-complete-pmic.json"))
+
+    def test_state_queries(self):
+        full, columns = self._check(_config("config-complete.json"))
+        t_step = columns.t_step
+        modes = [data["load"]["mode"] for data in full.values()]
+
+        self.assertEqual(columns.types["load"], full[0]["load"]["type"])
+        self.assertEqual(columns.column("load.mode"), modes)
+        self.assertAlmostEqual(columns.time_in("load.mode", "standby"), modes.count("standby") * t_step)
+        self.assertEqual(columns.time_in("load.mode", "unknown"), 0.0)
+        self.assertAlmostEqual(sum(columns.durations("storage.status").values()), len(full) * t_step)
+
+        changes = [(t, mode) for k, (t, mode) in enumerate(zip(full, modes)) if k == 0 or mode != modes[k - 1]]
+        self.assertEqual(columns.transitions("load.mode"), changes)
+        with self.assertRaises(ValueError):
+            columns.transitions("storage.voltage")
+
+    def test_from_sim_output(self):
+        full = simulator.run(inp.Input(_config("config-complete-pmic.json")))
+        columns = ColumnarOutput.from_sim_output(full)
+
+        self.assertEqual(columns.t_step, 0.5)
+        self.assertEqual(dict(columns.items()), full)
+        self.assertEqual(columns.column("storage.voltage"),
+                         [data["storage"]["voltage"] for data in full.values()])
@@ -0,0 +1,106 @@
+import contextlib
+import io
+import unittest
+import numpy as np
+import src.input.input as inp
+import src.simulator.simulator as simulator
+import src.simulator.fleet as fleet
+
+
+def _template(filename="config-complete-pmic.json", duration=300):
+    config = inp.load_config_from_file(f"src/input/files/{filename}")
+    config["supply"] = {"type": "constant", "p_base": 0.005}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+class TestNodeConfigs(unittest.TestCase):
+    def test_overrides_are_merged_into_template(self):
+        template = _template()
+        configs = fleet.node_configs(
+            template, [{}, {"storage": {"capacitance": 0.1}}])
+
+        self.assertEqual(configs[0], template)
+        self.assertEqual(configs[1]["storage"]["capacitance"], 0.1)
+        self.assertEqual(configs[1]["storage"]["type"], "capacitor")
+        self.assertEqual(template["storage"]["capacitance"], 0.047)
+
+
+class TestFleetRun(unittest.TestCase):
+    def test_identical_nodes_are_simulated_once(self):
+        template = _template()
+        result = fleet.run(fleet.node_configs(
+            template, [{}] * 5 + [{"storage": {"capacitance": 0.1}}]), jobs=1)
+
+        self.assertEqual(result["nodes"], 6)
+        self.assertEqual(result["unique_nodes"], 2)
+        self.assertEqual(len(result["node_summaries"]), 6)
+        self.assertEqual(result["node_summaries"][0],
+                         result["node_summaries"][4])
+
+    def test_nodes_do_not_print(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            fleet.run(fleet.node_configs(_template(), [{}, {"storage": {"capacitance": 0.1}}]), jobs=1)
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_aggregates_match_single_runs(self):
+        template = _template()
+        configs = fleet.node_configs(
+            template, [{}, {}, {"storage": {"capacitance": 0.1}}])
+        result = fleet.run(configs, jobs=1)
+
+        voltages = []
+        for config in configs:
+            sim_output = simulator.run(inp.Input(config))
+            voltages.append([data["storage"]["voltage"]
+                            for data in sim_output.values()])
+        voltages = np.array(voltages)
+
+        np.testing.assert_allclose(
+            result["storage_voltage"]["mean"], voltages.mean(axis=0))
+        np.testing.assert_array_equal(
+            result["storage_voltage"]["min"], voltages.min(axis=0))
+        np.testing.assert_array_equal(
+            result["storage_voltage"]["max"], voltages.max(axis=0))
+        self.assertEqual(len(result["time"]), voltages.shape[1])
+
+    def test_node_summary(self):
+        config = _template()
+        summary = fleet.run([config], jobs=1)["node_summaries"][0]
+
+        sim_input = inp.Input(config)
+        simulator.run(sim_input)
+        self.assertEqual(summary["energy_consumed"],
+                         sim_input.load.total_energy_consumed)
+        self.assertEqual(summary["final_energy_stored"],
+                         sim_input.storage.energy_stored)
+
+    def test_reference_loop_for_unsupported_nodes(self):
+        config = _template("config-simple.json")
+        result = fleet.run([config], jobs=1)
+
+        sim_output = simulator.run(inp.Input(config))
+        expected = [data["storage"]["voltage"] for data in sim_output.values()]
+        np.testing.assert_array_equal(
+            result["storage_voltage"]["mean"], expected)
+
+    def test_parallel_matches_serial(self):
+        configs = fleet.node_configs(_template(), [
+            {"storage": {"capacitance": 0.01 * (i + 1)}} for i in range(6)])
+        serial = fleet.run(configs, jobs=1, batch_size=2)
+        parallel = fleet.run(configs, jobs=2, batch_size=2)
+
+        np.testing.assert_array_equal(
+            serial["storage_voltage"]["mean"], parallel["storage_voltage"]["mean"])
+        self.assertEqual(serial["node_summaries"], parallel["node_summaries"])
+
+    def test_nodes_must_share_time_grid(self):
+        with self.assertRaises(ValueError):
+            fleet.run([_template(duration=300), _template(duration=600)])
+        with self.assertRaises(ValueError):
+            fleet.run([])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import copy
+import unittest
+import src.input.input as inp
+import src.simulator.simulator as simulator
+import src.simulator.kernel as kernel
+from src.behs.energysupply import ConstantSupply
+from src.behs.load import MCU
+from src.program.program import CLOCK_TICK_MODEL_FLOAT, CLOCK_TICK_MODEL_INTEGER
+
+
+class _DoubledSupply(ConstantSupply):
+    __slots__ = ()
+
+    def refresh(self, t_index, t_step):
+        super().refresh(t_index, t_step)
+        self.power_supply *= 2
+        self.energy_supply *= 2
+
+
+class _QuietMCU(MCU):
+    __slots__ = ()
+
+
+def _pmic_config(duration=600):
+    config = inp.load_config_from_file(
+        "src/input/files/config-complete-pmic.json")
+    config["supply"] = {"type": "constant", "p_base": 0.005}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+def _inputs(config, tick_model=CLOCK_TICK_MODEL_FLOAT):
+    inputs = []
+    for _ in range(2):
+        sim_input = inp.Input(copy.deepcopy(config))
+        if sim_input.load.program is not None:
+            sim_input.load.program.TICK_MODEL = tick_model
+        inputs.append(sim_input)
+    return inputs
+
+
+class TestKernelRun(unittest.TestCase):
+    def assertMatchesReference(self, config, tick_model=CLOCK_TICK_MODEL_FLOAT):
+        reference, compiled = _inputs(config, tick_model)
+        expected = simulator.run(reference)
+        result = kernel.run(compiled)
+
+        self.assertEqual(kernel.to_sim_output(compiled, result), expected)
+        self.assertEqual(compiled.storage.energy_stored,
+                         reference.storage.energy_stored)
+        self.assertEqual(compiled.load.mode, reference.load.mode)
+        for component in ["storage", "pmic"]:
+            if getattr(reference, component) is None:
+                continue
+            slots = [slot for cls in type(getattr(reference, component)).__mro__
+                     for slot in getattr(cls, "__slots__", ())]
+            for slot in slots:
+                self.assertEqual(getattr(getattr(compiled, component), slot),
+                                 getattr(getattr(reference, component), slot), slot)
+        if reference.load.program is not None:
+            self.assertEqual(compiled.load.program.current_op_index,
+                             reference.load.program.current_op_index)
+            self.assertEqual(compiled.load.program.current_op_remaining_seconds,
+                             reference.load.program.current_op_remaining_seconds)
+            for name in ["cycles", "progress_seconds", "reexecuted_seconds", "uncommitted_seconds"]:
+                self.assertEqual(getattr(compiled.load.program, name), getattr(reference.load.program, name), name)
+
+    def test_matches_reference_with_pmic(self):
+        self.assertMatchesReference(_pmic_config())
+
+    def test_matches_reference_with_integer_tick_model(self):
+        self.assertMatchesReference(
+            _pmic_config(), tick_model=CLOCK_TICK_MODEL_INTEGER)
+
+    def test_matches_reference_without_pmic(self):
+        config = _pmic_config()
+        del config["pmic"]
+        self.assertMatchesReference(config)
+
+    def test_matches_reference_without_program(self):
+        reference, compiled = _inputs(_pmic_config())
+        reference.load.program = compiled.load.program = None
+
+        expected = simulator.run(reference)
+        self.assertEqual(kernel.to_sim_output(
+            compiled, kernel.run(compiled)), expected)
+
+    def test_result_arrays(self):
+        sim_input = inp.Input(_pmic_config(duration=60))
+        result = kernel.run(sim_input)
+
+        steps = len(sim_input.t_vector)
+        self.assertEqual(result["storage_voltage"].shape, (steps,))
+        self.assertEqual(result["program_executed_ops"].shape,
+                         (steps, len(kernel.INSTRUCTIONS)))
+
+    def test_unsupported_load(self):
+        config = inp.load_config_from_file("src/input/files/config-simple.json")
+        with self.assertRaises(ValueError):
+            kernel.run(inp.Input(config))
+
+
+    def test_subclassed_components_are_not_supported(self):
+        sim_input = inp.Input(_pmic_config())
+        sim_input.supply = _DoubledSupply(
+            {"type": "doubled", "p_base": 0.005}, sim_input.t_vector, sim_input.t_step)
+        self.assertFalse(kernel.supports(sim_input))
+        with self.assertRaisesRegex(ValueError, "Energy Supply type"):
+            kernel.run(sim_input)
+
+        sim_input = inp.Input(_pmic_config())
+        sim_input.load.__class__ = _QuietMCU
+        self.assertFalse(kernel.supports(sim_input))
+
+
+if __name__ == "__main__":
+    unittest.main()
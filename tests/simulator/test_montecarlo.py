@@ -0,0 +1,135 @@
+import contextlib
+import io
+import random
+import statistics
+import unittest
+import src.input.input as inp
+import src.simulator.simulator as simulator
+import src.simulator.montecarlo as montecarlo
+from src.simulator.montecarlo import P2Quantile
+
+
+def _pmic_config(duration=300, p_base=0.002):
+    config = inp.load_config_from_file(
+        "src/input/files/config-complete-pmic.json")
+    config["supply"] = {"type": "constant", "p_base": p_base}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+_PARAMETERS = {
+    "storage.capacitance": {"distribution": "uniform", "tolerance": 0.2},
+    "pmic.boost_efficiency": {"distribution": "normal", "std": 0.05, "max": 1.0},
+}
+
+
+class TestP2Quantile(unittest.TestCase):
+    def test_estimates_quantiles(self):
+        rng = random.Random(1)
+        values = [rng.gauss(0, 1) for _ in range(10000)]
+        exact = statistics.quantiles(values, n=100)
+
+        for p in [0.05, 0.5, 0.95]:
+            sketch = P2Quantile(p)
+            for value in values:
+                sketch.add(value)
+            self.assertAlmostEqual(
+                sketch.value(), exact[round(p * 100) - 1], delta=0.05)
+
+    def test_exact_with_few_observations(self):
+        sketch = P2Quantile(0.5)
+        for value in [3.0, 1.0, 2.0]:
+            sketch.add(value)
+        self.assertEqual(sketch.value(), 2.0)
+
+    def test_invalid_quantile(self):
+        with self.assertRaises(ValueError):
+            P2Quantile(1.5)
+
+
+class TestSampleParameters(unittest.TestCase):
+    def test_samples_within_bounds(self):
+        config = inp.validate_config(_pmic_config())
+        rng = random.Random(0)
+        nominal = config["storage"]["capacitance"]
+
+        for _ in range(100):
+            sample = montecarlo.sample_parameters(config, _PARAMETERS, rng)
+            self.assertLessEqual(
+                abs(sample["storage.capacitance"] - nominal), 0.2 * nominal + 1e-12)
+            self.assertLessEqual(sample["pmic.boost_efficiency"], 1.0)
+
+    def test_out_of_range_values_are_drawn_again(self):
+        config = inp.validate_config(_pmic_config())
+        rng = random.Random(0)
+        parameters = {
+            "storage.capacitance": {"distribution": "normal", "mean": 0.0, "std": 0.01},
+            "pmic.boost_efficiency": {"distribution": "normal", "mean": 1.0, "std": 0.05},
+        }
+
+        for _ in range(100):
+            sample = montecarlo.sample_parameters(config, parameters, rng)
+            self.assertGreater(sample["storage.capacitance"], 0)
+            self.assertLessEqual(sample["pmic.boost_efficiency"], 1.0)
+
+    def test_no_valid_value(self):
+        config = inp.validate_config(_pmic_config())
+        parameters = {"storage.capacitance": {"distribution": "uniform", "low": -2.0, "high": -1.0}}
+        with self.assertRaises(ValueError):
+            montecarlo.sample_parameters(config, parameters, random.Random(0))
+
+    def test_invalid_parameters(self):
+        config = inp.validate_config(_pmic_config())
+        for parameters in [
+            {"storage.missing": {"distribution": "uniform", "tolerance": 0.1}},
+            {"storage.capacitance": {"distribution": "poisson"}},
+            {"storage.capacitance": {"distribution": "normal"}},
+            {"storage.type": {"distribution": "uniform", "tolerance": 0.1}},
+        ]:
+            with self.assertRaises(ValueError):
+                montecarlo.validate_parameters(config, parameters)
+
+
+class TestMonteCarloRun(unittest.TestCase):
+    def test_result_structure(self):
+        result = montecarlo.run(
+            _pmic_config(), _PARAMETERS, replicas=20, seed=1, bins=10, jobs=1)
+
+        self.assertEqual(result["replicas"], 20)
+        self.assertEqual(len(result["time"]), 10)
+        self.assertEqual(len(result["brownout_fraction"]), 10)
+        self.assertTrue(0 <= result["brownout_probability"] <= 1)
+        low, mid, high = (result["storage_voltage"][q]
+                          for q in montecarlo.DEFAULT_QUANTILES)
+        for i in range(10):
+            self.assertLessEqual(low[i], mid[i])
+            self.assertLessEqual(mid[i], high[i])
+
+    def test_replicas_do_not_print(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            montecarlo.run(_pmic_config(), _PARAMETERS, replicas=5, seed=1, bins=5, jobs=1)
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_reproducible_for_any_number_of_jobs(self):
+        expected = montecarlo.run(
+            _pmic_config(), _PARAMETERS, replicas=12, seed=7, bins=5, batch_size=4, jobs=1)
+        result = montecarlo.run(
+            _pmic_config(), _PARAMETERS, replicas=12, seed=7, bins=5, batch_size=4, jobs=2)
+        self.assertEqual(result, expected)
+
+    def test_zero_tolerance_matches_single_run(self):
+        config = _pmic_config()
+        parameters = {"storage.capacitance": {
+            "distribution": "uniform", "tolerance": 0.0}}
+        result = montecarlo.run(
+            config, parameters, replicas=3, bins=4, jobs=1)
+
+        sim_output = simulator.run(inp.Input(config))
+        expected = [sim_output[t]["storage"]["voltage"] for t in result["time"]]
+        for q in montecarlo.DEFAULT_QUANTILES:
+            self.assertEqual(result["storage_voltage"][q], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
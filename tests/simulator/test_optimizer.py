@@ -0,0 +1,75 @@
+import contextlib
+import io
+import unittest
+import src.input.input as inp
+import src.simulator.optimizer as optimizer
+
+
+def _pmic_config(duration=600, p_base=0.01):
+    config = inp.load_config_from_file(
+        "src/input/files/config-complete-pmic.json")
+    config["supply"] = {"type": "constant", "p_base": p_base}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+class TestMinimizeFeasible(unittest.TestCase):
+    def setUp(self):
+        self.scenario = inp.compile_config(_pmic_config())
+
+    def test_finds_smallest_feasible_capacitance(self):
+        result = optimizer.minimize_feasible(
+            self.scenario, "storage.capacitance", 1e-3, 0.1, tolerance=1e-3)
+
+        self.assertIsNotNone(result.value)
+        self.assertTrue(optimizer.probe_no_brownout(
+            self.scenario, "storage.capacitance", result.value).feasible)
+        self.assertFalse(optimizer.probe_no_brownout(
+            self.scenario, "storage.capacitance", result.value - 1e-3).feasible)
+
+    def test_infeasible_probes_stop_early(self):
+        result = optimizer.minimize_feasible(
+            self.scenario, "storage.capacitance", 1e-3, 0.1, tolerance=1e-3)
+
+        steps = len(inp.Input(self.scenario).t_vector)
+        infeasible = [probe for probe in result.probes if not probe.feasible]
+        self.assertGreater(len(infeasible), 0)
+        for probe in infeasible:
+            self.assertLess(probe.steps, steps)
+            self.assertIsNotNone(probe.stopped_at)
+        self.assertLess(result.steps_simulated, len(result.probes) * steps)
+
+    def test_probes_do_not_print(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            optimizer.minimize_feasible(
+                self.scenario, "storage.capacitance", 1e-3, 0.1, tolerance=1e-2)
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_no_feasible_value(self):
+        result = optimizer.minimize_feasible(
+            self.scenario, "storage.capacitance", 1e-4, 1e-3)
+        self.assertIsNone(result.value)
+        self.assertEqual(len(result.probes), 1)
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            optimizer.minimize_feasible(
+                self.scenario, "storage.capacitance", 0.1, 0.01)
+        with self.assertRaises(ValueError):
+            optimizer.minimize_feasible(
+                self.scenario, "storage.missing", 0.01, 0.1)
+
+
+class TestGoldenSection(unittest.TestCase):
+    def test_minimizes_unimodal_objective(self):
+        scenario = inp.compile_config(_pmic_config(duration=10))
+        result = optimizer.golden_section(
+            scenario, "storage.capacitance", 0.01, 0.2,
+            objective=lambda sim_input: (sim_input.storage.CAPACITANCE - 0.05) ** 2,
+            tolerance=1e-4)
+        self.assertAlmostEqual(result.value, 0.05, delta=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
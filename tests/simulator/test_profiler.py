@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.simulator.profiler import Profiler
+
+
+def _mixed_input(duration=60):
+    config = inp.load_config_from_file("src/input/files/config-mixed.json")
+    config["simulation"]["duration"] = duration
+    return inp.Input(config)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_profiled_run_matches_plain_run(self):
+        expected = simulator.run(_mixed_input())
+        output = simulator.run(_mixed_input(), profiler=Profiler())
+        self.assertEqual(output, expected)
+
+    def test_program_method_restored_after_run(self):
+        sim_input = _mixed_input()
+        simulator.run(sim_input, profiler=Profiler())
+        self.assertNotIn("get_cost_for_t_step", vars(sim_input.load.program))
+
+    def test_records_phases(self):
+        profiler = Profiler()
+        sim_input = _mixed_input()
+        simulator.run(sim_input, profiler=profiler)
+
+        steps = len(sim_input.t_vector)
+        for phase in ["supply", "load", "storage", "output"]:
+            self.assertEqual(profiler.calls[phase], steps)
+            self.assertGreater(profiler.total_ns[phase], 0)
+        self.assertEqual(profiler.calls["pmic"], 0)
+        self.assertIn("load.program", profiler.report())
+
+    def test_sampling(self):
+        profiler = Profiler(sample_every=10)
+        sim_input = _mixed_input()
+        simulator.run(sim_input, profiler=profiler)
+
+        steps = len(sim_input.t_vector)
+        self.assertEqual(profiler.sampled_steps, (steps + 9) // 10)
+        self.assertEqual(profiler.calls["supply"], profiler.sampled_steps)
+        self.assertEqual(profiler.total_steps, steps)
+
+    def test_invalid_sample_every(self):
+        with self.assertRaises(ValueError):
+            Profiler(sample_every=0)
+
+    def test_write_chrome_trace(self):
+        profiler = Profiler(max_trace_events=50)
+        simulator.run(_mixed_input(), profiler=profiler)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, "trace.json")
+            profiler.write_chrome_trace(filepath)
+            with open(filepath, encoding="utf-8") as f:
+                trace = json.load(f)
+
+        self.assertEqual(len(trace["traceEvents"]), 50)
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.simulator.recording import RecordingPolicy
+
+
+def _config(duration=600):
+    config = inp.load_config_from_file("src/input/files/config-complete.json")
+    config["supply"] = {"type": "constant", "p_base": 0.005}
+    config["simulation"]["duration"] = duration
+    return config
+
+
+def _transition_indices(full):
+    states = [(data["storage"]["status"], data["load"]["mode"], data.get("pmic", {}).get("vbat_ok"))
+              for data in full.values()]
+    return [k for k in range(1, len(states)) if states[k] != states[k - 1]]
+
+
+class TestRecordingPolicy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.full = simulator.run(inp.Input(_config()))
+        cls.times = list(cls.full)
+
+    def _run(self, recording, config=None):
+        return simulator.run(inp.Input(config or _config()), recording=recording)
+
+    def test_every_step_matches_full_output(self):
+        self.assertEqual(self._run(RecordingPolicy(every=1, context=0)), self.full)
+
+    def test_keeps_coarse_trace_and_context_around_transitions(self):
+        recording = RecordingPolicy(every=100, context=3)
+        output = self._run(recording)
+        transitions = _transition_indices(self.full)
+
+        self.assertGreater(len(transitions), 0)
+        self.assertEqual(recording.transitions, len(transitions))
+        self.assertLess(len(output), len(self.full))
+        for t, data in output.items():
+            self.assertEqual(data, self.full[t])
+        for k in range(0, len(self.times), 100):
+            self.assertIn(self.times[k], output)
+        for k in transitions:
+            for j in range(max(0, k - 3), min(len(self.times), k + 4)):
+                self.assertIn(self.times[j], output)
+
+    def test_window_aggregates(self):
+        recording = RecordingPolicy(window=250)
+        self._run(recording)
+        windows = recording.windows
+        voltages = [data["storage"]["voltage"] for data in self.full.values()]
+
+        self.assertEqual(sum(window["steps"] for window in windows), len(self.full))
+        first = voltages[:250]
+        v_min, v_mean, v_max = windows[0]["storage_voltage"]
+        self.assertEqual((v_min, v_max), (min(first), max(first)))
+        self.assertAlmostEqual(v_mean, sum(first) / 250)
+
+    def test_memory_budget(self):
+        recording = RecordingPolicy(every=1, window=10, context=2, max_snapshots=200, max_windows=16)
+        output = self._run(recording, _config(duration=3600))
+
+        self.assertLessEqual(len(output), 200)
+        self.assertGreater(recording.every, 1)
+        self.assertLess(len(recording.windows), 16 + 1)
+        self.assertEqual(sum(window["steps"] for window in recording.windows), recording.steps)
+
+    def test_cannot_profile_recorded_run(self):
+        from src.simulator.profiler import Profiler
+
+        with self.assertRaises(ValueError):
+            simulator.run(inp.Input(_config()), profiler=Profiler(), recording=RecordingPolicy())
@@ -1,6 +1,10 @@
 import src.simulator.simulator as simulator
 import src.input.input as inp
+import os
+import tempfile
+import time
 import unittest
+from unittest import mock
 
 
 class TestGenerateTVector(unittest.TestCase):
@@ -80,5 +84,78 @@ class TestSimulatorRun(unittest.TestCase):
             )
 
 
+class TestProgramExecutedOps(unittest.TestCase):
+    def test_ops_are_fixed_width_per_step(self):
+        from src.program.program import INSTRUCTIONS, ops_dict
+        from src.output.output import csv_rows
+
+        config = inp.load_config_from_file("src/input/files/config-complete.json")
+        config["supply"] = {"type": "constant", "p_base": 0.005}
+        config["simulation"]["duration"] = 120
+        sim_input = inp.Input(config)
+        output = simulator.run(sim_input)
+
+        for data in output.values():
+            ops = data["load"]["program_executed_ops"]
+            self.assertIsInstance(ops, tuple)
+            self.assertEqual(len(ops), len(INSTRUCTIONS))
+        self.assertEqual(ops_dict(ops), sim_input.load.program.executed_ops_last_step)
+
+        t, data = next((t, data) for t, data in output.items() if any(data["load"]["program_executed_ops"]))
+        expected = ",".join(f"{instruct}:{secs:.4f}s"
+                            for instruct, secs in ops_dict(data["load"]["program_executed_ops"]).items())
+        self.assertEqual(csv_rows(t, data)[0]["program_executed_ops"], expected)
+
+
+class TestSimulatorRunCached(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.config = inp.load_config_from_file(
+            "src/input/files/config-simple.json")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_cache_hit_identical_to_fresh_run(self):
+        fresh = simulator.run(inp.Input(self.config))
+        first = simulator.run_cached(self.config, cache_dir=self._tmp_dir.name)
+        second = simulator.run_cached(
+            self.config, cache_dir=self._tmp_dir.name)
+        self.assertEqual(first, fresh)
+        self.assertEqual(second, fresh)
+
+    def test_cache_hit_is_fast(self):
+        simulator.run_cached(self.config, cache_dir=self._tmp_dir.name)
+        start = time.perf_counter()
+        simulator.run_cached(self.config, cache_dir=self._tmp_dir.name)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_cache_hit_does_not_load_supply_profile(self):
+        profile_filepath = os.path.join(self._tmp_dir.name, "profile.csv")
+        with open(profile_filepath, "w", encoding="utf-8") as f:
+            f.write("timestamp,power_out_w\n")
+            for i in range(200):
+                f.write(f"{i * 0.5},{0.0002 + 0.0001 * (i % 7):.9f}\n")
+        config = inp.load_config_from_file("src/input/files/config-complete-pmic.json")
+        config["supply"]["profile_filepath"] = profile_filepath
+        config["simulation"]["duration"] = 60
+        first = simulator.run_cached(config, cache_dir=self._tmp_dir.name)
+        with mock.patch.object(inp, "_load_supply_profile") as load_profile:
+            second = simulator.run_cached(config, cache_dir=self._tmp_dir.name)
+        load_profile.assert_not_called()
+        self.assertEqual(second, first)
+
+    def test_model_version_changes_key(self):
+        simulator.run_cached(self.config, cache_dir=self._tmp_dir.name)
+        original_version = simulator.MODEL_VERSION
+        try:
+            simulator.MODEL_VERSION = original_version + "-test"
+            output = simulator.run_cached(
+                self.config, cache_dir=self._tmp_dir.name)
+        finally:
+            simulator.MODEL_VERSION = original_version
+        self.assertEqual(len(output), 9601)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import src.input.input as inp
+import src.simulator.simulator as simulator
+from src.simulator.profiler import Profiler
+from src.simulator.stop import StopConditions, StorageFull, LoadOffFor, EnergyBudget, Brownout, Predicate
+
+
+def _pmic_input(duration=600, p_base=0.01, capacitance=None):
+    config = inp.load_config_from_file(
+        "src/input/files/config-complete-pmic.json")
+    config["supply"] = {"type": "constant", "p_base": p_base}
+    config["simulation"]["duration"] = duration
+    if capacitance is not None:
+        config["storage"]["capacitance"] = capacitance
+    return inp.Input(config)
+
+
+class TestStopConditions(unittest.TestCase):
+    def test_run_without_stop_condition_met(self):
+        stop = StopConditions([EnergyBudget(1e9)])
+        sim_input = _pmic_input()
+        output = simulator.run(sim_input, stop=stop)
+
+        self.assertFalse(stop.stopped)
+        self.assertIsNone(stop.reason)
+        self.assertEqual(stop.steps, len(sim_input.t_vector))
+        self.assertEqual(len(output), len(sim_input.t_vector))
+        self.assertEqual(output, simulator.run(_pmic_input()))
+
+    def test_energy_budget(self):
+        stop = StopConditions([EnergyBudget(0.5)])
+        output = simulator.run(_pmic_input(), stop=stop)
+
+        self.assertTrue(stop.stopped)
+        self.assertEqual(stop.reason, "energy budget of 0.5J exceeded")
+        self.assertEqual(len(output), stop.steps)
+        last = output[stop.stopped_at]["load"]["total_energy_consumed"]
+        self.assertGreater(last, 0.5)
+
+    def test_storage_full(self):
+        stop = StopConditions([StorageFull()])
+        sim_input = _pmic_input(p_base=1.0, capacitance=0.001)
+        simulator.run(sim_input, stop=stop)
+
+        self.assertEqual(stop.reason, "storage full with constant supply")
+        self.assertGreaterEqual(
+            sim_input.storage.energy_stored, sim_input.storage.E_MAX)
+
+    def test_load_off_for(self):
+        stop = StopConditions([LoadOffFor(60)])
+        simulator.run(_pmic_input(p_base=0.0), stop=stop)
+        self.assertEqual(stop.reason, "load off for 60s")
+        self.assertEqual(stop.stopped_at, 60.5)
+
+    def test_brownout(self):
+        stop = StopConditions([Brownout()])
+        simulator.run(_pmic_input(capacitance=0.005), stop=stop)
+        self.assertEqual(stop.reason, "brown-out")
+
+    def test_evaluated_every_n_steps(self):
+        stop = StopConditions(
+            [Predicate(lambda sim_input, t: t >= 1.0, reason="t >= 1", every=10)])
+        simulator.run(_pmic_input(), stop=stop)
+        self.assertEqual(stop.reason, "t >= 1")
+        self.assertEqual(stop.steps, 11)
+        self.assertEqual(stop.stopped_at, 5.0)
+
+    def test_stop_with_profiler(self):
+        stop = StopConditions([EnergyBudget(0.5)])
+        profiler = Profiler()
+        output = simulator.run(_pmic_input(), profiler=profiler, stop=stop)
+        self.assertTrue(stop.stopped)
+        self.assertEqual(profiler.total_steps, len(output))
+
+    def test_invalid_every(self):
+        with self.assertRaises(ValueError):
+            EnergyBudget(1.0, every=0)
+
+
+if __name__ == "__main__":
+    unittest.main()